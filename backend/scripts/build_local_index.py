@@ -0,0 +1,35 @@
+import argparse
+import os
+import time
+from app.vector_index import LocalVectorIndex, build_local_index
+
+# --- Configuration ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(SCRIPT_DIR))
+EXPORT_DIR = os.path.join(PROJECT_ROOT, "data", "export")
+DEFAULT_OUTPUT_DIR = os.path.join(PROJECT_ROOT, "data", "local_index") # config.LOCAL_INDEX_PATH default
+
+# Build from an export of the papers index:  python scripts/export_index.py --vectors data/export/vectors.npy
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the in-process vector index used by SEARCH_BACKEND=local.")
+    parser.add_argument("--records", default=os.path.join(EXPORT_DIR, "papers.ndjson"), help="Exported metadata (NDJSON)")
+    parser.add_argument("--vectors", default=os.path.join(EXPORT_DIR, "vectors.npy"), help="Exported vectors (.npy)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--dtype", choices=["float32", "int8"], default="float32", help="int8: 4x smaller, ~1%% score error")
+    parser.add_argument("--ivf-lists", type=int, default=0, help="IVF partitions (0: brute force; ~sqrt(N) at scale)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    for path in (args.records, args.vectors):
+        if not os.path.exists(path):
+            print(f"ERROR: {path} not found. Run scripts/export_index.py --vectors first.")
+            return
+    print(f"Building local index in {args.output} ({args.dtype}, {args.ivf_lists or 'no'} IVF lists)...")
+    started = time.perf_counter()
+    manifest = build_local_index(args.records, args.vectors, args.output, dtype=args.dtype, ivf_lists=args.ivf_lists)
+    print(f"Built {manifest['count']} vectors of dim {manifest['dim']} in {time.perf_counter() - started:.1f}s.")
+    print(f"Check: {LocalVectorIndex(args.output).stats()}")
+
+if __name__ == "__main__":
+    main()
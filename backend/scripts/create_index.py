@@ -1,49 +1,38 @@
 import asyncio
-from app.elastic import es_client # Import our pre-configured async client
+from app.elastic import create_client # Pooled, retrying client shared with the API
 from elasticsearch import helpers
+from app.config import PAPERS_INDEX, PLANETS_INDEX
+from app.mappings import PAPERS_MAPPING, PLANETS_MAPPING # kNN settings in the papers mapping, see scripts/eval_knn.py
 
-# --- Configuration ---
-INDEX_NAME = "planets"
-# <<< NEW: Specify embedding dimension >>>
-EMBEDDING_DIM = 768 # For textembedding-gecko models
-
-# --- Index Mapping Definition ---
-INDEX_MAPPING = {
-    "properties": {
-        # --- Planet Fields ---
-        "pl_name": {"type": "keyword"},
-        "hostname": {"type": "keyword"},
-        "discoverymethod": {"type": "keyword"},
-        "disc_year": {"type": "integer"},
-        "pl_orbper": {"type": "float"},
-        "pl_masse": {"type": "float"},
-        "pl_rade": {"type": "float"},
-        "sy_dist": {"type": "float"},
+es_client = create_client()
 
-        # --- Star Fields ---
-        "star_simbad_main_id": {"type": "keyword"},
-        "star_sp_type": {"type": "keyword"},
-        "star_plx_value": {"type": "float"},
-        "star_rvz_radvel": {"type": "float"},
-        "star_fe_h": {"type": "float"},
-        # Add other star fields if needed, or rely on dynamic mapping
+# --- Configuration ---
+# planets: tabular rows for term/range queries; papers: text + embeddings for kNN (see app/mappings.py)
+INDICES = {PLANETS_INDEX: PLANETS_MAPPING, PAPERS_INDEX: PAPERS_MAPPING}
 
-        # --- arXiv Fields ---
-        "arxiv_id": {"type": "keyword"},
-        "title": {"type": "text", "analyzer": "standard"},
-        "abstract": {"type": "text", "analyzer": "standard"},
-        "published_date": {"type": "date"},
+async def recreate_index(index_name: str, mapping: dict):
+    # Always delete existing index to ensure mapping is updated
+    print(f"Checking if index '{index_name}' exists...")
+    if await es_client.indices.exists(index=index_name):
+        print(f"Index '{index_name}' exists. Deleting it to apply new mapping...")
+        try:
+            await es_client.indices.delete(index=index_name, ignore=[400, 404])
+            print(f"Index '{index_name}' deleted.")
+        except Exception as e:
+            print(f"ERROR deleting index: {e}")
+            # Optional: Decide whether to proceed if deletion fails
+            # return
+    else:
+        print(f"Index '{index_name}' does not exist.")
 
-        # --- <<< NEW: Vector Field Definition >>> ---
-        "abstract_vector": {
-            "type": "dense_vector",
-            "dims": EMBEDDING_DIM, # Use the configured dimension
-            "index": True,         # Make the vector searchable
-            "similarity": "cosine" # Use cosine similarity for search
-        }
-        # --- <<< END VECTOR FIELD >>> ---
-    }
-}
+    # Create the new index with the specified mapping
+    print(f"Creating index '{index_name}' with updated mapping...")
+    await es_client.indices.create(
+        index=index_name,
+        mappings=mapping,
+        ignore=[400] # Ignore only 'resource_already_exists_exception'
+    )
+    print(f"Index '{index_name}' created/updated successfully.")
 
 # --- Main Async Function ---
 async def create_index():
@@ -53,29 +42,9 @@ async def create_index():
         return
     print(f"Connection successful.")
 
-    # Always delete existing index to ensure mapping is updated
-    print(f"Checking if index '{INDEX_NAME}' exists...")
-    if await es_client.indices.exists(index=INDEX_NAME):
-        print(f"Index '{INDEX_NAME}' exists. Deleting it to apply new mapping...")
-        try:
-            await es_client.indices.delete(index=INDEX_NAME, ignore=[400, 404])
-            print(f"Index '{INDEX_NAME}' deleted.")
-        except Exception as e:
-            print(f"ERROR deleting index: {e}")
-            # Optional: Decide whether to proceed if deletion fails
-            # return
-    else:
-        print(f"Index '{INDEX_NAME}' does not exist.")
-
-    # Create the new index with the specified mapping
-    print(f"Creating index '{INDEX_NAME}' with updated mapping (including vector field)...")
     try:
-        await es_client.indices.create(
-            index=INDEX_NAME,
-            mappings=INDEX_MAPPING,
-            ignore=[400] # Ignore only 'resource_already_exists_exception'
-        )
-        print(f"Index '{INDEX_NAME}' created/updated successfully.")
+        for index_name, mapping in INDICES.items():
+            await recreate_index(index_name, mapping)
     except Exception as e:
         print(f"ERROR creating index: {e}")
     finally:
@@ -0,0 +1,165 @@
+import argparse
+import asyncio
+import json
+import os
+import numpy as np
+from elasticsearch import helpers
+from tqdm import tqdm
+from app.config import KNN_K, KNN_NUM_CANDIDATES, PAPERS_INDEX, SMALL_VECTOR_DIMS, TWO_STAGE_CANDIDATES
+from app.elastic import create_client # Pooled, retrying client shared with the API
+from app.export import VECTOR_FIELD
+from app.knn_eval import exact_top_k, recommend, run_es_trial, run_local_trial, summarize
+from app.vector_index import LocalVectorIndex
+
+# Measures recall@k vs latency of the kNN settings used by search_elastic.
+# Needs an export first:  python scripts/export_index.py --vectors data/export/vectors.npy
+#   python scripts/eval_knn.py                                 # live index, k x num_candidates sweep
+#   python scripts/eval_knn.py --profiles hnsw,int8_hnsw,bbq_hnsw   # re-index a copy per quantization profile
+#   python scripts/eval_knn.py --two-stage                     # also Matryoshka small-field kNN + full-vector rescoring
+#   python scripts/eval_knn.py --local data/local_index        # local index, nprobe sweep
+# Queries are documents sampled from the corpus (their own hit excluded), or --queries-file
+# (one question per line, embedded with the production model).
+
+# --- Configuration ---
+INDEX_NAME = PAPERS_INDEX
+EMBEDDING_MODEL_NAME = "gemini-embedding-001"
+EMBEDDING_DIM = 768
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(SCRIPT_DIR))
+EXPORT_DIR = os.path.join(PROJECT_ROOT, "data", "export")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="kNN recall vs latency sweep.")
+    parser.add_argument("--records", default=os.path.join(EXPORT_DIR, "papers.ndjson"))
+    parser.add_argument("--vectors", default=os.path.join(EXPORT_DIR, "vectors.npy"))
+    parser.add_argument("--index", default=INDEX_NAME)
+    parser.add_argument("--sample", type=int, default=200, help="Corpus documents used as queries")
+    parser.add_argument("--queries-file", help="Text queries, one per line (instead of --sample)")
+    parser.add_argument("--k", default=str(KNN_K), help="Comma-separated k values")
+    parser.add_argument("--num-candidates", default="10,25,50,100,200", help="Comma-separated num_candidates values")
+    parser.add_argument("--profiles", default="", help="index_options types to re-index and compare, e.g. hnsw,int8_hnsw,bbq_hnsw")
+    parser.add_argument("--keep-indices", action="store_true", help="Don't delete the per-profile copies")
+    parser.add_argument("--two-stage", action="store_true", help=f"Also evaluate two-stage search ({SMALL_VECTOR_DIMS}-dim field, live index)")
+    parser.add_argument("--local", help="Evaluate a local index directory (nprobe sweep) instead of ES")
+    parser.add_argument("--nprobe", default="1,2,4,8,16,0", help="Local IVF lists probed (0: all)")
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--report", default=os.path.join(EXPORT_DIR, "knn_eval.json"))
+    return parser.parse_args()
+
+def load_corpus(records_path, vectors_path):
+    """(ids, vectors) for the exported documents that have a vector, in vector-row order."""
+    vectors = np.load(vectors_path, mmap_mode="r")
+    ids = [None] * len(vectors)
+    with open(records_path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("vector_row") is not None:
+                ids[record["vector_row"]] = record["id"]
+    return ids, vectors
+
+def embed_queries(path):
+    from google.cloud import aiplatform
+    from vertexai.language_models import TextEmbeddingModel
+    from app.config import GCP_LOCATION, GCP_PROJECT_ID
+    aiplatform.init(project=GCP_PROJECT_ID, location=GCP_LOCATION)
+    model = TextEmbeddingModel.from_pretrained(EMBEDDING_MODEL_NAME)
+    with open(path, encoding="utf-8") as f:
+        texts = [line.strip() for line in f if line.strip()]
+    print(f"Embedding {len(texts)} queries...")
+    return np.asarray([model.get_embeddings([text], output_dimensionality=EMBEDDING_DIM)[0].values for text in texts],
+                      dtype=np.float32)
+
+def print_table(results):
+    print(f"\n{'target':<24}{'k':>5}{'cands/np':>9}{'recall':>9}{'p50 ms':>9}{'p99 ms':>9}")
+    for r in results:
+        candidates = r.get("num_candidates", r.get("nprobe", ""))
+        print(f"{r['target']:<24}{r['k']:>5}{candidates!s:>9}{r['recall']:>9.3f}{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}")
+
+async def create_profile_index(es_client, name, profile, ids, vectors):
+    await es_client.indices.delete(index=name, ignore_unavailable=True)
+    await es_client.indices.create(index=name, mappings={"properties": {VECTOR_FIELD: {
+        "type": "dense_vector", "dims": vectors.shape[1], "index": True, "similarity": "cosine",
+        "index_options": {"type": profile},
+    }}})
+    actions = ({"_index": name, "_id": doc_id, "_source": {VECTOR_FIELD: vectors[row].tolist()}}
+               for row, doc_id in enumerate(ids) if doc_id is not None)
+    await helpers.async_bulk(es_client, actions, chunk_size=500)
+    await es_client.indices.refresh(index=name)
+    await es_client.indices.forcemerge(index=name, max_num_segments=1) # a fair HNSW comparison: one graph per shard
+
+async def run_eval(args):
+    ids, vectors = load_corpus(args.records, args.vectors)
+    rows_with_vectors = [row for row, doc_id in enumerate(ids) if doc_id is not None]
+    ks = [int(k) for k in args.k.split(",")]
+    max_k = max(ks)
+    if args.queries_file:
+        query_vectors, exclude_rows = embed_queries(args.queries_file), None
+    else:
+        rng = np.random.default_rng(0)
+        exclude_rows = sorted(rng.choice(rows_with_vectors, size=min(args.sample, len(rows_with_vectors)), replace=False).tolist())
+        query_vectors = np.asarray(vectors[exclude_rows], dtype=np.float32)
+    exclude_ids = [ids[row] for row in exclude_rows] if exclude_rows is not None else None
+    print(f"Ground truth: exact top-{max_k} for {len(query_vectors)} queries over {len(rows_with_vectors)} vectors...")
+    truth_rows = exact_top_k(vectors, query_vectors, max_k, exclude=exclude_rows)
+    truth = [[ids[row] for row in rows] for rows in truth_rows]
+
+    results = []
+    if args.local:
+        index = LocalVectorIndex(args.local)
+        for k in ks:
+            for nprobe in [int(n) for n in args.nprobe.split(",")]:
+                found, latencies = run_local_trial(index, query_vectors, k, nprobe or None, exclude_ids)
+                results.append(summarize({"target": f"local:{index.dtype}", "k": k, "nprobe": nprobe}, truth, found, latencies))
+        report(args, results)
+        return
+
+    es_client = create_client()
+    try:
+        targets = [(args.index, "live", 0)]
+        if args.two_stage and not SMALL_VECTOR_DIMS:
+            print("Skipping --two-stage: SMALL_VECTOR_DIMS is 0 (the index has no small vector field).")
+        elif args.two_stage:
+            targets.append((args.index, f"two_stage:{SMALL_VECTOR_DIMS}", SMALL_VECTOR_DIMS))
+        for profile in [p for p in args.profiles.split(",") if p]:
+            name = f"{args.index}-knn-eval-{profile}"
+            print(f"Indexing a copy with index_options '{profile}' as '{name}'...")
+            await create_profile_index(es_client, name, profile, ids, vectors)
+            targets.append((name, profile, 0))
+        settings = [(k, c) for k in ks for c in (int(c) for c in args.num_candidates.split(",")) if c >= k]
+        for index_name, profile, dims in targets:
+            trial = dict(two_stage_dims=dims, two_stage_candidates=TWO_STAGE_CANDIDATES)
+            try:
+                await run_es_trial(es_client, index_name, VECTOR_FIELD, query_vectors[:5], ks[0], max(c for _, c in settings), **trial) # warm caches
+            except Exception as e: # e.g. live kNN on an index whose full vector has no HNSW graph
+                print(f"Skipping '{profile}': {e}")
+                continue
+            for k, candidates in tqdm(settings, desc=profile):
+                found, latencies = await run_es_trial(es_client, index_name, VECTOR_FIELD, query_vectors, k, candidates, exclude_ids, **trial)
+                results.append(summarize({"target": profile, "k": k, "num_candidates": candidates}, truth, found, latencies))
+        report(args, results)
+    finally:
+        if not args.keep_indices:
+            for profile in [p for p in args.profiles.split(",") if p]:
+                await es_client.indices.delete(index=f"{args.index}-knn-eval-{profile}", ignore_unavailable=True)
+        await es_client.close()
+
+def report(args, results):
+    print_table(results)
+    best = recommend(results, args.target_recall)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump({"target_recall": args.target_recall, "results": results, "recommended": best}, f, indent=2)
+    print(f"\nReport written to {args.report}")
+    if best is None:
+        return
+    print(f"Recommended (recall {best['recall']:.3f}, p99 {best['p99_ms']:.1f} ms):")
+    if "num_candidates" in best:
+        print(f"  KNN_K={best['k']} KNN_NUM_CANDIDATES={best['num_candidates']}")
+        if best["target"].startswith("two_stage"):
+            print(f"  TWO_STAGE_SEARCH=true TWO_STAGE_NUM_CANDIDATES={best['num_candidates']}")
+        elif best["target"] != "live":
+            print(f"  VECTOR_INDEX_TYPE={best['target']} (then re-run create_index.py and ingest)")
+    else:
+        print(f"  LOCAL_INDEX_NPROBE={best['nprobe']}")
+
+if __name__ == "__main__":
+    asyncio.run(run_eval(parse_args()))
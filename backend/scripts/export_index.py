@@ -0,0 +1,70 @@
+import argparse
+import asyncio
+import os
+import time
+from tqdm import tqdm
+from app.elastic import create_client # Pooled, retrying client shared with the API
+from app.config import PAPERS_INDEX
+from app.export import DEFAULT_PAGE_SIZE, DEFAULT_SLICES, export_index
+
+es_client = create_client(http_compress=True) # large pages of documents compress well
+
+# --- Configuration ---
+INDEX_NAME = PAPERS_INDEX # the vector-bearing index (--index planets for the tabular rows)
+EMBEDDING_DIM = 768
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(SCRIPT_DIR))
+DEFAULT_OUTPUT_DIR = os.path.join(PROJECT_ROOT, "data", "export")
+
+# --- Main Async Function ---
+async def run_export(args):
+    print(f"Checking connection to Elastic...")
+    if not await es_client.ping():
+        print("ERROR: Connection to Elasticsearch failed.")
+        return
+    print(f"Connection successful.")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    total = (await es_client.count(index=args.index)).get("count")
+    print(f"Exporting {total} documents from '{args.index}' to {args.output} ({args.format}, {args.slices} slices)...")
+    if args.vectors:
+        print(f"Vectors -> {args.vectors}")
+
+    started = time.perf_counter()
+    progress = tqdm(total=total, unit="docs", desc="Exporting")
+    try:
+        stats = await export_index(
+            es_client, args.index, args.output,
+            fmt=args.format, vectors_path=args.vectors, dim=EMBEDDING_DIM,
+            slices=args.slices, page_size=args.page_size, progress=progress.update,
+        )
+        progress.close()
+        print(f"\nExport finished in {time.perf_counter() - started:.1f}s: "
+              f"{stats['documents']} documents, {stats['vectors']} vectors.")
+    except Exception as e:
+        progress.close()
+        print(f"\nERROR during export: {e}")
+    finally:
+        try:
+            await es_client.close()
+            print("Elastic client closed.")
+        except Exception as close_err:
+            print(f"Error closing Elastic client: {close_err}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Dump an index (point-in-time + search_after, parallel slices).")
+    parser.add_argument("--index", default=INDEX_NAME)
+    parser.add_argument("--format", choices=["ndjson", "parquet"], default="ndjson")
+    parser.add_argument("--output", help="Metadata file (default: data/export/<index>.<format>)")
+    parser.add_argument("--vectors", help="Also write abstract vectors to this .npy file (memmap)")
+    parser.add_argument("--slices", type=int, default=DEFAULT_SLICES)
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    args = parser.parse_args()
+    if not args.output:
+        extension = "parquet" if args.format == "parquet" else "ndjson"
+        args.output = os.path.join(DEFAULT_OUTPUT_DIR, f"{args.index}.{extension}")
+    return args
+
+# --- Run the async function ---
+if __name__ == "__main__":
+    asyncio.run(run_export(parse_args()))
@@ -2,7 +2,10 @@ import asyncio
 import os
 import pandas as pd
 from elasticsearch import helpers
-from app.elastic import es_client
+from app.elastic import create_client # Pooled, retrying client shared with the API
+from app.config import PAPERS_INDEX, SMALL_VECTOR_DIMS
+from app.matryoshka import SMALL_VECTOR_FIELD, truncate_embedding
+from app.dedup import near_duplicate_clusters, split_version
 from tqdm import tqdm
 import time
 import google.auth
@@ -11,10 +14,12 @@ from vertexai.language_models import TextEmbeddingModel
 from vertexai.preview.language_models import TextEmbeddingModel
 import numpy as np # Import numpy for type checking
 
+es_client = create_client(http_compress=True) # bulk bodies are large and compress well
+
 # --- Configuration ---
 # ... (Config remains the same) ...
 INPUT_ARXIV_FILE = os.path.join("data", "arxiv_abstracts.csv")
-INDEX_NAME = "planets"
+INDEX_NAME = PAPERS_INDEX # Text + vectors; planet rows live in PLANETS_INDEX
 CHUNK_SIZE = 50
 GCP_PROJECT_ID = "project-kepler-elastic"
 GCP_LOCATION = "us-central1"
@@ -49,6 +54,17 @@ except FileNotFoundError:
     print(f"ERROR: arXiv data file not found at {INPUT_ARXIV_PATH}")
     exit()
 
+# --- Collapse Near-Duplicates (versions, re-harvests, cross-lists; see app/dedup.py) ---
+# One canonical row per cluster, listing every member id in "versions": only it is embedded.
+start_time = time.time()
+clusters = near_duplicate_clusters(df['arxiv_id'].tolist(), df['abstract'].tolist(), df['published_date'].tolist())
+canonical_rows = [members[0] for members in clusters]
+versions = [[df['arxiv_id'].iloc[row] for row in members] for members in clusters]
+df = df.iloc[canonical_rows].reset_index(drop=True)
+df['versions'] = versions
+print(f"Collapsed near-duplicates in {time.time() - start_time:.1f}s: {len(df)} canonical abstracts "
+      f"({sum(len(members) - 1 for members in clusters)} duplicates skipped).")
+
 # --- Prepare Data & Generate Embeddings ---
 # ... (get_embeddings function remains the same) ...
 def get_embeddings(texts: list[str]) -> list[list[float]] | None:
@@ -87,7 +103,9 @@ def generate_arxiv_actions(dataframe, index_name):
                 
                 for key, value in row.items():
                     # Handle different data types
-                    if pd.isna(value) or value is pd.NA or value is pd.NaT:
+                    if isinstance(value, list): # versions (pd.isna would test every element)
+                        doc_clean[key] = value
+                    elif pd.isna(value) or value is pd.NA or value is pd.NaT:
                         doc_clean[key] = None
                     elif isinstance(value, pd.Timestamp):
                         doc_clean[key] = value.isoformat()
@@ -108,11 +126,15 @@ def generate_arxiv_actions(dataframe, index_name):
                 
                 # Add the embedding as a list
                 doc_clean['abstract_vector'] = embedding if isinstance(embedding, list) else list(embedding)
+                if SMALL_VECTOR_DIMS:
+                    # Same embedding call: its truncated, re-normalized prefix (two-stage search)
+                    doc_clean[SMALL_VECTOR_FIELD] = truncate_embedding(embedding, SMALL_VECTOR_DIMS)
 
                 progress.update(1)
                 yield {
                     "_index": index_name,
-                    "_id": doc_clean.get("arxiv_id", f"row_{index}"),
+                    # Unversioned id: a re-harvest picking up "v3" overwrites the "v2" document
+                    "_id": split_version(doc_clean["arxiv_id"])[0] if doc_clean.get("arxiv_id") else f"row_{index}",
                     "_source": doc_clean,
                 }
         else:
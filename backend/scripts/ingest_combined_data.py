@@ -2,13 +2,18 @@ import asyncio
 import os
 import pandas as pd
 from elasticsearch import helpers
-from app.elastic import es_client
+from app.elastic import create_client # Pooled, retrying client shared with the API
+from app.config import PLANETS_INDEX
+from app.derived import INPUT_COLUMNS, PROPERTY_FEATURES, derive_planet_quantities, property_vectors
+from app.mappings import PROPERTY_VECTOR_FIELD
 from tqdm import tqdm
 import numpy as np
 
+es_client = create_client(http_compress=True) # bulk bodies are large and compress well
+
 # --- Configuration ---
 INPUT_COMBINED_FILE = os.path.join("data", "combined_planet_star_data.csv")
-INDEX_NAME = "planets"
+INDEX_NAME = PLANETS_INDEX # Tabular planet rows only; papers go to PAPERS_INDEX
 CHUNK_SIZE = 500
 
 # --- Determine project root ---
@@ -31,6 +36,7 @@ except FileNotFoundError:
 print("Cleaning data types...")
 numeric_cols = [
     'pl_orbper', 'pl_masse', 'pl_rade', 'sy_dist',
+    'pl_orbsmax', 'pl_dens', 'pl_insol', 'pl_eqt', 'st_mass', 'st_rad', 'st_teff', 'st_lum',
     'star_plx_value', 'star_rvz_radvel', 'star_fe_h',
     'star_U', 'star_B', 'star_V', 'star_R', 'star_I',
     'star_J', 'star_H', 'star_K'
@@ -57,6 +63,24 @@ for col in date_cols:
 print("Finished cleaning data types.")
 # --- END DATA CLEANING ---
 
+# --- DERIVED QUANTITIES (app/derived.py) ---
+print("Deriving density, gravity, semi-major axis, insolation, Teq and habitable-zone flags...")
+derived = derive_planet_quantities(
+    {col: df[col].to_numpy(dtype=float, na_value=np.nan) for col in INPUT_COLUMNS if col in df.columns}, len(df)
+)
+for col, values in derived.items():
+    known_before = int(df[col].notna().sum()) if col in df.columns else 0
+    df[col] = values
+    print(f"  {col}: {int(df[col].notna().sum())} rows with a value ({known_before} from the archive)")
+
+print("Building standardized property vectors...")
+vectors, has_vector = property_vectors(
+    {col: df[col].to_numpy(dtype=float, na_value=np.nan) for col, _ in PROPERTY_FEATURES if col in df.columns}, len(df)
+)
+df[PROPERTY_VECTOR_FIELD] = [vector.tolist() if keep else None for vector, keep in zip(vectors, has_vector)]
+print(f"  {int(has_vector.sum())}/{len(df)} planets have enough known properties for a vector")
+# --- END DERIVED QUANTITIES ---
+
 # --- Prepare Data for Bulk Ingest ---
 def generate_actions(dataframe, index_name):
     print("\nGenerating actions for bulk ingest...")
@@ -66,7 +90,9 @@ def generate_actions(dataframe, index_name):
         doc_raw = row.to_dict()
         doc_clean = {}
         for key, value in doc_raw.items():
-            if pd.isna(value):
+            if isinstance(value, list): # property vector (pd.isna would test every element)
+                doc_clean[key] = value
+            elif pd.isna(value):
                 doc_clean[key] = None
             elif isinstance(value, pd.Timestamp):
                  doc_clean[key] = value.isoformat()
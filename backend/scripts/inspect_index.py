@@ -1,9 +1,12 @@
 import asyncio
-from app.elastic import es_client # Our async client
+from app.elastic import create_client # Pooled, retrying client shared with the API
 import json
+from app.config import PAPERS_INDEX, PLANETS_INDEX
+
+es_client = create_client()
 
 # --- Configuration ---
-INDEX_NAME = "planets"
+INDEX_NAME = f"{PLANETS_INDEX},{PAPERS_INDEX}"
 
 # --- Main Async Function ---
 async def inspect_index():
@@ -0,0 +1,99 @@
+import asyncio
+import time
+from collections import Counter
+from elasticsearch import helpers
+from tqdm import tqdm
+from app.elastic import create_client # Pooled, retrying client shared with the API
+from app.config import PAPERS_INDEX, PLANETS_INDEX
+from app.export import export_hits
+from app.linker import MentionLinker
+
+es_client = create_client(http_compress=True) # bulk bodies are large and compress well
+
+# Ingest stage: run after ingest_combined_data.py and ingest_arxiv_data.py (and again after
+# either is re-run). Adds mentioned_planets / mentioned_hosts to every paper and
+# paper_count / host_paper_count to every planet, so "papers about X" is one term filter.
+
+# --- Configuration ---
+CHUNK_SIZE = 500
+PLANET_QUERY = {"exists": {"field": "pl_name"}}
+PAPER_QUERY = {"exists": {"field": "arxiv_id"}}
+
+async def load_planets():
+    """[(doc id, pl_name, hostname)] for every planet row, and the linker built from their names."""
+    linker = MentionLinker()
+    planets = []
+    async for hit in export_hits(es_client, PLANETS_INDEX, query=PLANET_QUERY,
+                                 source_includes=["pl_name", "hostname", "star_simbad_main_id"]):
+        source = hit.get("_source") or {}
+        if not source.get("pl_name"):
+            continue
+        aliases = [source["star_simbad_main_id"]] if source.get("star_simbad_main_id") else []
+        linker.add_planet(source["pl_name"], source.get("hostname"), aliases)
+        planets.append((hit["_id"], source["pl_name"], source.get("hostname")))
+    linker.build()
+    return planets, linker
+
+async def bulk_update(actions, total, desc):
+    failed = 0
+    progress = tqdm(total=total, unit="docs", desc=desc)
+    async for ok, result in helpers.async_streaming_bulk(es_client, actions, chunk_size=CHUNK_SIZE,
+                                                         raise_on_error=False, request_timeout=120):
+        if not ok:
+            failed += 1
+            error_info = result.get("update", {}).get("error", {})
+            print(f"\nFailed update (Doc ID: {result.get('update', {}).get('_id', 'N/A')}): {error_info.get('reason', error_info)}")
+        progress.update(1)
+    progress.close()
+    return failed
+
+# --- Main Async Function ---
+async def link_planets_papers():
+    print(f"Checking connection to Elastic...")
+    if not await es_client.ping():
+        print("ERROR: Connection to Elasticsearch failed.")
+        return
+    print(f"Connection successful.")
+
+    try:
+        started = time.perf_counter()
+        planets, linker = await load_planets()
+        print(f"Linker built from {len(planets)} planets ({linker.patterns} names) in {time.perf_counter() - started:.1f}s.")
+        papers_total = (await es_client.count(index=PAPERS_INDEX, query=PAPER_QUERY))["count"]
+        planet_counts, host_counts = Counter(), Counter()
+        linked = 0
+
+        async def paper_actions():
+            nonlocal linked
+            async for hit in export_hits(es_client, PAPERS_INDEX, query=PAPER_QUERY, source_includes=["title", "abstract"]):
+                source = hit.get("_source") or {}
+                mentions = linker.link(source.get("title"), source.get("abstract"))
+                planet_counts.update(mentions["mentioned_planets"])
+                host_counts.update(mentions["mentioned_hosts"])
+                linked += bool(mentions["mentioned_planets"] or mentions["mentioned_hosts"])
+                yield {"_op_type": "update", "_index": PAPERS_INDEX, "_id": hit["_id"], "doc": mentions}
+
+        failed = await bulk_update(paper_actions(), papers_total, "Linking papers")
+        print(f"{linked}/{papers_total} papers mention a known planet or host ({failed} failed updates).")
+
+        planet_actions = (
+            {"_op_type": "update", "_index": PLANETS_INDEX, "_id": doc_id,
+             "doc": {"paper_count": planet_counts[pl_name], "host_paper_count": host_counts[hostname] if hostname else 0}}
+            for doc_id, pl_name, hostname in planets
+        )
+        failed = await bulk_update(planet_actions, len(planets), "Counting planet papers")
+        print(f"Updated paper counts on {len(planets)} planets ({failed} failed updates).")
+        print(f"Most mentioned: {planet_counts.most_common(5)}")
+        print(f"Linking finished in {time.perf_counter() - started:.1f}s.")
+    except Exception as e:
+        print(f"\nERROR during linking: {e}")
+    finally:
+        try:
+            await es_client.close()
+            print("Elastic client closed.")
+        except Exception as close_err:
+            print(f"Error closing Elastic client: {close_err}")
+
+# --- Run the async function ---
+if __name__ == "__main__":
+    asyncio.run(link_planets_papers())
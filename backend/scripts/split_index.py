@@ -0,0 +1,73 @@
+import asyncio
+import time
+from app.elastic import create_client # Pooled, retrying client shared with the API
+from app.config import PAPERS_INDEX, PLANETS_INDEX
+from app.mappings import PAPERS_MAPPING
+
+es_client = create_client()
+
+# One-off migration from the old combined index (planet rows and arXiv papers both in
+# "planets") to the planets/papers split, without re-embedding: papers are copied with
+# _reindex (vectors included) and then deleted from the planets index.
+# Afterwards run scripts/link_planets_papers.py; for a clean planets mapping (no unused
+# vector fields) re-create both indices with scripts/create_index.py and re-ingest instead.
+
+# --- Configuration ---
+PAPER_QUERY = {"exists": {"field": "arxiv_id"}}
+REQUEST_TIMEOUT = 3600
+
+# --- Main Async Function ---
+async def split_index():
+    print(f"Checking connection to Elastic...")
+    if not await es_client.ping():
+        print("ERROR: Connection to Elasticsearch failed.")
+        return
+    print(f"Connection successful.")
+
+    try:
+        started = time.perf_counter()
+        to_move = (await es_client.count(index=PLANETS_INDEX, query=PAPER_QUERY))["count"]
+        if not to_move:
+            print(f"No papers left in '{PLANETS_INDEX}'; nothing to migrate.")
+            return
+        if not await es_client.indices.exists(index=PAPERS_INDEX):
+            print(f"Creating index '{PAPERS_INDEX}'...")
+            await es_client.indices.create(index=PAPERS_INDEX, mappings=PAPERS_MAPPING)
+
+        print(f"Copying {to_move} papers from '{PLANETS_INDEX}' to '{PAPERS_INDEX}'...")
+        result = await es_client.options(request_timeout=REQUEST_TIMEOUT).reindex(
+            source={"index": PLANETS_INDEX, "query": PAPER_QUERY},
+            dest={"index": PAPERS_INDEX},
+            slices="auto", refresh=True, wait_for_completion=True
+        )
+        if result.get("failures"):
+            print(f"ERROR: reindex reported {len(result['failures'])} failures, leaving '{PLANETS_INDEX}' untouched:")
+            print(result["failures"][:5])
+            return
+        copied = (await es_client.count(index=PAPERS_INDEX, query=PAPER_QUERY))["count"]
+        if copied < to_move:
+            print(f"ERROR: only {copied}/{to_move} papers found in '{PAPERS_INDEX}', leaving '{PLANETS_INDEX}' untouched.")
+            return
+
+        print(f"Removing the papers from '{PLANETS_INDEX}'...")
+        deleted = await es_client.options(request_timeout=REQUEST_TIMEOUT).delete_by_query(
+            index=PLANETS_INDEX, query=PAPER_QUERY, slices="auto", refresh=True, conflicts="proceed"
+        )
+        # Reclaims the deleted documents (and their HNSW graph) now rather than at the next merge
+        await es_client.options(request_timeout=REQUEST_TIMEOUT).indices.forcemerge(
+            index=PLANETS_INDEX, only_expunge_deletes=True
+        )
+        print(f"Moved {copied} papers ({deleted.get('deleted', 0)} deleted from '{PLANETS_INDEX}') "
+              f"in {time.perf_counter() - started:.1f}s.")
+    except Exception as e:
+        print(f"\nERROR during migration: {e}")
+    finally:
+        try:
+            await es_client.close()
+            print("Elastic client closed.")
+        except Exception as close_err:
+            print(f"Error closing Elastic client: {close_err}")
+
+# --- Run the async function ---
+if __name__ == "__main__":
+    asyncio.run(split_index())
@@ -1,8 +1,11 @@
 import asyncio
-from app.elastic import es_client
+from app.elastic import create_client # Pooled, retrying client shared with the API
 import json # Import json at the top
+from app.config import PAPERS_INDEX, PLANETS_INDEX
 
-INDEX_NAME = "planets"
+es_client = create_client()
+
+INDEX_NAME = f"{PLANETS_INDEX},{PAPERS_INDEX}"
 
 async def check_mapping():
     # Ping is important, check connection first
@@ -21,7 +24,7 @@ async def check_mapping():
     # Get Mapping
     try:
         mapping_response = await es_client.indices.get_mapping(index=INDEX_NAME)
-        print("\nMapping for 'planets' index:")
+        print(f"\nMappings for the '{INDEX_NAME}' indices:")
         # *** CORRECTED PRINTING: Convert response object to dict ***
         print(json.dumps(dict(mapping_response), indent=2))
         # *** END CORRECTION ***
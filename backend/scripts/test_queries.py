@@ -1,12 +1,14 @@
 import asyncio
-from app.elastic import es_client # Our async client
+from app.elastic import create_client # Pooled, retrying client shared with the API
+from app.config import KNN_K, KNN_NUM_CANDIDATES, PAPERS_INDEX, PLANETS_INDEX # Same kNN settings and indices as search_elastic
 from google.cloud import aiplatform
 from vertexai.language_models import TextEmbeddingModel
 import os
 import json
 
+es_client = create_client()
+
 # --- Configuration ---
-INDEX_NAME = "planets"
 EXPECTED_EMBEDDING_DIM = 768
 
 # --- Google Cloud Vertex AI Configuration ---
@@ -63,7 +65,7 @@ async def run_queries():
     print(f"\nRunning Keyword Search (Exact Case) for planet: '{KEYWORD_QUERY_PLANET_NAME}'")
     try:
         response_kw = await es_client.search(
-            index=INDEX_NAME,
+            index=PLANETS_INDEX,
             query={
                 "term": {
                     "pl_name.keyword": KEYWORD_QUERY_PLANET_NAME # Uses .keyword field
@@ -78,7 +80,7 @@ async def run_queries():
     print(f"\nRunning Keyword Search (Case Insensitive) for planet: '{KEYWORD_QUERY_PLANET_NAME.lower()}'")
     try:
         response_kw_ci = await es_client.search(
-            index=INDEX_NAME,
+            index=PLANETS_INDEX,
             query={
                 "term": {
                      # Still use .keyword, but add case_insensitive flag
@@ -107,11 +109,11 @@ async def run_queries():
             print(f"  (Generated query vector dimension: {len(query_vector)})")
 
             response_vec = await es_client.search(
-                index=INDEX_NAME,
+                index=PAPERS_INDEX,
                 knn={
                     "field": "abstract_vector",
                     "query_vector": query_vector,
-                    "k": 5, "num_candidates": 50
+                    "k": KNN_K, "num_candidates": KNN_NUM_CANDIDATES
                 },
                  _source=["arxiv_id", "title"]
             )
@@ -134,14 +136,14 @@ async def run_queries():
             print(f"  (Generated hybrid query vector dimension: {len(hybrid_vector)})")
 
             response_hyb = await es_client.search(
-                index=INDEX_NAME,
-                query={ "term": { "pl_name.keyword": HYBRID_PLANET_NAME } }, # Assumes HYBRID_PLANET_NAME case is correct
+                index=PAPERS_INDEX,
+                query={ "term": { "mentioned_planets": HYBRID_PLANET_NAME } }, # Papers linked to the planet (link_planets_papers.py)
                 knn={
                     "field": "abstract_vector",
                     "query_vector": hybrid_vector,
-                    "k": 5, "num_candidates": 50,
+                    "k": KNN_K, "num_candidates": KNN_NUM_CANDIDATES,
                 },
-                 _source=["arxiv_id", "title", "pl_name"]
+                 _source=["arxiv_id", "title", "mentioned_planets"]
             )
             print_results(f"Hybrid Search Results for '{HYBRID_PLANET_NAME}' + '{HYBRID_QUERY_TEXT}'", response_hyb)
         except Exception as e:
@@ -0,0 +1,145 @@
+import asyncio
+import ipaddress
+import math
+import time
+from collections import OrderedDict
+
+# --- Admission Control & Load Shedding ---
+# Every admitted /chat holds a Gemini chat, an ES connection and maybe a plot render.
+# Past capacity it is better to turn requests away quickly (with Retry-After) than to
+# let everyone time out:
+#   * AdmissionController: at most `max_concurrent` requests run; up to `max_queue`
+#     more wait (for at most `queue_timeout` seconds); everything else gets 503.
+#   * TokenBucketLimiter: per-client rate limit; over the limit gets 429. Clients are
+#     keyed by address (client_address): headers a caller controls can't pick the key.
+
+
+class Overloaded(Exception):
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+    def headers(self) -> dict:
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    async def acquire(self) -> "AdmissionSlot":
+        """Takes a slot, waiting in the bounded queue if needed. Raises Overloaded (503) otherwise."""
+        if self.active >= self.max_concurrent and self.waiting >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise Overloaded(503, "Server is at capacity, please retry shortly.", self.queue_timeout)
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected_timeout += 1
+            raise Overloaded(503, "Server is at capacity, please retry shortly.", self.queue_timeout)
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        self.admitted += 1
+        return AdmissionSlot(self)
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    def saturation(self) -> float:
+        """0.0 = idle, 1.0 = every slot busy, >1.0 = requests are queueing."""
+        return (self.active + self.waiting) / self.max_concurrent
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "saturation": round(self.saturation(), 3),
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+        }
+
+
+class AdmissionSlot:
+    """One admitted request. release() is idempotent, so streaming code can call it from several exits."""
+
+    def __init__(self, controller: AdmissionController):
+        self._controller = controller
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller.release()
+
+
+class TokenBucketLimiter:
+    def __init__(self, rate_per_second: float, burst: int, max_clients: int = 10000):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict() # client -> (tokens, updated_at)
+        self.limited = 0
+
+    def check(self, client_id: str) -> float:
+        """Spends one token for the client. Returns 0 if allowed, else seconds until the next token."""
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(client_id, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - updated_at) * self.rate_per_second)
+        if tokens >= 1.0:
+            tokens -= 1.0
+            retry_after = 0.0
+        else:
+            retry_after = (1.0 - tokens) / self.rate_per_second
+            self.limited += 1
+        self._buckets[client_id] = (tokens, now)
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False) # forget the least recently seen client
+        return retry_after
+
+    def stats(self) -> dict:
+        return {"clients": len(self._buckets), "rate_limited": self.limited}
+
+
+def parse_trusted_proxies(spec: str) -> list:
+    """"10.0.0.0/8, 192.168.1.7" -> networks (a bare address is a /32 or /128)."""
+    return [ipaddress.ip_network(item.strip(), strict=False) for item in spec.split(",") if item.strip()]
+
+
+def _is_trusted(address: str, trusted_proxies: list) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies)
+
+
+def client_address(peer: str | None, forwarded_for: str | None, trusted_proxies: list) -> str:
+    """
+    The address to rate-limit. X-Forwarded-For is only believed when the peer is a trusted
+    proxy, and then only up to the right-most hop that isn't one: everything left of it
+    was written by the client itself.
+    """
+    peer = peer or "unknown"
+    if not forwarded_for or not _is_trusted(peer, trusted_proxies):
+        return peer
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted(hop, trusted_proxies):
+            return hop
+    return hops[0] if hops else peer
@@ -0,0 +1,163 @@
+import re
+import time
+import numpy as np
+
+# --- Semantic Answer Cache ---
+# Paraphrases of the same question ("how big is TRAPPIST-1 e?" / "what's the radius
+# of TRAPPIST-1 e") embed to nearly the same vector, so we can serve a previous
+# answer instead of paying for two Gemini turns and an ES search again.
+#
+# All prompt vectors live in one preallocated float32 matrix, so a lookup is a single
+# matrix-vector product plus an argmax; expiry and scope are parallel NumPy arrays, so
+# the live mask is vectorized too.
+#
+# Embeddings barely see the entity: "mass of TRAPPIST-1 e" and "mass of TRAPPIST-1 f"
+# clear any useful threshold. Every entry is therefore scoped to the index generation
+# it was answered from plus an entity key (the catalog names and numbers in the prompt,
+# see entity_key); only prompts with the same scope can match.
+
+HISTOGRAM_BUCKETS = [0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.925, 0.95, 0.975, 0.99, 1.0]
+# Numbers and lone letters: they tell "Kepler-22 b" from "Kepler-23 b" and "TRAPPIST-1 e"
+# from "... f" even when a misspelt name isn't found in the catalog.
+_IDENTIFIER = re.compile(r"\d+(?:\.\d+)?[a-z]?\b|\b[a-z]\b")
+
+
+def entity_key(prompt: str, names: list[str]) -> str:
+    """Canonical planet/host names (any order) plus the numbers and lone letters of the prompt (as typed)."""
+    return "|".join(sorted(set(names))) + "#" + ",".join(_IDENTIFIER.findall(prompt.lower()))
+
+
+class SemanticAnswerCache:
+    def __init__(self, dim: int, threshold: float = 0.95, ttl_seconds: float = 3600.0, max_entries: int = 1000):
+        self.dim = dim
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # Rows are unit vectors, so a dot product with a unit query is the cosine similarity.
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._slots: list[dict | None] = [None] * max_entries
+        self._scopes = np.full(max_entries, -1, dtype=np.int64) # scope id per slot, -1: empty
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._scope_ids: dict[tuple, int] = {} # (generation, entity key) -> scope id
+        self._free = list(range(max_entries - 1, -1, -1))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Counts of the best similarity seen per lookup (last bucket catches everything above 1.0).
+        self._similarity_counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+
+    # --- Helpers ---
+    @staticmethod
+    def _normalize(vector) -> np.ndarray | None:
+        vec = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = float(np.linalg.norm(vec))
+        if norm == 0.0 or not np.isfinite(norm):
+            return None
+        return vec / norm
+
+    def _expire(self, now: float):
+        for slot in np.flatnonzero((self._scopes >= 0) & (self._expires_at <= now)):
+            self._release(int(slot))
+
+    def _scope_id(self, generation, key: str) -> int:
+        scope = (generation, key)
+        if scope not in self._scope_ids:
+            if len(self._scope_ids) >= 2 * self.max_entries: # forget scopes no slot uses any more
+                live = set(self._scopes[self._scopes >= 0].tolist())
+                self._scope_ids = {s: i for s, i in self._scope_ids.items() if i in live}
+            self._scope_ids[scope] = max(self._scope_ids.values(), default=-1) + 1
+        return self._scope_ids[scope]
+
+    def _release(self, slot: int):
+        self._slots[slot] = None
+        self._vectors[slot] = 0.0
+        self._scopes[slot] = -1
+        self._free.append(slot)
+
+    def _record_similarity(self, similarity: float):
+        for i, upper in enumerate(HISTOGRAM_BUCKETS):
+            if similarity <= upper:
+                self._similarity_counts[i] += 1
+                return
+        self._similarity_counts[-1] += 1
+
+    # --- Public API ---
+    def lookup(self, vector, generation, key: str = "") -> tuple[dict | None, float]:
+        """
+        Returns (cached_answer, similarity) for the closest live entry with the same generation
+        and entity key, or (None, best_similarity) when nothing clears the threshold.
+        """
+        query = self._normalize(vector)
+        if query is None or query.shape[0] != self.dim:
+            self.misses += 1
+            return None, 0.0
+        now = time.monotonic()
+        self._expire(now)
+        scope = self._scope_ids.get((generation, key))
+        mask = self._scopes == scope if scope is not None else None
+        if mask is None or not mask.any():
+            self.misses += 1
+            return None, 0.0
+        similarities = self._vectors @ query
+        similarities[~mask] = -np.inf
+        best_slot = int(np.argmax(similarities))
+        best = float(similarities[best_slot])
+        self._record_similarity(best)
+        if best < self.threshold:
+            self.misses += 1
+            return None, best
+        entry = self._slots[best_slot]
+        self._last_used[best_slot] = now
+        entry["hits"] += 1
+        self.hits += 1
+        return entry["answer"], best
+
+    def store(self, vector, answer: dict, generation, prompt: str = "", key: str = ""):
+        """Adds an answer; evicts expired entries first, then the least recently used one."""
+        query = self._normalize(vector)
+        if query is None or query.shape[0] != self.dim:
+            return
+        now = time.monotonic()
+        if not self._free:
+            self._expire(now)
+        if not self._free:
+            lru_slot = int(np.argmin(np.where(self._scopes >= 0, self._last_used, np.inf)))
+            self._release(lru_slot)
+            self.evictions += 1
+        slot = self._free.pop()
+        self._vectors[slot] = query
+        self._scopes[slot] = self._scope_id(generation, key)
+        self._expires_at[slot] = now + self.ttl_seconds
+        self._last_used[slot] = now
+        self._slots[slot] = {
+            "answer": answer,
+            "generation": generation,
+            "key": key,
+            "prompt": prompt,
+            "created_at": now,
+            "hits": 0,
+        }
+
+    def clear(self):
+        for slot, entry in enumerate(self._slots):
+            if entry is not None:
+                self._release(slot)
+
+    def __len__(self) -> int:
+        return int((self._scopes >= 0).sum())
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        labels = [f"<={upper}" for upper in HISTOGRAM_BUCKETS] + [f">{HISTOGRAM_BUCKETS[-1]}"]
+        return {
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "similarity_histogram": dict(zip(labels, self._similarity_counts)),
+        }
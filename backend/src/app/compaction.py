@@ -0,0 +1,103 @@
+import json
+import re
+from src.app.config import CHARS_PER_TOKEN
+
+# --- Tool Response Compaction ---
+# Whatever a tool returns is pasted verbatim into the next Gemini turn, and input
+# tokens cost model latency. Raw search hits are mostly waste: null columns, full
+# abstracts, repeated papers, JSON punctuation. This turns them into a small table:
+#
+#   id|score|title|published_date|abstract
+#   2401.01234|0.912|JWST spectra of ...|2024-01-02|... water vapour absorption ...
+#
+# The model can always pull the full document with the fetch_documents tool.
+
+# Column order for the table; unknown non-null fields are appended after these.
+PREFERRED_COLUMNS = ["pl_name", "hostname", "arxiv_id", "title", "published_date", "abstract"]
+_VERSION_SUFFIX = re.compile(r"v\d+$")
+
+# Cumulative savings since startup (reported per call in the logs as well).
+compaction_totals = {"calls": 0, "original_tokens": 0, "compact_tokens": 0}
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _dedupe_key(source: dict, doc_id: str | None) -> str:
+    """Same paper across versions/cross-lists: strip 'v2' suffixes, fall back to the normalized title."""
+    arxiv_id = source.get("arxiv_id")
+    if arxiv_id:
+        return _VERSION_SUFFIX.sub("", str(arxiv_id))
+    title = source.get("title")
+    if title:
+        return " ".join(str(title).lower().split())
+    return str(doc_id)
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars].rsplit(" ", 1)[0]
+    return cut + " ..."
+
+
+def _cell(value) -> str:
+    """Table cells can't contain the separator or newlines."""
+    return " ".join(str(value).split()).replace("|", "/")
+
+
+def compact_hits(hits: list[dict], abstract_chars: int = 300) -> tuple[str, dict]:
+    """
+    Converts raw ES hits into a compact pipe-separated table.
+    Returns (table_text, stats) where stats reports the token savings against the
+    old JSON format ([{"score", "id", "source"}, ...]).
+    """
+    original = json.dumps([
+        {"score": hit.get("_score"), "id": hit.get("_id"), "source": hit.get("_source")} for hit in hits
+    ])
+
+    rows = []
+    seen = set()
+    for hit in hits:
+        source = {k: v for k, v in (hit.get("_source") or {}).items() if v not in (None, "", [])}
+        key = _dedupe_key(source, hit.get("_id"))
+        if key in seen:
+            continue
+        seen.add(key)
+        snippets = (hit.get("highlight") or {}).get("abstract")
+        if snippets:
+            source["abstract"] = " ... ".join(snippets)
+        elif "abstract" in source:
+            source["abstract"] = _truncate(str(source["abstract"]), abstract_chars)
+        score = hit.get("_score")
+        row = {"id": hit.get("_id"), "score": round(score, 3) if isinstance(score, (int, float)) else score}
+        row.update(source)
+        rows.append(row)
+
+    columns = ["id", "score"]
+    for column in PREFERRED_COLUMNS:
+        if any(column in row for row in rows):
+            columns.append(column)
+    for row in rows:
+        for column in row:
+            if column not in columns:
+                columns.append(column)
+
+    lines = ["|".join(columns)]
+    for row in rows:
+        lines.append("|".join(_cell(row.get(column, "")) for column in columns))
+    table = "\n".join(lines) if rows else "no results"
+
+    stats = {
+        "hits": len(hits),
+        "rows": len(rows),
+        "duplicates_dropped": len(hits) - len(rows),
+        "original_tokens": _estimate_tokens(original),
+        "compact_tokens": _estimate_tokens(table),
+    }
+    stats["tokens_saved"] = stats["original_tokens"] - stats["compact_tokens"]
+    compaction_totals["calls"] += 1
+    compaction_totals["original_tokens"] += stats["original_tokens"]
+    compaction_totals["compact_tokens"] += stats["compact_tokens"]
+    return table, stats
@@ -1,13 +1,31 @@
 import os
+import logging
 from dotenv import load_dotenv, find_dotenv
 
 # Load .env file from project root
 dotenv_path = find_dotenv()
 if dotenv_path:
-    print(f"Loading .env file from: {dotenv_path}")
     load_dotenv(dotenv_path=dotenv_path)
-else:
-    print("Warning: .env file not found.")
+
+# --- Observability ---
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper() # DEBUG shows per-request search/tool traces
+SERVER_TIMING_ENABLED = os.environ.get("SERVER_TIMING_ENABLED", "false").lower() == "true" # Per-request Server-Timing header
+logger = logging.getLogger(__name__)
+
+
+def configure_logging():
+    """Root handler and levels; called by the entry point (the app lifespan), never on import."""
+    logging.basicConfig(
+        level=getattr(logging, LOG_LEVEL, logging.INFO),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    # The HTTP clients log every request at INFO; only show that when debugging.
+    for noisy_logger in ("elastic_transport", "httpx"):
+        logging.getLogger(noisy_logger).setLevel(logging.DEBUG if LOG_LEVEL == "DEBUG" else logging.WARNING)
+    if dotenv_path:
+        logger.info("Loaded .env file from: %s", dotenv_path)
+    else:
+        logger.warning(".env file not found.")
 
 # Elastic Config (already used by app/elastic.py)
 ELASTIC_HOSTS = os.environ.get("ELASTIC_HOSTS")
@@ -21,20 +39,105 @@ GCP_CREDENTIALS_PATH = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
 # --- Credential Check ---
 # Check if the GCP credentials path exists and is set
 if GCP_CREDENTIALS_PATH and os.path.exists(GCP_CREDENTIALS_PATH):
-    print(f"Google Cloud credentials found at: {GCP_CREDENTIALS_PATH}")
+    logger.info("Google Cloud credentials found at: %s", GCP_CREDENTIALS_PATH)
     # The google-cloud libraries automatically use GOOGLE_APPLICATION_CREDENTIALS
 else:
-    print("---------------------------------------------------------")
-    print("WARNING: GOOGLE_APPLICATION_CREDENTIALS path not found!")
-    print(f"  -> Path set in env var: {GCP_CREDENTIALS_PATH}")
-    print("  -> Ensure .env file is in project root and contains:")
-    print("     GOOGLE_APPLICATION_CREDENTIALS=\"<absolute_path_to_key.json>\"")
-    print("  -> Or ensure the environment variable is set manually.")
-    print("---------------------------------------------------------")
+    logger.warning(
+        "GOOGLE_APPLICATION_CREDENTIALS path not found (env var: %s). Ensure the .env file in the "
+        "project root contains GOOGLE_APPLICATION_CREDENTIALS=\"<absolute_path_to_key.json>\" "
+        "or set the environment variable manually.", GCP_CREDENTIALS_PATH
+    )
     # Decide if you want to raise an error or just warn:
     # raise ValueError("GCP Credentials not configured correctly.")
 
 # Embedding Model Config (can add Gemini chat model later)
 EMBEDDING_MODEL_NAME = "gemini-embedding-001"
 
-print("Configuration loaded.")
+# --- Indices (mappings in mappings.py; scripts/split_index.py migrates a combined index) ---
+PLANETS_INDEX = os.environ.get("PLANETS_INDEX", "planets") # Tabular planet + host-star rows (no text embeddings)
+PAPERS_INDEX = os.environ.get("PAPERS_INDEX", "papers") # arXiv text + embeddings (all kNN traffic)
+
+# --- kNN Retrieval (measure with scripts/eval_knn.py before changing) ---
+KNN_K = int(os.environ.get("KNN_K", "5"))
+KNN_NUM_CANDIDATES = int(os.environ.get("KNN_NUM_CANDIDATES", "50")) # HNSW candidates per shard: recall vs latency
+VECTOR_INDEX_TYPE = os.environ.get("VECTOR_INDEX_TYPE", "") # dense_vector index_options type for create_index.py (e.g. "int8_hnsw"); empty: ES default
+# Two-stage (Matryoshka) retrieval, see matryoshka.py. SMALL_VECTOR_DIMS is used by create_index.py
+# and the arXiv ingest (0: no small field, so no second HNSW graph); TWO_STAGE_SEARCH needs an index
+# built and ingested with it (e.g. 256) and is ignored while it is 0.
+SMALL_VECTOR_DIMS = int(os.environ.get("SMALL_VECTOR_DIMS", "0"))
+TWO_STAGE_SEARCH = os.environ.get("TWO_STAGE_SEARCH", "false").lower() == "true"
+TWO_STAGE_CANDIDATES = int(os.environ.get("TWO_STAGE_CANDIDATES", "50")) # Coarse hits rescored with the full vector
+TWO_STAGE_NUM_CANDIDATES = int(os.environ.get("TWO_STAGE_NUM_CANDIDATES", "200")) # HNSW candidates per shard on the small field
+
+# --- Semantic Answer Cache (in front of the /chat agent) ---
+ANSWER_CACHE_ENABLED = os.environ.get("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.95")) # Cosine similarity needed for a hit
+ANSWER_CACHE_TTL_SECONDS = float(os.environ.get("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", "2000"))
+
+# --- Token Estimates (session budgets, compacted tool responses) ---
+CHARS_PER_TOKEN = 4 # Rough heuristic, good enough for budgeting
+
+# --- Conversation Sessions ---
+SESSION_MAX_SESSIONS = int(os.environ.get("SESSION_MAX_SESSIONS", "1000")) # LRU bound on stored conversations
+SESSION_TOKEN_BUDGET = int(os.environ.get("SESSION_TOKEN_BUDGET", "8000")) # Approx. tokens of history kept per session
+SESSION_MAX_EXCHANGES = int(os.environ.get("SESSION_MAX_EXCHANGES", "20"))
+
+# --- Tool Responses ---
+TOOL_RESPONSE_COMPACT = os.environ.get("TOOL_RESPONSE_COMPACT", "true").lower() == "true" # Compact tables instead of raw JSON hits
+TOOL_ABSTRACT_CHARS = int(os.environ.get("TOOL_ABSTRACT_CHARS", "300")) # Abstract budget when no highlight snippet exists
+AGGREGATION_CACHE_MAX_ENTRIES = int(os.environ.get("AGGREGATION_CACHE_MAX_ENTRIES", "500")) # aggregate_planets results per index generation (0: off)
+
+# --- Fast-Path Router ---
+FAST_PATH_ENABLED = os.environ.get("FAST_PATH_ENABLED", "true").lower() == "true" # Answer catalog lookups without Gemini
+
+# --- Speculative Retrieval Prefetch ---
+PREFETCH_ENABLED = os.environ.get("PREFETCH_ENABLED", "true").lower() == "true" # Search the raw prompt during Gemini turn 1
+PREFETCH_MATCH_THRESHOLD = float(os.environ.get("PREFETCH_MATCH_THRESHOLD", "0.5")) # Content-word overlap needed to reuse it
+
+# --- Deadlines (seconds) ---
+CHAT_DEADLINE_SECONDS = float(os.environ.get("CHAT_DEADLINE_SECONDS", "60")) # Whole /chat request budget
+EMBEDDING_TIMEOUT_SECONDS = float(os.environ.get("EMBEDDING_TIMEOUT_SECONDS", "3")) # Per embedding call
+ES_SEARCH_TIMEOUT_SECONDS = float(os.environ.get("ES_SEARCH_TIMEOUT_SECONDS", "5")) # Per ES search/mget
+ANSWER_CACHE_LOOKUP_TIMEOUT_SECONDS = float(os.environ.get("ANSWER_CACHE_LOOKUP_TIMEOUT_SECONDS", "1.5"))
+
+# --- Admission Control ---
+MAX_CONCURRENT_CHATS = int(os.environ.get("MAX_CONCURRENT_CHATS", "16")) # Agent conversations running at once
+MAX_QUEUED_CHATS = int(os.environ.get("MAX_QUEUED_CHATS", "32")) # Waiting for a slot; beyond this -> 503
+CHAT_QUEUE_TIMEOUT_SECONDS = float(os.environ.get("CHAT_QUEUE_TIMEOUT_SECONDS", "5")) # Max wait for a slot
+RATE_LIMIT_PER_MINUTE = float(os.environ.get("RATE_LIMIT_PER_MINUTE", "30")) # Sustained /chat requests per client
+RATE_LIMIT_BURST = int(os.environ.get("RATE_LIMIT_BURST", "10"))
+TRUSTED_PROXIES = os.environ.get("TRUSTED_PROXIES", "") # Comma-separated IPs/CIDRs whose X-Forwarded-For is believed
+
+# --- Asynchronous Chat Jobs (POST /chat/jobs) ---
+CHAT_JOB_WORKERS = int(os.environ.get("CHAT_JOB_WORKERS", "4")) # Agent runs at once for jobs (not counted in MAX_CONCURRENT_CHATS)
+CHAT_JOB_MAX_PENDING = int(os.environ.get("CHAT_JOB_MAX_PENDING", "64")) # Jobs waiting for a worker; beyond this -> 503
+CHAT_JOB_TTL_SECONDS = float(os.environ.get("CHAT_JOB_TTL_SECONDS", "600")) # Finished jobs kept for polling
+CHAT_JOB_DEADLINE_SECONDS = float(os.environ.get("CHAT_JOB_DEADLINE_SECONDS", "120")) # No proxy waits on a job: longer than /chat
+CHAT_JOB_HEARTBEAT_SECONDS = float(os.environ.get("CHAT_JOB_HEARTBEAT_SECONDS", "15")) # SSE keep-alive while nothing happens
+
+# --- Startup ---
+WARMUP_ENABLED = os.environ.get("WARMUP_ENABLED", "true").lower() == "true" # Init models/ES in the lifespan, not on the first /chat
+WARMUP_QUERY = os.environ.get("WARMUP_QUERY", "") # Optional synthetic search run once at startup (primes embedding + kNN paths)
+
+# --- Direct Search API ---
+SEARCH_BATCH_MAX_QUERIES = int(os.environ.get("SEARCH_BATCH_MAX_QUERIES", "50"))
+SEARCH_BATCH_MSEARCH_SIZE = int(os.environ.get("SEARCH_BATCH_MSEARCH_SIZE", "10")) # Searches per _msearch request (results stream per request)
+EMBEDDING_MAX_BATCH = int(os.environ.get("EMBEDDING_MAX_BATCH", "1")) # Texts per embedding call; gemini-embedding-001 accepts one (text-embedding-005: 250)
+
+# --- Index Export ---
+EXPORT_SLICES = int(os.environ.get("EXPORT_SLICES", "4")) # Parallel point-in-time slices for GET /export
+EXPORT_PAGE_SIZE = int(os.environ.get("EXPORT_PAGE_SIZE", "1000"))
+MAX_CONCURRENT_EXPORTS = int(os.environ.get("MAX_CONCURRENT_EXPORTS", "2")) # GET /export streams at once; beyond this -> 503
+EXPORT_MAX_DOCUMENTS = int(os.environ.get("EXPORT_MAX_DOCUMENTS", "50000")) # Per GET /export; full dumps: scripts/export_index.py
+
+# --- Local Vector Index (scripts/build_local_index.py) ---
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "elasticsearch").lower() # "local": semantic search never touches ES
+LOCAL_INDEX_PATH = os.environ.get(
+    "LOCAL_INDEX_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "data", "local_index"))
+)
+LOCAL_INDEX_FALLBACK = os.environ.get("LOCAL_INDEX_FALLBACK", "true").lower() == "true" # Use it while the ES circuit breaker is open
+LOCAL_INDEX_NPROBE = int(os.environ.get("LOCAL_INDEX_NPROBE", "8")) # IVF lists probed per query (ignored without IVF)
+
+logger.debug("Configuration loaded.")
@@ -0,0 +1,81 @@
+import asyncio
+import contextvars
+import time
+from collections import defaultdict
+from src.app.metrics import record_span
+
+# --- Request Deadlines ---
+# Each /chat request gets one time budget, set in the endpoint and carried through
+# the agent and tools in a ContextVar (tasks spawned with ensure_future/gather inherit
+# it automatically). Every upstream call runs as a named "stage" that gets whatever is
+# left of the budget, optionally capped by a per-stage slice, and is cancelled when that
+# runs out. Callers decide how to degrade (e.g. answer without retrieval).
+
+_current_deadline: contextvars.ContextVar["Deadline | None"] = contextvars.ContextVar("request_deadline", default=None)
+
+# stage name -> number of times it ran out of time
+deadline_exceeded_counts: dict[str, int] = defaultdict(int)
+
+
+class DeadlineExceeded(Exception):
+    def __init__(self, stage: str):
+        super().__init__(f"Request deadline exceeded during '{stage}'.")
+        self.stage = stage
+
+
+class Deadline:
+    def __init__(self, budget_seconds: float):
+        self.budget_seconds = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+
+def set_deadline(budget_seconds: float | None) -> contextvars.Token:
+    """Starts the budget for the current request. Returns a token for reset_deadline()."""
+    return _current_deadline.set(Deadline(budget_seconds) if budget_seconds else None)
+
+
+def reset_deadline(token: contextvars.Token):
+    _current_deadline.reset(token)
+
+
+def current_deadline() -> Deadline | None:
+    return _current_deadline.get()
+
+
+def stage_timeout(max_seconds: float | None = None) -> float | None:
+    """Seconds a stage may take: the remaining request budget, capped by its own slice."""
+    deadline = current_deadline()
+    limits = [limit for limit in (max_seconds, deadline.remaining() if deadline else None) if limit is not None]
+    return min(limits) if limits else None
+
+
+async def run_stage(stage: str, awaitable, max_seconds: float | None = None):
+    """
+    Awaits `awaitable` within the stage's timeout. On timeout the work is cancelled,
+    the per-stage counter is bumped and DeadlineExceeded(stage) is raised.
+    The time spent is recorded as a metrics span named after the stage.
+    """
+    timeout = stage_timeout(max_seconds)
+    if timeout is not None and timeout <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close() # never started; avoid "coroutine was never awaited"
+        deadline_exceeded_counts[stage] += 1
+        raise DeadlineExceeded(stage)
+    started = time.perf_counter()
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        deadline_exceeded_counts[stage] += 1
+        raise DeadlineExceeded(stage)
+    finally:
+        record_span(stage, time.perf_counter() - started)
+
+
+def deadline_stats() -> dict:
+    return {"deadline_exceeded": dict(deadline_exceeded_counts)}
@@ -0,0 +1,116 @@
+import re
+import zlib
+import numpy as np
+
+# --- Near-Duplicate arXiv Abstracts ---
+# download_arxiv.py stores versioned ids ("2401.01234v2"). A re-harvest, a revision or a
+# cross-list then yields the same abstract under several rows: one embedding call, one
+# vector and one top-k slot each. The arXiv ingest (scripts/ingest_arxiv_data.py) collapses
+# them before embedding:
+#   1. each abstract -> its set of word shingles -> a MinHash signature (NUM_PERMUTATIONS
+#      hashes, whose agreement rate estimates the Jaccard similarity of the shingle sets);
+#   2. LSH: signatures are cut into LSH_BANDS bands; rows sharing any band bucket are
+#      candidate pairs (roughly linear: no all-pairs comparison);
+#   3. candidates whose estimated similarity is >= the threshold, and rows with the same
+#      id up to the version suffix, are joined (union-find) into clusters.
+# Each cluster is indexed once, with every member id in "versions". Used as `app.dedup`
+# by the ingest script, so NumPy only.
+
+SHINGLE_WORDS = 3
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 32 # 4 hashes per band: pairs at Jaccard 0.5 already collide with probability ~0.9
+DEFAULT_SIMILARITY_THRESHOLD = 0.8
+_VERSIONED_ID = re.compile(r"^(?P<base>.*?)(?:v(?P<version>\d+))?$")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def split_version(arxiv_id: str) -> tuple[str, int]:
+    """("2401.01234", 2) for "2401.01234v2"; version 0 when there is no suffix."""
+    match = _VERSIONED_ID.match(str(arxiv_id).strip())
+    return match["base"], int(match["version"] or 0)
+
+
+def shingles(text: str, words: int = SHINGLE_WORDS) -> np.ndarray:
+    """Hashes of the distinct word n-grams of `text` (case and punctuation ignored)."""
+    tokens = _WORD.findall(str(text).lower())
+    if len(tokens) < words:
+        grams = {" ".join(tokens)} if tokens else set()
+    else:
+        grams = {" ".join(tokens[i:i + words]) for i in range(len(tokens) - words + 1)}
+    return np.fromiter((zlib.crc32(gram.encode()) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash_signatures(texts: list[str], num_permutations: int = NUM_PERMUTATIONS, seed: int = 1) -> np.ndarray:
+    """uint64 matrix len(texts) x num_permutations; an empty text gets a row no other row matches."""
+    rng = np.random.default_rng(seed)
+    # Multiply-shift hashing: uint64 products wrap (mod 2^64), the top 32 bits are the hash
+    a = rng.integers(0, 1 << 63, size=num_permutations, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 1 << 63, size=num_permutations, dtype=np.uint64)
+    hashes = [shingles(text) for text in texts]
+    signatures = np.empty((len(texts), num_permutations), dtype=np.uint64)
+    nonempty = [row for row, row_hashes in enumerate(hashes) if row_hashes.size]
+    for row in range(len(texts)):
+        if not hashes[row].size:
+            signatures[row] = (1 << 32) + row # outside the hash range, unique per row
+    if nonempty:
+        # All shingles in one array: one vectorized pass and a segmented min per permutation
+        flat = np.concatenate([hashes[row] for row in nonempty])
+        starts = np.cumsum([0] + [hashes[row].size for row in nonempty[:-1]])
+        for permutation in range(num_permutations):
+            permuted = (flat * a[permutation] + b[permutation]) >> np.uint64(32)
+            signatures[nonempty, permutation] = np.minimum.reduceat(permuted, starts)
+    return signatures
+
+
+def candidate_pairs(signatures: np.ndarray, bands: int = LSH_BANDS) -> set[tuple[int, int]]:
+    """Row pairs that share at least one LSH band bucket."""
+    rows_per_band = signatures.shape[1] // bands
+    pairs = set()
+    for band in range(bands):
+        buckets: dict[bytes, list[int]] = {}
+        for row, chunk in enumerate(signatures[:, band * rows_per_band:(band + 1) * rows_per_band]):
+            buckets.setdefault(chunk.tobytes(), []).append(row)
+        for members in buckets.values():
+            for i in range(len(members)):
+                for j in range(i + 1, len(members)):
+                    pairs.add((members[i], members[j]))
+    return pairs
+
+
+def near_duplicate_clusters(ids: list[str], texts: list[str], dates: list[str] | None = None,
+                            threshold: float = DEFAULT_SIMILARITY_THRESHOLD) -> list[list[int]]:
+    """
+    Groups row positions into clusters of near-identical abstracts or versions of one id.
+    Each cluster lists its canonical row first: the newest version of the earliest
+    published paper (original id, most recent text); clusters keep the input row order.
+    """
+    parent = list(range(len(ids)))
+
+    def find(row: int) -> int:
+        while parent[row] != row:
+            parent[row] = parent[parent[row]]
+            row = parent[row]
+        return row
+
+    def union(i: int, j: int):
+        parent[find(i)] = find(j)
+
+    signatures = minhash_signatures(texts)
+    for i, j in candidate_pairs(signatures):
+        if find(i) != find(j) and np.mean(signatures[i] == signatures[j]) >= threshold:
+            union(i, j)
+    first_with_base: dict[str, int] = {}
+    for row, arxiv_id in enumerate(ids):
+        base = split_version(arxiv_id)[0] if arxiv_id else ""
+        if base:
+            union(row, first_with_base.setdefault(base, row))
+
+    clusters: dict[int, list[int]] = {}
+    for row in range(len(ids)):
+        clusters.setdefault(find(row), []).append(row)
+
+    def canonical_order(row: int):
+        base, version = split_version(ids[row])
+        return (str(dates[row] or "9999") if dates is not None else "", base, -version)
+
+    return [sorted(members, key=canonical_order) for members in clusters.values()]
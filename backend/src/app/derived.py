@@ -0,0 +1,138 @@
+import numpy as np
+
+# --- Derived Planet Quantities ---
+# Computed for every catalog row at once at ingest (scripts/ingest_combined_data.py) and
+# indexed as planet fields, so "planets in the habitable zone" or "densest super-Earths"
+# is one filtered/sorted query instead of the model doing arithmetic on raw pl_masse /
+# pl_rade / pl_orbper values from a handful of search hits.
+#
+# Missing inputs propagate as NaN (indexed as null), never as 0. Where the NASA Exoplanet
+# Archive already has a value (pl_dens, pl_orbsmax, pl_insol, pl_eqt) it is kept; the
+# computed one only fills the gap. Used as `app.derived` by the ingest script, so NumPy only.
+
+EARTH_DENSITY = 5.514 # g/cm^3
+EARTH_GRAVITY = 9.807 # m/s^2
+EARTH_MASS_IN_SUNS = 3.003e-6
+SOLAR_TEFF = 5772.0 # K
+DAYS_PER_YEAR = 365.25
+ZERO_ALBEDO_EQT = 278.6 # K at 1 Earth insolation (Bond albedo 0, full heat redistribution)
+
+# Kopparapu et al. (2014): S_eff = S0 + a t + b t^2 + c t^3 + d t^4 with t = Teff - 5780 K,
+# in Earth insolations, valid for host stars of 2600-7200 K.
+HZ_COEFFICIENTS = {
+    "recent_venus": (1.776, 2.136e-4, 2.533e-8, -1.332e-11, -3.097e-15),
+    "runaway_greenhouse": (1.107, 1.332e-4, 1.580e-8, -8.308e-12, -1.931e-15),
+    "maximum_greenhouse": (0.356, 6.171e-5, 1.698e-9, -3.198e-12, -5.575e-16),
+    "early_mars": (0.320, 5.547e-5, 1.526e-9, -2.874e-12, -5.011e-16),
+}
+HZ_TEFF_RANGE = (2600.0, 7200.0)
+
+# Archive columns read (all optional: a missing column is all-NaN)
+INPUT_COLUMNS = ["pl_masse", "pl_rade", "pl_orbper", "pl_orbsmax", "pl_dens", "pl_insol", "pl_eqt",
+                 "st_mass", "st_rad", "st_teff", "st_lum"]
+
+
+def _column(columns: dict, name: str, rows: int) -> np.ndarray:
+    values = columns.get(name)
+    return np.full(rows, np.nan) if values is None else np.asarray(values, dtype=float)
+
+
+def _finite(values: np.ndarray) -> np.ndarray:
+    """Divisions by a zero radius/distance give inf: treat them as unknown."""
+    return np.where(np.isfinite(values), values, np.nan)
+
+
+def _prefer(catalog: np.ndarray, computed: np.ndarray) -> np.ndarray:
+    return np.where(np.isnan(catalog), computed, catalog)
+
+
+def _flags(condition: np.ndarray, known: np.ndarray) -> np.ndarray:
+    """True/False where the inputs are known, None (null) elsewhere."""
+    flags = np.full(condition.shape, None, dtype=object)
+    flags[known] = condition[known].tolist()
+    return flags
+
+
+def habitable_zone_flux(teff: np.ndarray, limit: str) -> np.ndarray:
+    """Insolation (Earth = 1) at a Kopparapu et al. HZ limit; NaN outside the fitted Teff range."""
+    s0, a, b, c, d = HZ_COEFFICIENTS[limit]
+    t = teff - 5780.0
+    flux = s0 + a * t + b * t ** 2 + c * t ** 3 + d * t ** 4
+    return np.where((teff >= HZ_TEFF_RANGE[0]) & (teff <= HZ_TEFF_RANGE[1]), flux, np.nan)
+
+
+def derive_planet_quantities(columns: dict, rows: int) -> dict[str, np.ndarray]:
+    """
+    columns: archive column name -> array of `rows` values (see INPUT_COLUMNS).
+    Returns float arrays pl_dens (g/cm^3), pl_grav (m/s^2), pl_orbsmax (AU), pl_insol
+    (Earth = 1), pl_eqt (K), and True/False/None arrays pl_in_hz (conservative habitable
+    zone: runaway to maximum greenhouse) and pl_in_optimistic_hz (recent Venus to early Mars).
+    """
+    def get(name: str) -> np.ndarray:
+        return _column(columns, name, rows)
+
+    mass, radius, period = get("pl_masse"), get("pl_rade"), get("pl_orbper")
+    star_mass, star_radius, star_teff, star_log_lum = get("st_mass"), get("st_rad"), get("st_teff"), get("st_lum")
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        density = _prefer(get("pl_dens"), _finite(EARTH_DENSITY * mass / radius ** 3))
+        gravity = _finite(EARTH_GRAVITY * mass / radius ** 2)
+        # Kepler's third law in solar units: a^3 [AU] = (M* + Mp) [Msun] * P^2 [yr]; Mp only if known
+        system_mass = star_mass + np.nan_to_num(mass) * EARTH_MASS_IN_SUNS
+        semi_major_axis = _prefer(get("pl_orbsmax"), _finite(np.cbrt(system_mass * (period / DAYS_PER_YEAR) ** 2)))
+        # Archive log10(L/Lsun) if given, else Stefan-Boltzmann from radius and Teff
+        luminosity = np.where(np.isnan(star_log_lum), star_radius ** 2 * (star_teff / SOLAR_TEFF) ** 4, 10.0 ** star_log_lum)
+        insolation = _prefer(get("pl_insol"), _finite(luminosity / semi_major_axis ** 2))
+        equilibrium_temperature = _prefer(get("pl_eqt"), ZERO_ALBEDO_EQT * insolation ** 0.25)
+
+        hz = {limit: habitable_zone_flux(star_teff, limit) for limit in HZ_COEFFICIENTS}
+        conservative_known = ~np.isnan(insolation) & ~np.isnan(hz["runaway_greenhouse"])
+        optimistic_known = ~np.isnan(insolation) & ~np.isnan(hz["recent_venus"])
+        in_hz = (insolation <= hz["runaway_greenhouse"]) & (insolation >= hz["maximum_greenhouse"])
+        in_optimistic_hz = (insolation <= hz["recent_venus"]) & (insolation >= hz["early_mars"])
+
+    return {
+        "pl_dens": density,
+        "pl_grav": gravity,
+        "pl_orbsmax": semi_major_axis,
+        "pl_insol": insolation,
+        "pl_eqt": equilibrium_temperature,
+        "pl_in_hz": _flags(in_hz, conservative_known),
+        "pl_in_optimistic_hz": _flags(in_optimistic_hz, optimistic_known),
+    }
+
+
+# --- Property Vectors ("planets like X") ---
+# One small vector per planet for kNN over physical properties (tools.find_similar_planets).
+# Heavy-tailed quantities are log10-scaled, then every feature is standardized to
+# mean 0 / std 1 over the catalog so no unit dominates the distance. A missing (or
+# non-positive, for log features) value is imputed as the mean, i.e. 0: it neither pulls
+# the planet towards nor away from others. Rows knowing fewer than MIN_KNOWN_FEATURES
+# features get no vector, since they would be "similar" to everything.
+
+PROPERTY_FEATURES = [ # (column, log-scaled)
+    ("pl_masse", True), ("pl_rade", True), ("pl_orbper", True), ("pl_dens", True),
+    ("pl_insol", True), ("pl_eqt", True), ("sy_dist", True),
+    ("st_teff", False), ("st_mass", True), ("star_fe_h", False),
+]
+PROPERTY_VECTOR_DIMS = len(PROPERTY_FEATURES)
+MIN_KNOWN_FEATURES = 3
+
+
+def property_vectors(columns: dict, rows: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    columns: column name -> array of `rows` values (raw archive columns plus the derived ones).
+    Returns (float32 matrix rows x PROPERTY_VECTOR_DIMS, bool mask of rows that get a vector).
+    """
+    features = np.full((rows, PROPERTY_VECTOR_DIMS), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for position, (name, log_scaled) in enumerate(PROPERTY_FEATURES):
+            values = _column(columns, name, rows)
+            features[:, position] = _finite(np.log10(np.where(values > 0, values, np.nan))) if log_scaled else _finite(values)
+    known = ~np.isnan(features)
+    counts = known.sum(axis=0)
+    means = np.divide(np.nansum(features, axis=0), counts, out=np.zeros(PROPERTY_VECTOR_DIMS), where=counts > 0)
+    deviations = np.where(known, features - means, 0.0)
+    stds = np.sqrt(np.divide((deviations ** 2).sum(axis=0), counts, out=np.zeros(PROPERTY_VECTOR_DIMS), where=counts > 0))
+    scaled = np.divide(deviations, stds, out=np.zeros_like(deviations), where=stds > 0)
+    return scaled.astype(np.float32), known.sum(axis=1) >= MIN_KNOWN_FEATURES
@@ -1,6 +1,27 @@
+import asyncio
+import collections
+import logging
 import os
+import random
+import sys
+import time
+import aiohttp
 from dotenv import load_dotenv, find_dotenv
-# REMOVED: from elasticsearch import AsyncElasticsearch
+from elasticsearch import AsyncElasticsearch
+from elastic_transport import AiohttpHttpNode, AsyncTransport, ConnectionError, ConnectionTimeout, TransportError
+from elastic_transport.client_utils import DEFAULT
+
+# --- Elasticsearch Client Factory ---
+# One place that builds every AsyncElasticsearch client (API, tools, ingest scripts):
+#   * a sized aiohttp pool with a longer keep-alive, so TLS handshakes to the cloud
+#     endpoint are paid once rather than per burst of requests;
+#   * optional gzip request/response compression (used for bulk ingest bodies);
+#   * retries on 429/5xx and connection errors with exponential backoff + full jitter
+#     (the stock transport retries immediately);
+#   * a circuit breaker that fails fast while the cluster is unreachable, instead of
+#     every caller waiting out its own timeout;
+#   * request/latency/breaker stats, and keep_connected() for background reconnection.
+# This module only depends on the environment (scripts import it as `app.elastic`).
 
 # Find and load the .env file from the project root
 load_dotenv(find_dotenv())
@@ -9,10 +30,231 @@ load_dotenv(find_dotenv())
 HOSTS = os.environ.get("ELASTIC_HOSTS")
 API_KEY = os.environ.get("ELASTIC_API_KEY")
 
-# Check if secrets were loaded correctly
-if not HOSTS or not API_KEY:
-    raise ValueError("ELASTIC_HOSTS and ELASTIC_API_KEY must be set in the .env file")
+POOL_CONNECTIONS = int(os.environ.get("ES_POOL_CONNECTIONS", "32")) # Open connections per node
+KEEPALIVE_SECONDS = float(os.environ.get("ES_KEEPALIVE_SECONDS", "60")) # Idle time before a pooled connection is closed
+REQUEST_TIMEOUT_SECONDS = float(os.environ.get("ES_REQUEST_TIMEOUT_SECONDS", "10")) # Default; per-call request_timeout wins
+MAX_RETRIES = int(os.environ.get("ES_MAX_RETRIES", "3"))
+RETRY_BASE_DELAY_SECONDS = float(os.environ.get("ES_RETRY_BASE_DELAY_SECONDS", "0.2"))
+RETRY_MAX_DELAY_SECONDS = float(os.environ.get("ES_RETRY_MAX_DELAY_SECONDS", "5"))
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("ES_BREAKER_FAILURES", "5")) # Consecutive failures that open the breaker
+BREAKER_RESET_SECONDS = float(os.environ.get("ES_BREAKER_RESET_SECONDS", "30")) # Open -> try one request again
+RETRY_ON_STATUS = (429, 500, 502, 503, 504)
+LATENCY_SAMPLES = 1000
+# Same check as elastic-transport's aiohttp node (aiohttp only needs cleanup_closed on these Pythons)
+_NEEDS_CLEANUP_CLOSED = (3, 13, 0) <= sys.version_info < (3, 13, 1) or sys.version_info < (3, 12, 7)
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_DELAY_SECONDS, cap: float = RETRY_MAX_DELAY_SECONDS) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(cap, base * 2^attempt))."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised without touching the network while the breaker is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at = 0.0
+        self.trips = 0
+
+    def allow(self) -> bool:
+        """Closed: yes. Open: no, until reset_seconds have passed; then one probe request (half-open)."""
+        if self.state == "closed":
+            return True
+        now = time.monotonic()
+        if self.state == "open" and now - self.opened_at >= self.reset_seconds:
+            self.state = "half_open"
+            self.probe_started_at = now
+            return True
+        if self.state == "half_open" and now - self.probe_started_at >= self.reset_seconds:
+            self.probe_started_at = now # the previous probe never reported back (e.g. cancelled)
+            return True
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == "half_open" or (self.state == "closed" and self.consecutive_failures >= self.failure_threshold):
+            if self.state != "open":
+                self.trips += 1
+                logger.warning("Elasticsearch circuit breaker opened after %d consecutive failures.",
+                               self.consecutive_failures)
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "open": self.state != "closed",
+            "consecutive_failures": self.consecutive_failures,
+            "trips": self.trips,
+        }
+
+
+class ResilientTransport(AsyncTransport):
+    """AsyncTransport with backoff + jitter between retries, a circuit breaker and request stats."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.breaker = CircuitBreaker()
+        self.in_flight = 0
+        self.counters = {"requests": 0, "retries": 0, "failures": 0, "rejected_by_breaker": 0}
+        self._latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+
+    async def perform_request(self, method, target, *, max_retries=DEFAULT, retry_on_status=DEFAULT,
+                              retry_on_timeout=DEFAULT, **kwargs):
+        max_retries = self.max_retries if max_retries is DEFAULT else max_retries
+        retry_on_status = self.retry_on_status if retry_on_status is DEFAULT else retry_on_status
+        retry_on_timeout = self.retry_on_timeout if retry_on_timeout is DEFAULT else retry_on_timeout
+        if not self.breaker.allow():
+            self.counters["rejected_by_breaker"] += 1
+            raise CircuitOpenError("Elasticsearch circuit breaker is open; failing fast.")
+
+        attempt = 0
+        while True:
+            self.counters["requests"] += 1
+            self.in_flight += 1
+            started = time.perf_counter()
+            try:
+                # One attempt per call: the retry loop (with backoff) is ours
+                response = await super().perform_request(
+                    method, target, max_retries=0, retry_on_status=(), retry_on_timeout=False, **kwargs
+                )
+            except TransportError as e:
+                self._latencies.append(time.perf_counter() - started)
+                retryable = isinstance(e, ConnectionError) or (isinstance(e, ConnectionTimeout) and retry_on_timeout)
+                if not retryable or attempt >= max_retries:
+                    self.counters["failures"] += 1
+                    if isinstance(e, (ConnectionError, ConnectionTimeout)):
+                        self.breaker.record_failure()
+                    raise
+            else:
+                self._latencies.append(time.perf_counter() - started)
+                status = response.meta.status
+                if status not in retry_on_status or attempt >= max_retries:
+                    if status >= 500:
+                        self.counters["failures"] += 1
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                    return response
+            finally:
+                self.in_flight -= 1
+            attempt += 1
+            self.counters["retries"] += 1
+            await asyncio.sleep(backoff_delay(attempt - 1))
+
+    def stats(self) -> dict:
+        latencies = sorted(self._latencies)
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 4) if latencies else 0.0
+
+        nodes = self.node_pool.all()
+        return {
+            **self.counters,
+            "in_flight": self.in_flight,
+            "nodes": len(nodes),
+            "connections_per_node": nodes[0].config.connections_per_node if nodes else 0,
+            "latency_p50_seconds": percentile(0.5),
+            "latency_p95_seconds": percentile(0.95),
+            "latency_p99_seconds": percentile(0.99),
+            "breaker": self.breaker.stats(),
+        }
+
+
+class KeepAliveAiohttpNode(AiohttpHttpNode):
+    """
+    Stock aiohttp node with a configurable keep-alive on the pooled connections. NodeConfig has
+    no keep-alive option, so this overrides the node's session factory, a private hook:
+    elastic-transport is pinned exactly in requirements.txt, and test_elastic_client checks
+    the hook is still what builds the session.
+    """
+
+    def _create_aiohttp_session(self) -> None:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        self.session = aiohttp.ClientSession(
+            headers=self.headers,
+            skip_auto_headers=("accept", "accept-encoding", "user-agent"),
+            auto_decompress=True,
+            loop=self._loop,
+            cookie_jar=aiohttp.DummyCookieJar(),
+            connector=aiohttp.TCPConnector(
+                limit_per_host=self._connections_per_node,
+                keepalive_timeout=KEEPALIVE_SECONDS,
+                use_dns_cache=True,
+                enable_cleanup_closed=_NEEDS_CLEANUP_CLOSED,
+                ssl=self._ssl_context or False,
+            ),
+        )
+
+
+def create_client(
+    hosts: str | None = None,
+    api_key: str | None = None,
+    *,
+    http_compress: bool = False,
+    connections_per_node: int = POOL_CONNECTIONS,
+    request_timeout: float = REQUEST_TIMEOUT_SECONDS,
+    max_retries: int = MAX_RETRIES,
+) -> AsyncElasticsearch:
+    """
+    Builds a pooled, retrying, circuit-broken AsyncElasticsearch client.
+    Use http_compress=True for bulk ingest (large bodies); query traffic is small and latency-bound.
+    """
+    hosts = hosts or HOSTS
+    api_key = api_key or API_KEY
+    if not hosts or not api_key:
+        raise ValueError("ELASTIC_HOSTS and ELASTIC_API_KEY must be set in the .env file")
+    return AsyncElasticsearch(
+        hosts=[hosts],
+        api_key=api_key,
+        connections_per_node=connections_per_node,
+        http_compress=http_compress,
+        request_timeout=request_timeout,
+        max_retries=max_retries,
+        retry_on_status=RETRY_ON_STATUS,
+        retry_on_timeout=False, # a timed-out request already used up its caller's time budget
+        node_class=KeepAliveAiohttpNode,
+        transport_class=ResilientTransport,
+    )
+
+
+def client_stats(client: AsyncElasticsearch | None) -> dict:
+    transport = getattr(client, "transport", None)
+    if not isinstance(transport, ResilientTransport):
+        return {"connected": False}
+    return {"connected": True, **transport.stats()}
+
+
+def breaker_open(client: AsyncElasticsearch | None) -> bool:
+    """True while the client's circuit breaker is rejecting requests."""
+    transport = getattr(client, "transport", None)
+    return isinstance(transport, ResilientTransport) and transport.breaker.state == "open" and not (
+        time.monotonic() - transport.breaker.opened_at >= transport.breaker.reset_seconds
+    )
+
 
-# REMOVED: es_client = AsyncElasticsearch(...)
-# Just print confirmation that config is loaded
-print("Elastic config loaded (HOSTS and API_KEY). Client is created on demand.")
+async def keep_connected(client: AsyncElasticsearch, on_connect=None, max_delay: float = 30.0):
+    """Pings with jittered backoff until the cluster answers, then awaits on_connect(client) (if given)."""
+    attempt = 0
+    while not await client.ping():
+        delay = backoff_delay(attempt, base=1.0, cap=max_delay)
+        attempt += 1
+        logger.warning("Elasticsearch not reachable (attempt %d), retrying in %.1fs.", attempt, delay)
+        await asyncio.sleep(delay)
+    logger.info("Elasticsearch reachable after %d failed attempt(s).", attempt)
+    if on_connect is not None:
+        await on_connect(client)
@@ -0,0 +1,247 @@
+import asyncio
+import json
+import numpy as np
+from elasticsearch import AsyncElasticsearch
+from .matryoshka import SMALL_VECTOR_FIELD
+
+# --- Index Export ---
+# Full dumps of an index for offline analysis or for rebuilding other stores. The
+# index is read through a point-in-time (a consistent snapshot, unaffected by
+# concurrent ingest) with search_after paging, split into parallel slices. Pages go
+# through a small bounded queue, so memory stays constant whatever the index size.
+# Output: NDJSON or Parquet metadata, plus (optionally) the abstract vectors in a
+# .npy file written through a memmap; each metadata record's "vector_row" points at
+# its row there.
+# Like elastic.py this module does not import the app config: the export script
+# imports it as `app.export` (hence the package-relative import).
+
+VECTOR_FIELD = "abstract_vector"
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_SLICES = 4
+PIT_KEEP_ALIVE = "2m"
+
+# Typed Parquet columns for the known fields; anything else goes to "extra" (JSON).
+PARQUET_COLUMNS = {
+    "id": "string", "pl_name": "string", "hostname": "string", "discoverymethod": "string",
+    "disc_year": "int64", "pl_orbper": "float64", "pl_masse": "float64", "pl_rade": "float64",
+    "sy_dist": "float64", "star_simbad_main_id": "string", "star_sp_type": "string",
+    "star_plx_value": "float64", "star_rvz_radvel": "float64", "star_fe_h": "float64",
+    "arxiv_id": "string", "title": "string", "abstract": "string", "published_date": "string",
+    "vector_row": "int64", "extra": "string",
+}
+
+
+async def _walk_slice(es_client: AsyncElasticsearch, pit: dict, queue: asyncio.Queue, slice_id: int,
+                      slices: int, page_size: int, include_vectors: bool, query: dict | None,
+                      source_includes: list[str] | None):
+    search_after = None
+    while True:
+        body = {
+            "pit": {"id": pit["id"], "keep_alive": PIT_KEEP_ALIVE},
+            "size": page_size,
+            "sort": ["_shard_doc"], # cheapest total order for PIT paging
+            "track_total_hits": False,
+        }
+        if source_includes is not None:
+            body["_source"] = {"includes": source_includes}
+        else:
+            body["_source"] = {"excludes": [SMALL_VECTOR_FIELD] if include_vectors else [VECTOR_FIELD, SMALL_VECTOR_FIELD]}
+        if query is not None:
+            body["query"] = query
+        if slices > 1:
+            body["slice"] = {"id": slice_id, "max": slices}
+        if search_after is not None:
+            body["search_after"] = search_after
+        response = await es_client.search(**body)
+        pit["id"] = response.get("pit_id", pit["id"]) # the PIT id may be refreshed between pages
+        hits = response["hits"]["hits"]
+        if hits:
+            await queue.put(hits) # blocks while the consumer is behind: constant memory
+        if len(hits) < page_size:
+            return
+        search_after = hits[-1]["sort"]
+
+
+async def _cancel_all(tasks: list[asyncio.Task]):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def export_hits(es_client: AsyncElasticsearch, index: str, *, slices: int = DEFAULT_SLICES,
+                      page_size: int = DEFAULT_PAGE_SIZE, include_vectors: bool = False, pit: dict | None = None,
+                      query: dict | None = None, source_includes: list[str] | None = None):
+    """
+    Async generator over every hit of `index` (from all slices, interleaved), or of those
+    matching `query`; source_includes narrows _source to those fields.
+    Pass `pit` ({"id": ...}) to read from an already opened point-in-time; otherwise
+    one is opened here and closed when iteration ends (also on early exit).
+    """
+    owns_pit = pit is None
+    if owns_pit:
+        pit = {"id": (await es_client.open_point_in_time(index=index, keep_alive=PIT_KEEP_ALIVE))["id"]}
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(2, slices * 2)) # pages in flight
+
+    async def produce():
+        tasks = [
+            asyncio.ensure_future(
+                _walk_slice(es_client, pit, queue, slice_id, slices, page_size, include_vectors, query, source_includes)
+            )
+            for slice_id in range(slices)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except Exception as e:
+            # gather() returns on the first failure while the other slices keep running; they
+            # would block on the full queue forever (asyncio.TaskGroup needs Python 3.11)
+            await _cancel_all(tasks)
+            await queue.put(e)
+            return
+        finally:
+            await _cancel_all(tasks) # also when the producer itself is cancelled (early exit)
+        await queue.put(None)
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            page = await queue.get()
+            if page is None:
+                break
+            if isinstance(page, Exception):
+                raise page
+            for hit in page:
+                yield hit
+    finally:
+        await _cancel_all([producer]) # waits for the slices too, before the PIT is closed under them
+        if owns_pit:
+            try:
+                await es_client.close_point_in_time(id=pit["id"])
+            except Exception:
+                pass # it expires on its own after PIT_KEEP_ALIVE
+
+
+def hit_record(hit: dict) -> dict:
+    """Flat export record: the document id plus its source (without the vector)."""
+    source = dict(hit.get("_source") or {})
+    source.pop(VECTOR_FIELD, None)
+    source.pop(SMALL_VECTOR_FIELD, None) # derivable from the full vector
+    return {"id": hit.get("_id"), **source}
+
+
+async def count_with_vectors(es_client: AsyncElasticsearch, pit: dict) -> int:
+    response = await es_client.search(
+        pit={"id": pit["id"], "keep_alive": PIT_KEEP_ALIVE},
+        size=0,
+        track_total_hits=True,
+        query={"exists": {"field": VECTOR_FIELD}},
+    )
+    return response["hits"]["total"]["value"]
+
+
+class VectorMemmapWriter:
+    """Appends float32 vectors to a preallocated .npy file through a memmap."""
+
+    def __init__(self, path: str, rows: int, dim: int):
+        self.path = path
+        self.array = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(rows, dim))
+        self.rows = 0
+
+    def write(self, vector) -> int | None:
+        """Returns the row the vector was written to, or None if it's missing/malformed or the file is full."""
+        if vector is None or len(vector) != self.array.shape[1] or self.rows >= self.array.shape[0]:
+            return None
+        self.array[self.rows] = vector
+        self.rows += 1
+        return self.rows - 1
+
+    def close(self):
+        self.array.flush()
+        del self.array
+
+
+class NdjsonWriter:
+    def __init__(self, path: str):
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, record: dict):
+        self._file.write(json.dumps(record, default=str) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+def _coerce(value, column_type: str):
+    if value is None or value == "":
+        return None
+    try:
+        if column_type == "int64":
+            return int(value)
+        if column_type == "float64":
+            return float(value)
+    except (TypeError, ValueError):
+        return None
+    return str(value)
+
+
+class ParquetWriter:
+    """Buffers `batch_rows` records, then writes them as one row group (constant memory)."""
+
+    def __init__(self, path: str, batch_rows: int = 5000):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        self.schema = pa.schema([(name, getattr(pa, column_type)()) for name, column_type in PARQUET_COLUMNS.items()])
+        self._writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        self._batch: list[dict] = []
+        self.batch_rows = batch_rows
+
+    def write(self, record: dict):
+        extra = {key: value for key, value in record.items() if key not in PARQUET_COLUMNS}
+        row = {name: _coerce(record.get(name), column_type) for name, column_type in PARQUET_COLUMNS.items()}
+        row["extra"] = json.dumps(extra, default=str) if extra else None
+        self._batch.append(row)
+        if len(self._batch) >= self.batch_rows:
+            self._flush()
+
+    def _flush(self):
+        if self._batch:
+            self._writer.write_table(self._pa.Table.from_pylist(self._batch, schema=self.schema))
+            self._batch = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+async def export_index(es_client: AsyncElasticsearch, index: str, output_path: str, *, fmt: str = "ndjson",
+                       vectors_path: str | None = None, dim: int = 768, slices: int = DEFAULT_SLICES,
+                       page_size: int = DEFAULT_PAGE_SIZE, progress=None) -> dict:
+    """
+    Writes every document of `index` to output_path (fmt "ndjson" or "parquet"), and
+    the vectors to vectors_path (.npy) if given. progress(n) is called per document.
+    """
+    writer = ParquetWriter(output_path) if fmt == "parquet" else NdjsonWriter(output_path)
+    pit = {"id": (await es_client.open_point_in_time(index=index, keep_alive=PIT_KEEP_ALIVE))["id"]}
+    vectors = None
+    documents = 0
+    try:
+        if vectors_path:
+            vectors = VectorMemmapWriter(vectors_path, await count_with_vectors(es_client, pit), dim)
+        async for hit in export_hits(es_client, index, slices=slices, page_size=page_size,
+                                     include_vectors=vectors is not None, pit=pit):
+            record = hit_record(hit)
+            if vectors is not None:
+                record["vector_row"] = vectors.write((hit.get("_source") or {}).get(VECTOR_FIELD))
+            writer.write(record)
+            documents += 1
+            if progress:
+                progress(1)
+    finally:
+        writer.close()
+        if vectors is not None:
+            vectors.close()
+        try:
+            await es_client.close_point_in_time(id=pit["id"])
+        except Exception:
+            pass
+    return {"documents": documents, "vectors": vectors.rows if vectors is not None else 0}
@@ -0,0 +1,185 @@
+import asyncio
+import contextvars
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from src.app.admission import Overloaded
+
+# --- Asynchronous Chat Jobs ---
+# A /chat that runs two Gemini turns plus a plot takes 10-30 s, longer than the proxies
+# in front of the API keep a request open. POST /chat/jobs answers at once with a job id;
+# a fixed pool of `workers` tasks runs the agent, and clients poll GET /chat/jobs/{id} or
+# follow GET /chat/jobs/{id}/events (SSE). No request handler awaits a model call, so
+# slow Gemini turns never pin a connection.
+#   * Bounded: `workers` jobs run at once, at most `max_pending` more wait; beyond -> 503.
+#   * Progress: code running inside a job calls report_progress(event) (the agent reports
+#     its tool calls); the job keeps its events and wakes up anyone following it.
+#   * Cleanup: finished jobs are kept for `ttl_seconds` (to be fetched), then dropped.
+
+_current_job: contextvars.ContextVar["Job | None"] = contextvars.ContextVar("chat_job", default=None)
+
+RETRY_AFTER_SECONDS = 5.0 # Suggested wait when the pending queue is full
+
+
+def report_progress(event: dict):
+    """Appends `event` to the job this code runs in (no-op outside a job, e.g. plain /chat)."""
+    job = _current_job.get()
+    if job is not None:
+        job.publish(event)
+
+
+class Job:
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.status = "queued" # -> "running" -> "done" | "error"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events: list[dict] = []
+        self.result: dict | None = None
+        self._changed = asyncio.Event() # replaced on every change; followers wait on the old one
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    def publish(self, event: dict):
+        self.events.append(event)
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def start(self):
+        self.status = "running"
+        self.started_at = time.time()
+        self.publish({"type": "status", "status": self.status})
+
+    def finish(self, result: dict):
+        self.result = result
+        self.status = "error" if "error" in result else "done"
+        self.finished_at = time.time()
+        self.publish({"type": self.status, **result})
+
+    async def follow(self, after: int = 0, heartbeat_seconds: float | None = None):
+        """
+        Yields (position, event) from event `after` on until the job has finished.
+        Yields (None, None) after `heartbeat_seconds` without events, so a stream can
+        send a keep-alive instead of looking idle to proxies.
+        """
+        position = after
+        while True:
+            changed = self._changed
+            while position < len(self.events):
+                yield position, self.events[position]
+                position += 1
+            if self.finished:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield None, None
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": [event for event in self.events if event["type"] not in ("done", "error")],
+            "result": self.result,
+        }
+
+
+class JobQueue:
+    def __init__(self, workers: int = 4, max_pending: int = 64, ttl_seconds: float = 600.0):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self._jobs: dict[str, Job] = {}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+        self.running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.expired = 0
+
+    # --- Worker Pool (started/stopped by the app lifespan) ---
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _work(self):
+        while True:
+            job, run = await self._queue.get()
+            try:
+                await self._run(job, run)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job, run: Callable[[], Awaitable[dict]]):
+        job.start()
+        self.running += 1
+        token = _current_job.set(job)
+        try:
+            result = await run()
+        except asyncio.CancelledError:
+            job.finish({"error": "Job cancelled: the server is shutting down."})
+            self.failed += 1
+            raise
+        except Exception as e:
+            result = {"error": f"Job failed: {e}"}
+        finally:
+            _current_job.reset(token)
+            self.running -= 1
+        job.finish(result)
+        if job.status == "done":
+            self.completed += 1
+        else:
+            self.failed += 1
+
+    # --- Jobs ---
+    def submit(self, run: Callable[[], Awaitable[dict]]) -> Job:
+        """Queues run() for a worker and returns its job at once. Raises Overloaded (503) if too many wait."""
+        self.purge_expired()
+        if self._queue.qsize() >= self.max_pending:
+            self.rejected += 1
+            raise Overloaded(503, "Too many chat jobs are waiting, please retry shortly.", RETRY_AFTER_SECONDS)
+        job = Job(uuid.uuid4().hex)
+        self._jobs[job.job_id] = job
+        self._queue.put_nowait((job, run))
+        self.submitted += 1
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        self.purge_expired()
+        return self._jobs.get(job_id)
+
+    def purge_expired(self) -> int:
+        """Drops jobs that finished more than ttl_seconds ago; returns how many."""
+        cutoff = time.time() - self.ttl_seconds
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+        self.expired += len(expired)
+        return len(expired)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "running": self.running,
+            "stored": len(self._jobs),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "expired": self.expired,
+        }
@@ -0,0 +1,115 @@
+import time
+import numpy as np
+from elasticsearch import AsyncElasticsearch
+from .matryoshka import two_stage_query
+from .vector_index import BLOCK_ROWS, LocalVectorIndex, merge_top_k, unit_rows
+
+# --- kNN Recall / Latency Evaluation ---
+# Approximate kNN trades recall for latency through k, num_candidates and the vector
+# quantization (index_options type). This measures that tradeoff on our own corpus:
+# exact top-k ground truth by brute force over the exported vectors, then recall@k
+# and p50/p99 latency per setting, for the live index, a re-indexed copy per
+# quantization profile, or the local index (scripts/eval_knn.py drives it).
+# recommend() picks the fastest setting that reaches the target recall. Imports stay
+# package-relative so the script can use it as `app.knn_eval`.
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int, exclude: list[int] | None = None) -> np.ndarray:
+    """
+    Brute-force cosine top-k rows of `vectors` (may be a memmap) per query, BLOCK_ROWS rows
+    per matrix product. exclude[i] is a row to leave out for query i (a query sampled from the corpus).
+    """
+    queries = unit_rows(np.atleast_2d(queries))
+    best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+    best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+    for start in range(0, len(vectors), BLOCK_ROWS):
+        stop = min(start + BLOCK_ROWS, len(vectors))
+        scores = queries @ unit_rows(vectors[start:stop]).T
+        if exclude is not None:
+            for i, row in enumerate(exclude):
+                if row is not None and start <= row < stop:
+                    scores[i, row - start] = -np.inf
+        rows = np.broadcast_to(np.arange(start, stop, dtype=np.int64), scores.shape)
+        best_scores, best_rows = merge_top_k(
+            np.concatenate([best_scores, scores], axis=1), np.concatenate([best_rows, rows], axis=1), k
+        )
+    return best_rows
+
+
+def recall_at_k(truth: list[list[str]], found: list[list[str]], k: int) -> float:
+    """Mean fraction of the true top-k that the search returned in its top k."""
+    if not truth:
+        return 0.0
+    return float(np.mean([len(set(t[:k]) & set(f[:k])) / max(1, len(t[:k])) for t, f in zip(truth, found)]))
+
+
+def summarize(setting: dict, truth: list[list[str]], found: list[list[str]], latencies: list[float]) -> dict:
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        **setting,
+        "recall": round(recall_at_k(truth, found, setting["k"]), 4),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 2) if len(latencies_ms) else None,
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 2) if len(latencies_ms) else None,
+    }
+
+
+def recommend(results: list[dict], target_recall: float = 0.95) -> dict | None:
+    """Lowest-p99 setting with recall >= target (ties: fewer candidates); else the highest-recall one."""
+    if not results:
+        return None
+    good = [r for r in results if r["recall"] >= target_recall]
+    if good:
+        return min(good, key=lambda r: (r["p99_ms"], r.get("num_candidates", 0)))
+    return max(results, key=lambda r: (r["recall"], -r["p99_ms"]))
+
+
+# --- Trials ---
+async def run_es_trial(
+    es_client: AsyncElasticsearch,
+    index: str,
+    field: str,
+    query_vectors: np.ndarray,
+    k: int,
+    num_candidates: int,
+    exclude_ids: list[str | None] | None = None,
+    two_stage_dims: int = 0,
+    two_stage_candidates: int = 0,
+) -> tuple[list[list[str]], list[float]]:
+    """
+    One kNN search per query (sequential, so latencies don't include queueing): (ids per query, seconds).
+    With two_stage_dims, `field` is ignored: kNN on the small Matryoshka field for
+    two_stage_candidates hits, rescored with the full vector (as search_elastic does).
+    """
+    found, latencies = [], []
+    for i, vector in enumerate(query_vectors):
+        knn_filter = None
+        if exclude_ids is not None and exclude_ids[i] is not None:
+            knn_filter = {"bool": {"must_not": {"ids": {"values": [exclude_ids[i]]}}}}
+        if two_stage_dims:
+            body = {"query": two_stage_query(vector, two_stage_dims, max(k, two_stage_candidates), num_candidates, knn_filter)}
+        else:
+            body = {"knn": {"field": field, "query_vector": vector.tolist(), "k": k, "num_candidates": max(k, num_candidates)}}
+            if knn_filter:
+                body["knn"]["filter"] = knn_filter
+        started = time.perf_counter()
+        response = await es_client.search(index=index, size=k, _source=False, **body)
+        latencies.append(time.perf_counter() - started)
+        found.append([hit["_id"] for hit in response["hits"]["hits"]])
+    return found, latencies
+
+
+def run_local_trial(
+    index: LocalVectorIndex,
+    query_vectors: np.ndarray,
+    k: int,
+    nprobe: int | None,
+    exclude_ids: list[str | None] | None = None,
+) -> tuple[list[list[str]], list[float]]:
+    found, latencies = [], []
+    for i, vector in enumerate(query_vectors):
+        started = time.perf_counter()
+        hits = index.search(vector, k + (1 if exclude_ids is not None else 0), nprobe=nprobe, source_fields=[])
+        latencies.append(time.perf_counter() - started)
+        ids = [hit["_id"] for hit in hits if exclude_ids is None or hit["_id"] != exclude_ids[i]]
+        found.append(ids[:k])
+    return found, latencies
@@ -0,0 +1,137 @@
+from collections import deque
+
+# --- Planet <-> Paper Linking ---
+# Papers never carry pl_name/hostname, so "papers about TRAPPIST-1 e" can't be a filter
+# unless we precompute who each paper mentions. All planet names, host names and host
+# aliases (SIMBAD ids) go into one Aho-Corasick automaton, and every title + abstract is
+# scanned once, in time linear in the text whatever the number of names (5k+ planets:
+# per-name regexes would be 5k passes per abstract).
+#
+# Names are matched on a normalized form (case-folded, alphanumerics only), so
+# "TRAPPIST-1e", "Trappist 1 e" and "TRAPPIST-1 e" are the same. A match must start and end
+# on a token boundary: a separator, or a letter/digit change ("Kepler-22b" mentions the
+# host "Kepler-22", "HD 10" does not mention "HD 1").
+# Used by scripts/link_planets_papers.py (as `app.linker`), so standard library only.
+
+MIN_PATTERN_CHARS = 3 # shorter normalized names ("b", "GJ") would match everywhere
+
+
+def normalize_with_boundaries(text: str) -> tuple[str, set[int]]:
+    """(normalized text, positions in it where a token starts or ends)."""
+    chars: list[str] = []
+    boundaries = {0}
+    separated = False
+    for char in str(text).casefold():
+        if not char.isalnum():
+            separated = True
+            continue
+        if chars and (separated or char.isdigit() != chars[-1].isdigit()):
+            boundaries.add(len(chars))
+        chars.append(char)
+        separated = False
+    boundaries.add(len(chars))
+    return "".join(chars), boundaries
+
+
+def normalize_name(name: str) -> str:
+    return normalize_with_boundaries(name)[0]
+
+
+class AhoCorasick:
+    """Multi-pattern string matcher: add() patterns with a value each, build(), then find()."""
+
+    def __init__(self):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._outputs: list[list[tuple[int, object]]] = [[]] # (pattern length, value)
+        self._built = False
+
+    def add(self, pattern: str, value):
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            node = next_node
+        self._outputs[node].append((len(pattern), value))
+        self._built = False
+
+    def build(self):
+        """Breadth-first failure links; each node also inherits the outputs of its failure node."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+        self._built = True
+
+    def find(self, text: str):
+        """Yields (start, end, value) for every occurrence of every pattern (end exclusive)."""
+        if not self._built:
+            self.build()
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for length, value in self._outputs[node]:
+                yield position + 1 - length, position + 1, value
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+
+class MentionLinker:
+    def __init__(self):
+        self._automaton = AhoCorasick()
+        self._host_of: dict[str, str] = {}
+        self._registered: set[tuple] = set()
+
+    def _add(self, name, kind: str, canonical: str):
+        pattern = normalize_name(name) if name else ""
+        if len(pattern) >= MIN_PATTERN_CHARS and (pattern, kind, canonical) not in self._registered:
+            self._registered.add((pattern, kind, canonical)) # hosts come once per planet
+            self._automaton.add(pattern, (kind, canonical))
+
+    @property
+    def patterns(self) -> int:
+        return len(self._registered)
+
+    def add_planet(self, pl_name: str, hostname: str | None = None, host_aliases=()):
+        """Registers a planet, its host and any other names of the host (e.g. the SIMBAD main id)."""
+        self._add(pl_name, "planet", pl_name)
+        if hostname:
+            self._host_of[pl_name] = hostname
+            self._add(hostname, "host", hostname)
+            for alias in host_aliases:
+                self._add(alias, "host", hostname)
+
+    def build(self):
+        self._automaton.build()
+
+    def link(self, *texts: str) -> dict:
+        """{"mentioned_planets": [...], "mentioned_hosts": [...]} for the given texts (e.g. title, abstract)."""
+        planets, hosts = set(), set()
+        for text in texts:
+            if not text:
+                continue
+            normalized, boundaries = normalize_with_boundaries(text)
+            for start, end, (kind, canonical) in self._automaton.find(normalized):
+                if start not in boundaries or end not in boundaries:
+                    continue
+                if kind == "planet":
+                    planets.add(canonical)
+                    if canonical in self._host_of:
+                        hosts.add(self._host_of[canonical]) # a planet mention is also about its system
+                else:
+                    hosts.add(canonical)
+        return {"mentioned_planets": sorted(planets), "mentioned_hosts": sorted(hosts)}
@@ -1,160 +1,451 @@
-import vertexai
-from vertexai.generative_models import GenerativeModel, Part, Tool, FunctionDeclaration
 import src.app.config as config
 import src.app.tools as tools
+from src.app.prefetch import SpeculativePrefetch
+from src.app.deadline import DeadlineExceeded, run_stage
+from src.app.jobs import report_progress
+from src.app.metrics import registry, span
 import os
 import asyncio
+import contextlib
 import json
-import traceback
+import logging
 
 # --- Constants ---
 CHAT_MODEL_NAME = "gemini-2.5-pro" # Or gemini-2.5-flash, as you prefer
+MAX_TOOL_ROUNDS = 3 # e.g. search -> fetch_documents -> answer
 _llm_model = None
+logger = logging.getLogger(__name__)
 
 # --- Tool Definitions (The "Manual" for Gemini) ---
+# Plain FunctionDeclaration arguments; the vertexai Tool objects are only built when
+# the model is initialized, so importing this module doesn't import the Vertex SDK.
 
 # 1. Define the search_elastic tool
-search_tool = Tool(
-    function_declarations=[
-        FunctionDeclaration(
-            name="search_elastic",
-            description="Searches the astronomical database (Elasticsearch) for exoplanets and research papers using vector and keyword search. Use this for questions about planet properties, star properties, or finding research papers.",
-            parameters={
-                "type": "OBJECT",
-                "properties": {
-                    "text_query": {
-                        "type": "STRING",
-                        "description": "The natural language semantic query to search for (e.g., 'water on rocky planets', 'habitable exoplanets')."
-                    },
-                    "keyword_filter_field": {
-                        "type": "STRING",
-                        "description": "Optional. The exact database field to filter on (e.g., 'pl_name.keyword', 'hostname.keyword')."
-                    },
-                    "keyword_filter_value": {
-                        "type": "STRING",
-                        "description": "Optional. The exact value for the keyword filter (e.g., 'TRAPPIST-1 e')."
-                    }
-                },
-                "required": ["text_query"]
+search_tool = dict(
+    name="search_elastic",
+    description="Searches the astronomical database (Elasticsearch) for exoplanets and research papers using vector and keyword search. Use this for questions about planet properties, star properties, or finding research papers.",
+    parameters={
+        "type": "OBJECT",
+        "properties": {
+            "text_query": {
+                "type": "STRING",
+                "description": "The natural language semantic query to search for (e.g., 'water on rocky planets', 'habitable exoplanets')."
             },
-        ),
-    ]
+            "keyword_filter_field": {
+                "type": "STRING",
+                "description": "Optional. The exact database field to filter on (e.g., 'pl_name', 'hostname'). Planet and host filters also match the papers that mention that planet or star."
+            },
+            "keyword_filter_value": {
+                "type": "STRING",
+                "description": "Optional. The exact value for the keyword filter (e.g., 'TRAPPIST-1 e')."
+            }
+        },
+        "required": ["text_query"]
+    },
+)
+
+# 2. Define the plot_planet_comparison tool (not in AGENT_TOOLS yet, see below)
+plot_tool = dict(
+    name="plot_planet_comparison",
+    description="Generates a scatter plot comparing two properties for a list of specific planets. Use this when the user explicitly asks for a plot or visual comparison.",
+    parameters={
+        "type": "OBJECT",
+        "properties": {
+            "planet_names": {
+                "type": "ARRAY",
+                "items": {"type": "STRING"},
+                "description": "A list of one or more exact planet names to plot (e.g., ['11 Com b', 'TRAPPIST-1 e'])."
+            },
+            "x_property": {
+                "type": "STRING",
+                "description": "The database field to plot on the X-axis (e.g., 'pl_rade' for radius, 'pl_masse' for mass, 'pl_dens' for density, 'pl_eqt' for equilibrium temperature)."
+            },
+            "y_property": {
+                "type": "STRING",
+                "description": "The database field to plot on the Y-axis (e.g., 'pl_masse', 'pl_orbper')."
+            }
+        },
+        "required": ["planet_names", "x_property", "y_property"]
+    },
+)
+
+# 3. Define the fetch_documents tool (full text on demand, search results are compact)
+fetch_tool = dict(
+    name="fetch_documents",
+    description="Fetches the full stored documents (e.g. complete abstracts or all planet columns) for IDs returned by search_elastic. Search results only contain truncated abstracts and snippets; use this only when you need the full text.",
+    parameters={
+        "type": "OBJECT",
+        "properties": {
+            "ids": {
+                "type": "ARRAY",
+                "items": {"type": "STRING"},
+                "description": "Document IDs from the 'id' column of search_elastic results (max 10)."
+            },
+            "fields": {
+                "type": "ARRAY",
+                "items": {"type": "STRING"},
+                "description": "Optional. Only return these fields (e.g., ['title', 'abstract'])."
+            }
+        },
+        "required": ["ids"]
+    },
 )
 
-# 2. Define the plot_planet_comparison tool (keep definition for later)
-plot_tool = Tool(
-    function_declarations=[
-        FunctionDeclaration(
-            name="plot_planet_comparison",
-            description="Generates a scatter plot comparing two properties for a list of specific planets. Use this when the user explicitly asks for a plot or visual comparison.",
-            parameters={
-                "type": "OBJECT",
-                "properties": {
-                    "planet_names": {
-                        "type": "ARRAY",
-                        "items": {"type": "STRING"},
-                        "description": "A list of one or more exact planet names to plot (e.g., ['11 Com b', 'TRAPPIST-1 e'])."
+# 4. Define the aggregate_planets tool (counts, distributions and stats instead of paging through rows)
+aggregate_tool = dict(
+    name="aggregate_planets",
+    description="Counts, groups or summarizes planets in the catalog with optional filters, returning only aggregates (no documents). Use this for questions like 'how many planets were discovered by transit each year', 'how many planets have a radius of 1-1.5 Earth radii' or 'average mass of hot Jupiters'.",
+    parameters={
+        "type": "OBJECT",
+        "properties": {
+            "aggregation": {
+                "type": "STRING",
+                "enum": list(tools.AGGREGATIONS),
+                "description": "'count' (matching planets), 'terms' (count per distinct value of a field, e.g. discoverymethod), 'histogram' (count per numeric interval, e.g. disc_year) or 'stats' (count/min/max/avg/sum of a numeric field)."
+            },
+            "field": {
+                "type": "STRING",
+                "description": f"Field to group or summarize (not needed for 'count'). Numeric fields: {', '.join(tools.AGGREGATION_NUMERIC_FIELDS)}. Keyword/boolean fields (terms only): {', '.join(tools.AGGREGATION_KEYWORD_FIELDS)}."
+            },
+            "filters": {
+                "type": "ARRAY",
+                "description": "Optional. All must match. Use gte/lte for numeric ranges (e.g. {'field': 'pl_rade', 'gte': 1, 'lte': 1.5}) or value for an exact match (e.g. {'field': 'discoverymethod', 'value': 'Transit'}, {'field': 'pl_in_hz', 'value': 'true'}).",
+                "items": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "field": {"type": "STRING"},
+                        "value": {"type": "STRING"},
+                        "gte": {"type": "NUMBER"},
+                        "lte": {"type": "NUMBER"}
                     },
-                    "x_property": {
-                        "type": "STRING",
-                        "description": "The database field to plot on the X-axis (e.g., 'pl_rade' for radius, 'pl_masse' for mass)."
+                    "required": ["field"]
+                }
+            },
+            "interval": {
+                "type": "NUMBER",
+                "description": "Optional. Bucket width for 'histogram' (default 1, e.g. 1 year for disc_year, 0.5 for pl_rade)."
+            },
+            "size": {
+                "type": "INTEGER",
+                "description": f"Optional. Number of buckets for 'terms' (default {tools.DEFAULT_TERMS_SIZE}, max {tools.MAX_AGGREGATION_BUCKETS})."
+            }
+        },
+        "required": ["aggregation"]
+    },
+)
+
+# 5. Define the find_similar_planets tool (kNN over standardized physical properties)
+similar_tool = dict(
+    name="find_similar_planets",
+    description="Finds the planets most similar to a given planet by physical and orbital properties (mass, radius, period, density, insolation, equilibrium temperature, distance, host star temperature/mass/metallicity). Use this for 'planets like X', 'analogues of X' or 'Earth-like planets similar to X'.",
+    parameters={
+        "type": "OBJECT",
+        "properties": {
+            "planet_name": {
+                "type": "STRING",
+                "description": "Exact catalog name of the reference planet (e.g., 'TRAPPIST-1 e', 'Kepler-22 b')."
+            },
+            "filters": {
+                "type": "ARRAY",
+                "description": "Optional. Only return planets matching all of these, same format as aggregate_planets filters (e.g. {'field': 'sy_dist', 'lte': 50}, {'field': 'discoverymethod', 'value': 'Transit'}).",
+                "items": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "field": {"type": "STRING"},
+                        "value": {"type": "STRING"},
+                        "gte": {"type": "NUMBER"},
+                        "lte": {"type": "NUMBER"}
                     },
-                    "y_property": {
-                        "type": "STRING",
-                        "description": "The database field to plot on the Y-axis (e.g., 'pl_masse', 'pl_orbper')."
-                    }
-                },
-                "required": ["planet_names", "x_property", "y_property"]
+                    "required": ["field"]
+                }
             },
-        ),
-    ]
+            "k": {
+                "type": "INTEGER",
+                "description": f"Optional. Number of similar planets (default {tools.SIMILAR_PLANETS_DEFAULT_K}, max {tools.SIMILAR_PLANETS_MAX_K})."
+            }
+        },
+        "required": ["planet_name"]
+    },
 )
 
-# --- *** FIX: Create a list of ONLY the search tool *** ---
-AGENT_TOOLS = [search_tool] # <-- THIS IS THE IMPORTANT FIX
-# --- *** END FIX *** ---
+# --- Tools Offered to Gemini ---
+# plot_tool is not offered: _dispatch_tool_call has no branch for it, and a plot only reaches
+# the client when the model's final text is the tool's JSON verbatim (see run_agent_conversation).
+AGENT_TOOLS = [search_tool, fetch_tool, aggregate_tool, similar_tool]
 
 # --- Initialization Function ---
+def _build_tools(tool_specs: list[dict]) -> list:
+    from vertexai.generative_models import FunctionDeclaration, Tool
+    return [Tool(function_declarations=[FunctionDeclaration(**spec)]) for spec in tool_specs]
+
 def _initialize_vertex_ai():
     global _llm_model
     if _llm_model is not None:
         return True
     try:
-        print("Attempting to initialize Vertex AI...")
+        logger.info("Attempting to initialize Vertex AI...")
         if not config.GCP_CREDENTIALS_PATH or not os.path.exists(config.GCP_CREDENTIALS_PATH):
-             print(f"ERROR: GCP credentials path not found or invalid: {config.GCP_CREDENTIALS_PATH}")
+             logger.error("GCP credentials path not found or invalid: %s", config.GCP_CREDENTIALS_PATH)
              return False
         os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = config.GCP_CREDENTIALS_PATH
-        vertexai.init(project=config.GCP_PROJECT_ID, location=config.GCP_LOCATION)
-        # Load the model, now including ONLY the search tool
-        _llm_model = GenerativeModel(CHAT_MODEL_NAME, tools=AGENT_TOOLS)
-        print(f"Vertex AI Initialized. Gemini model '{CHAT_MODEL_NAME}' loaded with tools.")
+        with span("vertex_init"):
+            import vertexai # heavy (~1.5s): deferred until the model is actually needed
+            from vertexai.generative_models import GenerativeModel
+            vertexai.init(project=config.GCP_PROJECT_ID, location=config.GCP_LOCATION)
+            _llm_model = GenerativeModel(CHAT_MODEL_NAME, tools=_build_tools(AGENT_TOOLS))
+        logger.info("Vertex AI Initialized. Gemini model '%s' loaded with tools.", CHAT_MODEL_NAME)
         return True
     except Exception as e:
-        print(f"ERROR: Failed to initialize Vertex AI or load model: {e}")
+        logger.error("Failed to initialize Vertex AI or load model: %s", e)
         _llm_model = None
         return False
 
+def warm_up() -> bool:
+    """Initializes Vertex AI and the chat model ahead of the first request (called from the app lifespan)."""
+    return _initialize_vertex_ai()
+
+# --- Tool Dispatch (shared by the blocking and streaming conversations) ---
+async def _execute_tool_call(function_name: str, args: dict, es_client, prefetch: SpeculativePrefetch | None = None) -> str:
+    """Runs the tool Gemini asked for and returns its JSON string response."""
+    registry.inc("tool_calls_total", tool=function_name)
+    # Each call runs in its own gather() task, so the recorded corrections are this call's only
+    with tools.record_name_substitutions() as substitutions:
+        response = await _dispatch_tool_call(function_name, args, es_client, prefetch)
+    return tools.with_substitution_note(response, substitutions)
+
+async def _dispatch_tool_call(function_name: str, args: dict, es_client, prefetch: SpeculativePrefetch | None) -> str:
+    if function_name == "search_elastic":
+        search_args = (args.get("text_query"), args.get("keyword_filter_field"), args.get("keyword_filter_value"))
+        result = await prefetch.take(*search_args) if prefetch else None
+        if result is not None:
+            logger.debug("search_elastic answered from speculative prefetch.")
+        else:
+            result = await tools.search_elastic_hits(es_client, *search_args)
+        with span("tool_serialize"):
+            return tools.format_search_results(result, compact=config.TOOL_RESPONSE_COMPACT)
+    if function_name == "fetch_documents":
+        return await tools.fetch_documents(
+            es_client=es_client,
+            ids=args.get("ids") or [],
+            fields=args.get("fields")
+        )
+    if function_name == "aggregate_planets":
+        return await tools.aggregate_planets(
+            es_client=es_client,
+            aggregation=args.get("aggregation") or "count",
+            field=args.get("field"),
+            filters=[dict(spec) for spec in args.get("filters") or []],
+            interval=args.get("interval"),
+            size=args.get("size")
+        )
+    if function_name == "find_similar_planets":
+        result = await tools.find_similar_planets(
+            es_client=es_client,
+            planet_name=args.get("planet_name"),
+            filters=[dict(spec) for spec in args.get("filters") or []],
+            k=args.get("k")
+        )
+        with span("tool_serialize"):
+            return tools.format_search_results(result, compact=config.TOOL_RESPONSE_COMPACT)
+    # (Plotting logic is implicitly disabled since the tool wasn't provided)
+    return json.dumps({"error": f"Unknown tool name '{function_name}' or tool not enabled."})
+
+async def _run_tool_calls(function_calls, es_client, prefetch: SpeculativePrefetch | None = None) -> tuple:
+    """Executes every function call of one model turn concurrently; returns (response Parts, raw results)."""
+    calls = [(call.name, dict(call.args)) for call in function_calls]
+    for name, args in calls:
+        logger.debug("Gemini requested tool call: %s(%s)", name, args)
+    results = await asyncio.gather(*(_execute_tool_call(name, args, es_client, prefetch) for name, args in calls))
+    for (name, _), data in zip(calls, results):
+        logger.debug("Tool %s response (first 200 chars): %.200s...", name, data)
+    from vertexai.generative_models import Part
+    parts = [
+        Part.from_function_response(name=name, response={"content": data})
+        for (name, _), data in zip(calls, results)
+    ]
+    return parts, results
+
+def _function_calls(response) -> list:
+    if not response.candidates:
+        return []
+    return [part.function_call for part in response.candidates[0].content.parts if part.function_call]
+
+def _part_text(part) -> str | None:
+    """Returns the text of a response part, or None for non-text parts (e.g. function calls)."""
+    try:
+        return part.text
+    except AttributeError:
+        return None
+
+def _start_prefetch(prompt: str, es_client) -> SpeculativePrefetch | None:
+    """Starts embedding + kNN for the raw prompt so it runs concurrently with Gemini turn 1."""
+    if not config.PREFETCH_ENABLED:
+        return None
+    prefetch = SpeculativePrefetch(prompt, threshold=config.PREFETCH_MATCH_THRESHOLD)
+    prefetch.start(lambda text: tools.search_elastic_hits(es_client, text))
+    return prefetch
+
+async def _chunks_within_deadline(stream):
+    """Iterates a Gemini stream, giving each chunk whatever is left of the request budget."""
+    while True:
+        try:
+            chunk = await run_stage("gemini_stream", stream.__anext__())
+        except StopAsyncIteration:
+            return
+        yield chunk
+
+def _start_chat(history: list[dict] | None):
+    """Starts a Gemini chat, optionally resuming a stored session history (Content dicts)."""
+    if not history:
+        return _llm_model.start_chat()
+    from vertexai.generative_models import Content
+    return _llm_model.start_chat(history=[Content.from_dict(content) for content in history])
+
+def _history_dicts(chat) -> list[dict]:
+    return [content.to_dict() for content in chat.history]
+
 # --- Core Agent Conversation Function ---
-async def run_agent_conversation(prompt: str, es_client) -> dict:
+async def run_agent_conversation(prompt: str, es_client, history: list[dict] | None = None) -> dict:
+    """
+    Runs one user turn through Gemini (plus up to MAX_TOOL_ROUNDS tool rounds).
+    If `history` is given (session mode), the chat resumes from it and the result
+    carries the updated history under "history".
+    """
     if not _initialize_vertex_ai():
         return {"error": "Vertex AI Initialization failed."}
     if not _llm_model:
          return {"error": "LLM model is unexpectedly None."}
 
-    print(f"\n--- Starting Agent Conversation ---")
-    print(f"User Prompt: '{prompt}'")
+    logger.debug("Starting agent conversation: %r", prompt)
+    prefetch = None
     try:
-        chat = _llm_model.start_chat()
-        response = await chat.send_message_async(prompt)
+        chat = _start_chat(history)
+        prefetch = _start_prefetch(prompt, es_client)
+        response = await run_stage("gemini_turn", chat.send_message_async(prompt))
         
-        if response.candidates and response.candidates[0].content.parts[0].function_call:
-            function_call = response.candidates[0].content.parts[0].function_call
-            function_name = function_call.name
-            args = dict(function_call.args)
-            print(f"Gemini requested tool call: {function_name}({args})")
-
-            function_response_data = None
-            if function_name == "search_elastic":
-                function_response_data = await tools.search_elastic(
-                    es_client=es_client,
-                    text_query=args.get("text_query"),
-                    keyword_filter_field=args.get("keyword_filter_field"),
-                    keyword_filter_value=args.get("keyword_filter_value")
-                )
-            # (Plotting logic is implicitly disabled since the tool wasn't provided)
-            else:
-                function_response_data = json.dumps({"error": f"Unknown tool name '{function_name}' or tool not enabled."})
-
-            print(f"Tool response (first 200 chars): {function_response_data[:200]}...")
-            response = await chat.send_message_async(
-                Part.from_function_response(
-                    name=function_name,
-                    response={"content": function_response_data}
-                )
-            )
-
-        if response.candidates and response.candidates[0].content.parts[0].text:
-            final_text = response.candidates[0].content.parts[0].text
-            print(f"Gemini final response: '{final_text[:50]}...'")
+        for _ in range(MAX_TOOL_ROUNDS):
+            function_calls = _function_calls(response)
+            if not function_calls:
+                break
+            for call in function_calls: # progress for GET /chat/jobs/{id} (same events as the stream)
+                report_progress({"type": "tool_call", "name": call.name, "args": dict(call.args)})
+            response_parts, results = await _run_tool_calls(function_calls, es_client, prefetch)
+            for call, data in zip(function_calls, results):
+                report_progress({"type": "tool_result", "name": call.name, "chars": len(data)})
+            response = await run_stage("gemini_turn", chat.send_message_async(response_parts))
+
+        final_text = ""
+        if response.candidates and not _function_calls(response):
+            final_text = "".join(_part_text(part) or "" for part in response.candidates[0].content.parts)
+        if final_text:
+            logger.debug("Gemini final response: %.50r...", final_text)
             
+            result = {"text": final_text}
             if "plot_path" in final_text:
                  try:
                     plot_data = json.loads(final_text)
                     if 'plot_path' in plot_data:
-                         return {"plot_path": plot_data['plot_path']}
+                         result = {"plot_path": plot_data['plot_path']}
                  except json.JSONDecodeError:
                     pass
             
-            return {"text": final_text}
+            if history is not None:
+                result["history"] = _history_dicts(chat)
+            return result
         else:
-            print(f"Warning: Agent did not return final text. Full response: {response}")
+            registry.inc("errors_total", stage="gemini_response")
+            logger.warning("Agent did not return final text. Full response: %s", response)
             return {"error": "Received invalid final response from Gemini."}
 
+    except DeadlineExceeded as e:
+        logger.error("Agent conversation: %s", e)
+        return {"error": str(e), "deadline_exceeded": e.stage}
     except Exception as e:
-        print(f"ERROR during agent conversation: {e}")
-        print(traceback.format_exc())
+        registry.inc("errors_total", stage="agent")
+        logger.exception("Agent conversation failed: %s", e)
         return {"error": f"Agent conversation failed: {e}"}
+    finally:
+        if prefetch:
+            prefetch.cancel()
+
+# --- Streaming Agent Conversation ---
+async def stream_agent_conversation(prompt: str, es_client, history: list[dict] | None = None):
+    """
+    Streaming variant of run_agent_conversation. Yields event dicts as they happen:
+      {"type": "tool_call", "name": ..., "args": {...}}   - Gemini asked for a tool
+      {"type": "tool_result", "name": ..., "chars": N}    - the tool finished
+      {"type": "token", "text": ...}                      - a chunk of the answer
+      {"type": "done", "text": ...}                       - the full answer (+ "history" in session mode)
+      {"type": "error", "error": ...}                     - the conversation failed
+    If the consumer stops iterating (e.g. the client disconnected), the open Gemini
+    stream is closed with the generator, so no more tokens are generated for it.
+    """
+    if not _initialize_vertex_ai():
+        yield {"type": "error", "error": "Vertex AI Initialization failed."}
+        return
+    if not _llm_model:
+        yield {"type": "error", "error": "LLM model is unexpectedly None."}
+        return
+
+    logger.debug("Starting streaming agent conversation: %r", prompt)
+    prefetch = None
+    try:
+        chat = _start_chat(history)
+        prefetch = _start_prefetch(prompt, es_client)
+        message = prompt
+        tool_rounds = 0
+        while True:
+            function_calls = []
+            text_chunks = []
+            stream = await run_stage("gemini_turn", chat.send_message_async(message, stream=True))
+            # aclosing() makes sure the upstream Gemini stream is shut down if we are cancelled mid-answer
+            async with contextlib.aclosing(stream):
+                async for chunk in _chunks_within_deadline(stream):
+                    if not chunk.candidates:
+                        continue
+                    for part in chunk.candidates[0].content.parts:
+                        if part.function_call:
+                            function_calls.append(part.function_call)
+                            continue
+                        text = _part_text(part)
+                        if text:
+                            text_chunks.append(text)
+                            yield {"type": "token", "text": text}
+
+            if not function_calls:
+                break
+            if tool_rounds == MAX_TOOL_ROUNDS:
+                # Same contract as run_agent_conversation: a bounded number of tool rounds, then an answer.
+                yield {"type": "error", "error": "Received invalid final response from Gemini."}
+                return
+
+            for call in function_calls:
+                yield {"type": "tool_call", "name": call.name, "args": dict(call.args)}
+            message, results = await _run_tool_calls(function_calls, es_client, prefetch)
+            for call, data in zip(function_calls, results):
+                yield {"type": "tool_result", "name": call.name, "chars": len(data)}
+            tool_rounds += 1
+
+        final_text = "".join(text_chunks)
+        if not final_text:
+            yield {"type": "error", "error": "Received invalid final response from Gemini."}
+            return
+        logger.debug("Gemini final streamed response: %.50r...", final_text)
+        done_event = {"type": "done", "text": final_text}
+        if history is not None:
+            done_event["history"] = _history_dicts(chat)
+        yield done_event
+
+    except DeadlineExceeded as e:
+        logger.error("Streaming agent conversation: %s", e)
+        yield {"type": "error", "error": str(e), "deadline_exceeded": e.stage}
+    except Exception as e:
+        registry.inc("errors_total", stage="agent")
+        logger.exception("Streaming agent conversation failed: %s", e)
+        yield {"type": "error", "error": f"Agent conversation failed: {e}"}
+    finally:
+        if prefetch:
+            prefetch.cancel()
 
 # --- Test function ---
 async def _test_llm_connection():
@@ -165,6 +456,7 @@ async def _test_llm_connection():
         # This will init _llm_model with tools, but we create a new simple one
         if not _initialize_vertex_ai():
              return
+        from vertexai.generative_models import GenerativeModel
         simple_model = GenerativeModel(CHAT_MODEL_NAME) # No tools
         prompt = "Explain an exoplanet transit in one sentence."
         response = await simple_model.generate_content_async(prompt)
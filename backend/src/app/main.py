@@ -1,58 +1,204 @@
-from fastapi import FastAPI, HTTPException
+import time
+_import_started = time.perf_counter() # reported as import_seconds on /metrics and in the startup log
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 import contextlib
 from elasticsearch import AsyncElasticsearch
 import asyncio
+import json
+import logging
 import os # Import os for path operations
 
 # *** NEW IMPORTS ***
 from fastapi.staticfiles import StaticFiles
 
 # Import our config and agent function
+import src.app.config as config
 from src.app.config import ELASTIC_HOSTS, ELASTIC_API_KEY
-from src.app.llm import run_agent_conversation
+from src.app.llm import run_agent_conversation, stream_agent_conversation
+from src.app.answer_cache import SemanticAnswerCache, entity_key
+from src.app.singleflight import SingleFlight, normalize_text
+from src.app.sessions import SessionStore
+from src.app.router import FastPathRouter, scan_catalog
+from src.app.names import KINDS as NAME_KINDS
+from src.app.prefetch import prefetch_report
+from src.app.deadline import deadline_stats, reset_deadline, run_stage, set_deadline
+from src.app.admission import AdmissionController, Overloaded, TokenBucketLimiter, client_address, parse_trusted_proxies
+from src.app.jobs import JobQueue
+from src.app.compaction import compaction_totals
+from src.app.metrics import (
+    registry, server_timing_header, span, start_request_timing, stop_request_timing
+)
+from src.app.warmup import WarmUp, warm_up_models
+from src.app.export import VECTOR_FIELD, export_hits, hit_record
+import src.app.elastic as elastic
+import src.app.tools as tools
 
-# --- Pydantic Models (unchanged) ---
+logger = logging.getLogger(__name__)
+
+# --- Pydantic Models ---
 class ChatRequest(BaseModel):
     prompt: str
+    session_id: str | None = None # Optional: continue a server-side conversation
 
 class ChatResponse(BaseModel):
     text: str | None = None
     plot_path: str | None = None
     error: str | None = None
+    session_id: str | None = None
+
+class ChatJobResponse(BaseModel):
+    job_id: str
+    status: str # queued | running | done | error
+    progress: list[dict] = [] # tool calls/results so far
+    result: ChatResponse | None = None # set once the job has finished
+
+class SearchRequest(BaseModel):
+    query: str
+    keyword_filter_field: str | None = None # e.g. 'pl_name.keyword'
+    keyword_filter_value: str | None = None
+
+class SearchHit(BaseModel):
+    id: str
+    score: float | None = None
+    source: dict = {}
+    highlights: list[str] = [] # abstract snippets around the query terms
+
+class SearchResponse(BaseModel):
+    hits: list[SearchHit] = []
+    error: str | None = None
+
+class SearchBatchRequest(BaseModel):
+    queries: list[SearchRequest]
 
-# --- Manage Elasticsearch Client Lifecycle (unchanged) ---
+class SearchBatchItem(SearchResponse):
+    index: int # position of the query in the request
+
+# --- Manage Elasticsearch Client Lifecycle ---
 es_client_store = {}
 
+# --- Semantic Answer Cache ---
+answer_cache = SemanticAnswerCache(
+    dim=tools.EXPECTED_EMBEDDING_DIM,
+    threshold=config.ANSWER_CACHE_THRESHOLD,
+    ttl_seconds=config.ANSWER_CACHE_TTL_SECONDS,
+    max_entries=config.ANSWER_CACHE_MAX_ENTRIES,
+)
+
+# --- Request Coalescing ---
+# Concurrent identical prompts (after normalization) share one agent run.
+chat_flight = SingleFlight("chat")
+# Jobs coalesce among themselves only: a /chat follower would inherit a job's deadline and
+# run without an admission slot, and a job following a /chat leader would get no progress.
+chat_job_flight = SingleFlight("chat_job")
+
+# --- Fast-Path Router (catalog lookups answered without the LLM) ---
+fast_path_router = FastPathRouter(tools.name_resolver)
+
+# --- Name Autocomplete (tools.name_resolver, also the router's name lookup) ---
+AUTOCOMPLETE_MAX_LIMIT = 25
+
+# --- Admission Control (concurrency limit + per-client rate limit) ---
+admission = AdmissionController(
+    max_concurrent=config.MAX_CONCURRENT_CHATS,
+    max_queue=config.MAX_QUEUED_CHATS,
+    queue_timeout=config.CHAT_QUEUE_TIMEOUT_SECONDS,
+)
+rate_limiter = TokenBucketLimiter(
+    rate_per_second=config.RATE_LIMIT_PER_MINUTE / 60.0,
+    burst=config.RATE_LIMIT_BURST,
+)
+trusted_proxies = parse_trusted_proxies(config.TRUSTED_PROXIES)
+# Exports hold a point-in-time and several scroll slices for minutes: own slots, no queue.
+export_admission = AdmissionController(
+    max_concurrent=config.MAX_CONCURRENT_EXPORTS,
+    max_queue=0,
+    queue_timeout=config.CHAT_QUEUE_TIMEOUT_SECONDS,
+)
+
+# --- Asynchronous Chat Jobs (workers started in the lifespan) ---
+chat_jobs = JobQueue(
+    workers=config.CHAT_JOB_WORKERS,
+    max_pending=config.CHAT_JOB_MAX_PENDING,
+    ttl_seconds=config.CHAT_JOB_TTL_SECONDS,
+)
+
+# --- Conversation Sessions ---
+session_store = SessionStore(
+    max_sessions=config.SESSION_MAX_SESSIONS,
+    token_budget=config.SESSION_TOKEN_BUDGET,
+    max_exchanges=config.SESSION_MAX_EXCHANGES,
+)
+
+# --- Metrics (component stats exported as gauges on /metrics) ---
+registry.register_collector("answer_cache", answer_cache.stats)
+registry.register_collector("chat_flight", chat_flight.stats)
+registry.register_collector("chat_job_flight", chat_job_flight.stats)
+registry.register_collector("search_flight", tools.search_flight_stats)
+registry.register_collector("router", fast_path_router.stats)
+registry.register_collector("prefetch", prefetch_report)
+registry.register_collector("deadline", deadline_stats)
+registry.register_collector("admission", lambda: {**admission.stats(), **rate_limiter.stats()})
+registry.register_collector("export_admission", export_admission.stats)
+registry.register_collector("sessions", session_store.stats)
+registry.register_collector("chat_jobs", chat_jobs.stats)
+registry.register_collector("compaction", lambda: compaction_totals)
+registry.register_collector("elasticsearch", lambda: elastic.client_stats(es_client_store.get("client")))
+registry.register_collector("local_index", tools.local_index_stats)
+registry.register_collector("aggregation_cache", tools.aggregation_cache_stats)
+registry.register_collector("name_resolver", tools.name_resolver.stats)
+
+# --- Startup ---
+startup_report = {"import_seconds": None, "warm_up_seconds": None, "warm_up": {}}
+registry.register_collector("startup", lambda: startup_report)
+
 @contextlib.asynccontextmanager
 async def app_lifespan(app: FastAPI):
-    print("FastAPI app starting...")
-    if not ELASTIC_HOSTS or not ELASTIC_API_KEY:
-        raise ValueError("ELASTIC_HOSTS and ELASTIC_API_KEY must be set in .env")
-    
-    print("Initializing global Elasticsearch client...")
-    client = AsyncElasticsearch(
-        hosts=[ELASTIC_HOSTS],
-        api_key=ELASTIC_API_KEY
-    )
-    if not await client.ping():
-         print("ERROR: Failed to connect to Elasticsearch on startup.")
+    config.configure_logging()
+    logger.info("FastAPI app starting...")
+    client = None
+    if ELASTIC_HOSTS and ELASTIC_API_KEY:
+        logger.info("Initializing global Elasticsearch client...")
+        client = elastic.create_client(ELASTIC_HOSTS, ELASTIC_API_KEY)
+    elif config.SEARCH_BACKEND == "local":
+        logger.warning("No Elasticsearch credentials: only /search and /search/batch (local index) are available.")
     else:
-         print("Global Elasticsearch client connected.")
-         es_client_store["client"] = client
+        raise ValueError("ELASTIC_HOSTS and ELASTIC_API_KEY must be set in .env")
+    # ES connection and model initialization are independent: run them side by side.
+    warm = WarmUp()
+    started = time.perf_counter()
+    steps = [_connect_elasticsearch(client, warm)] if client is not None else []
+    if config.WARMUP_ENABLED:
+        steps.append(warm_up_models(warm))
+    if config.SEARCH_BACKEND == "local" or config.LOCAL_INDEX_FALLBACK:
+        steps.append(warm.step("local_vector_index", asyncio.to_thread(tools.load_local_index)))
+    await asyncio.gather(*steps)
+    if config.WARMUP_ENABLED and config.WARMUP_QUERY and "client" in es_client_store:
+        await warm.step("synthetic_query", tools.search_elastic_hits(client, config.WARMUP_QUERY))
+    startup_report["warm_up_seconds"] = round(time.perf_counter() - started, 3)
+    startup_report["warm_up"] = warm.report()
+    logger.info("Startup: imports %.2fs, warm-up %.2fs %s", startup_report["import_seconds"],
+                startup_report["warm_up_seconds"], warm.report())
+    chat_jobs.start()
     
     yield
     
-    print("FastAPI app shutting down...")
-    client = es_client_store.get("client")
-    if client:
-        try:
-            await client.close()
-            print("Global Elasticsearch client closed.")
-        except Exception as e:
-            print(f"Error closing Elasticsearch client: {e}")
+    logger.info("FastAPI app shutting down...")
+    await chat_jobs.stop()
+    reconnect_task = es_client_store.pop("reconnect_task", None)
+    if reconnect_task:
+        reconnect_task.cancel()
+    if client is None:
+        return
+    try:
+        await client.close()
+        logger.info("Global Elasticsearch client closed.")
+    except Exception as e:
+        logger.warning("Error closing Elasticsearch client: %s", e)
 
-# --- Create FastAPI App with Lifespan (unchanged) ---
+# --- Create FastAPI App with Lifespan ---
 app = FastAPI(title="Project Kepler API", lifespan=app_lifespan)
 
 # --- *** MOUNT STATIC DIRECTORY *** ---
@@ -64,37 +210,488 @@ static_dir = os.path.join(os.path.dirname(__file__), "static")
 
 # Ensure the directory exists (optional, but good)
 os.makedirs(static_dir, exist_ok=True) 
-print(f"Serving static files from: {static_dir}")
+logger.info("Serving static files from: %s", static_dir)
 
 app.mount("/static", StaticFiles(directory=static_dir), name="static")
 # --- *** END MOUNT *** ---
 
 
+async def _connect_elasticsearch(client: AsyncElasticsearch, warm: WarmUp):
+    if not await warm.step("elasticsearch", client.ping()):
+        # Keep serving (/chat answers 500 until then) and reconnect in the background
+        logger.error("Failed to connect to Elasticsearch on startup; reconnecting in the background.")
+        es_client_store["reconnect_task"] = asyncio.create_task(
+            elastic.keep_connected(client, on_connect=_on_elasticsearch_connected)
+        )
+        return
+    await _on_elasticsearch_connected(client, warm)
+
+async def _on_elasticsearch_connected(client: AsyncElasticsearch, warm: WarmUp | None = None):
+    logger.info("Global Elasticsearch client connected.")
+    es_client_store["client"] = client
+    if not await (warm or WarmUp()).step("planet_catalog", _load_planet_catalog(client)):
+        logger.warning("Planet catalog not loaded: names are not resolved and all prompts go to the agent.")
+
+async def _load_planet_catalog(client: AsyncElasticsearch):
+    """One scan of the planets index feeds the name resolver and the fast-path router."""
+    rows = await scan_catalog(client, tools.PLANETS_INDEX)
+    tools.name_resolver.load_rows(rows)
+    logger.info("Name resolver loaded %d planet/host names.", tools.name_resolver.stats()["names"])
+    if config.FAST_PATH_ENABLED:
+        fast_path_router.load_rows(rows)
+        logger.info("Fast-path router loaded %d planets / %d host stars.",
+                    fast_path_router.stats()["planets"], fast_path_router.stats()["hosts"])
+
 # --- Endpoints ---
 @app.get("/health")
 def read_health():
-    """ A simple health check endpoint. """
-    return {"status": "ok"}
+    """ Health check; also reports /chat saturation so the load balancer can route around busy workers. """
+    stats = admission.stats()
+    return {
+        "status": "saturated" if stats["saturation"] >= 1.0 else "ok",
+        "saturation": stats["saturation"],
+        "active": stats["active"],
+        "queued": stats["queued"],
+    }
+
+@app.get("/admission/stats")
+def read_admission_stats():
+    """ Admission control and rate limiting counters. """
+    return {**admission.stats(), **rate_limiter.stats()}
+
+def _client_id(http_request: Request) -> str:
+    """Who to rate-limit: the peer address, or the forwarded client behind a trusted proxy."""
+    peer = http_request.client.host if http_request.client else None
+    return client_address(peer, http_request.headers.get("x-forwarded-for"), trusted_proxies)
+
+def _check_rate_limit(http_request: Request):
+    retry_after = rate_limiter.check(_client_id(http_request))
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests, please slow down.",
+            headers=Overloaded(429, "", retry_after).headers()
+        )
+
+async def _admit(controller: AdmissionController = admission):
+    """Takes an admission slot or fails fast with 503 + Retry-After."""
+    try:
+        return await controller.acquire()
+    except Overloaded as e:
+        logger.warning("Load shedding: %s (%s)", e.detail, controller.stats())
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers())
 
-# --- Chat Endpoint (unchanged) ---
+async def _admitted(coro_factory):
+    """Runs coro_factory() while holding an admission slot."""
+    slot = await _admit()
+    try:
+        return await coro_factory()
+    finally:
+        slot.release()
+
+# --- Chat Endpoint ---
 @app.post("/chat")
-async def handle_chat(request: ChatRequest) -> ChatResponse:
+async def handle_chat(request: ChatRequest, http_request: Request, response: Response) -> ChatResponse:
     es_client = es_client_store.get("client")
     if not es_client:
-        print("ERROR: /chat endpoint called but ES client is not available.")
+        logger.error("/chat endpoint called but ES client is not available.")
         raise HTTPException(status_code=500, detail="Elasticsearch client not initialized.")
     if not request.prompt:
         raise HTTPException(status_code=400, detail="Prompt cannot be empty.")
+    _check_rate_limit(http_request)
+    # One time budget for everything this request does (embedding, ES, Gemini turns)
+    deadline_token = set_deadline(config.CHAT_DEADLINE_SECONDS)
+    timing_token = start_request_timing()
+    started = time.perf_counter()
+    outcome = "error"
     try:
-        agent_result = await run_agent_conversation(request.prompt, es_client)
+        fast_answer = _route_fast_path(request)
+        if fast_answer is not None:
+            agent_result = fast_answer
+        elif request.session_id:
+            # Answers depend on the conversation so far: no shared cache or coalescing here.
+            agent_result = await _admitted(
+                lambda: _answer_in_session(request.prompt, request.session_id, es_client)
+            )
+        else:
+            # Only the leader of a coalesced group takes an admission slot.
+            agent_result = await chat_flight.do(
+                normalize_text(request.prompt),
+                lambda: _admitted(lambda: _answer_with_cache(request.prompt, es_client))
+            )
         
+        if agent_result.get("deadline_exceeded"):
+            outcome = "deadline_exceeded"
+            raise HTTPException(status_code=504, detail=agent_result["error"])
         if "error" in agent_result:
             raise HTTPException(status_code=500, detail=agent_result["error"])
         
-        return ChatResponse(
-            text=agent_result.get("text"),
-            plot_path=agent_result.get("plot_path") # This path will now be servable
-        )
+        outcome = "fast_path" if fast_answer is not None else "ok"
+        with span("serialize"):
+            return ChatResponse(
+                text=agent_result.get("text"),
+                plot_path=agent_result.get("plot_path"), # This path will now be servable
+                session_id=request.session_id
+            )
+    except HTTPException as e:
+        if e.status_code == 503:
+            outcome = "shed"
+        raise
     except Exception as e:
-        print(f"ERROR in /chat endpoint: {e}")
+        logger.exception("Error in /chat endpoint: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        spans = stop_request_timing(timing_token)
+        reset_deadline(deadline_token)
+        elapsed = _record_request("/chat", outcome, started)
+        if config.SERVER_TIMING_ENABLED:
+            response.headers["Server-Timing"] = server_timing_header(spans + [("total", elapsed)])
+
+def _record_request(endpoint: str, outcome: str, started: float) -> float:
+    elapsed = time.perf_counter() - started
+    registry.inc("chat_requests_total", endpoint=endpoint, outcome=outcome)
+    registry.observe("chat_request_seconds", elapsed, endpoint=endpoint)
+    return elapsed
+
+def _route_fast_path(request: ChatRequest) -> dict | None:
+    """Templated answer for plain catalog lookups (not used inside sessions, which need history)."""
+    if not config.FAST_PATH_ENABLED or request.session_id:
+        return None
+    return fast_path_router.route(request.prompt)
+
+async def _answer_with_cache(prompt: str, es_client) -> dict:
+    """
+    Runs the agent behind the semantic answer cache. The cache is best-effort:
+    if the prompt can't be embedded or the index generation is unknown, we just ask the agent.
+    Without the name catalog prompts can't be scoped to their entities, so the cache is skipped.
+    """
+    if not config.ANSWER_CACHE_ENABLED or tools.name_resolver.loaded_at is None:
+        return await run_agent_conversation(prompt, es_client)
+    cache_key = entity_key(prompt, tools.name_resolver.find_names(prompt))
+    prompt_vector = None
+    generation = None
+    try:
+        # The cache must never eat into the agent's budget more than its own small slice
+        prompt_vector, generation = await run_stage(
+            "answer_cache_lookup",
+            asyncio.gather(tools.get_query_embedding(prompt), tools.get_index_generation(es_client)),
+            config.ANSWER_CACHE_LOOKUP_TIMEOUT_SECONDS
+        )
+    except Exception as e:
+        logger.warning("Answer cache lookup skipped: %s", e)
+    if prompt_vector is not None and generation is not None:
+        cached, similarity = answer_cache.lookup(prompt_vector, generation, cache_key)
+        if cached is not None:
+            logger.debug("Answer cache hit (similarity %.3f).", similarity)
+            return cached
+
+    agent_result = await run_agent_conversation(prompt, es_client)
+    if prompt_vector is not None and generation is not None and "error" not in agent_result:
+        answer_cache.store(prompt_vector, agent_result, generation, prompt=prompt, key=cache_key)
+    return agent_result
+
+async def _answer_in_session(prompt: str, session_id: str, es_client) -> dict:
+    """Runs the agent on top of the stored session history, then saves the trimmed history back."""
+    session = session_store.get(session_id)
+    async with session.lock:
+        agent_result = await run_agent_conversation(prompt, es_client, history=list(session.history))
+        history = agent_result.pop("history", None)
+        if history is not None:
+            session_store.save(session, history)
+    return agent_result
+
+@app.delete("/sessions/{session_id}")
+def delete_session(session_id: str):
+    """ Forgets a conversation's server-side history. """
+    if not session_store.delete(session_id):
+        raise HTTPException(status_code=404, detail="Session not found.")
+    return {"status": "deleted"}
+
+@app.get("/cache/stats")
+def read_cache_stats():
+    """ Hit rate and similarity histogram of the semantic answer cache. """
+    return answer_cache.stats()
+
+@app.get("/router/stats")
+def read_router_stats():
+    """ How many prompts the fast-path router answered without the LLM. """
+    return fast_path_router.stats()
+
+@app.get("/autocomplete")
+def read_autocomplete(q: str, limit: int = 10, kind: str | None = None):
+    """ Planet / host-star name suggestions for a partial name (typo-tolerant), from the in-memory resolver. """
+    if kind is not None and kind not in NAME_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of: {', '.join(NAME_KINDS)}.")
+    return {"suggestions": tools.name_resolver.complete(q, limit=max(1, min(limit, AUTOCOMPLETE_MAX_LIMIT)), kind=kind)}
+
+@app.get("/deadline/stats")
+def read_deadline_stats():
+    """ How often each stage ran out of its time budget. """
+    return deadline_stats()
+
+@app.get("/prefetch/stats")
+def read_prefetch_stats():
+    """ How often the speculative search prefetch was used by the agent. """
+    return prefetch_report()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    """ Per-stage latency histograms, request/tool/error counters and component stats (Prometheus text format). """
+    return PlainTextResponse(registry.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+# --- Direct Search Endpoints (no LLM) ---
+def _search_hit(hit: dict) -> SearchHit:
+    return SearchHit(
+        id=hit.get("_id"),
+        score=hit.get("_score"),
+        source=hit.get("_source") or {},
+        highlights=(hit.get("highlight") or {}).get("abstract", []),
+    )
+
+def _require_es_client(local_ok: bool = False):
+    es_client = es_client_store.get("client")
+    if not es_client and not (local_ok and tools.use_local_index(None)):
+        logger.error("Search endpoint called but ES client is not available.")
+        raise HTTPException(status_code=500, detail="Elasticsearch client not initialized.")
+    return es_client
+
+@app.post("/search")
+async def handle_search(request: SearchRequest, http_request: Request) -> SearchResponse:
+    """ The agent's hybrid search (kNN + optional keyword term), without the agent. """
+    es_client = _require_es_client(local_ok=True)
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty.")
+    _check_rate_limit(http_request)
+    result = await tools.search_elastic_hits(
+        es_client, request.query, request.keyword_filter_field, request.keyword_filter_value
+    )
+    if result.get("error") == tools.RETRIEVAL_SKIPPED_MESSAGE:
+        raise HTTPException(status_code=504, detail="Search did not finish in time.")
+    if "error" in result:
+        raise HTTPException(status_code=500, detail=result["error"])
+    return SearchResponse(hits=[_search_hit(hit) for hit in result["hits"]])
+
+@app.post("/search/batch")
+async def handle_search_batch(request: SearchBatchRequest, http_request: Request) -> StreamingResponse:
+    """
+    Many searches at once: one embedding round for all queries, then _msearch.
+    Streams NDJSON SearchBatchItem lines as results arrive (use "index" to match them up).
+    """
+    es_client = _require_es_client(local_ok=True)
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="At least one query is required.")
+    if len(request.queries) > config.SEARCH_BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"At most {config.SEARCH_BATCH_MAX_QUERIES} queries per batch.")
+    if any(not query.query.strip() for query in request.queries):
+        raise HTTPException(status_code=400, detail="Queries cannot be empty.")
+    _check_rate_limit(http_request)
+    queries = [(q.query, q.keyword_filter_field, q.keyword_filter_value) for q in request.queries]
+
+    async def result_lines():
+        async for position, result in tools.search_elastic_batch(es_client, queries):
+            item = SearchBatchItem(
+                index=position,
+                hits=[_search_hit(hit) for hit in result.get("hits", [])],
+                error=result.get("error"),
+            )
+            yield item.model_dump_json() + "\n"
+
+    return StreamingResponse(result_lines(), media_type="application/x-ndjson")
+
+@app.get("/export")
+async def handle_export(http_request: Request, include_vectors: bool = False,
+                        limit: int = config.EXPORT_MAX_DOCUMENTS) -> StreamingResponse:
+    """
+    Streams up to `limit` documents of the planets and papers indices as NDJSON (id, index + source),
+    read from a point-in-time in parallel slices. Full dumps, Parquet and .npy vector files: scripts/export_index.py.
+    """
+    es_client = _require_es_client()
+    if not 1 <= limit <= config.EXPORT_MAX_DOCUMENTS:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {config.EXPORT_MAX_DOCUMENTS}.")
+    _check_rate_limit(http_request)
+    slot = await _admit(export_admission)
+
+    async def document_lines():
+        hits = export_hits(es_client, tools.ALL_INDICES, slices=config.EXPORT_SLICES,
+                           page_size=min(config.EXPORT_PAGE_SIZE, limit), include_vectors=include_vectors)
+        sent = 0
+        try:
+            async for hit in hits:
+                record = {"index": hit.get("_index"), **hit_record(hit)}
+                if include_vectors:
+                    record[VECTOR_FIELD] = (hit.get("_source") or {}).get(VECTOR_FIELD)
+                yield json.dumps(record, default=str) + "\n"
+                sent += 1
+                if sent >= limit:
+                    break
+        finally:
+            await hits.aclose() # stops the slices and closes the point-in-time
+            slot.release()
+
+    # The background task is a safety net for a body that is never iterated (client gone).
+    return StreamingResponse(
+        document_lines(), media_type="application/x-ndjson", background=BackgroundTask(slot.release)
+    )
+
+# --- Streaming Chat Endpoint ---
+@app.post("/chat/stream")
+async def handle_chat_stream(request: ChatRequest, http_request: Request) -> StreamingResponse:
+    """
+    Same agent as /chat, but streamed as NDJSON (one JSON event per line):
+    tool-call progress first, then answer tokens as Gemini produces them.
+    """
+    es_client = es_client_store.get("client")
+    if not es_client:
+        logger.error("/chat/stream endpoint called but ES client is not available.")
+        raise HTTPException(status_code=500, detail="Elasticsearch client not initialized.")
+    if not request.prompt:
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty.")
+    _check_rate_limit(http_request)
+
+    fast_answer = _route_fast_path(request)
+    if fast_answer is not None:
+        fast_line = json.dumps({"type": "done", "text": fast_answer["text"]}) + "\n"
+        return StreamingResponse(iter([fast_line]), media_type="application/x-ndjson")
+    # Admit before responding, so overload is still a proper 503 rather than a broken stream.
+    slot = await _admit()
+
+    async def event_lines():
+        set_deadline(config.CHAT_DEADLINE_SECONDS) # set here: the body is streamed after the endpoint returns
+        timing_token = start_request_timing()
+        started = time.perf_counter()
+        outcome = "error"
+        first_token = True
+        session = session_store.get(request.session_id) if request.session_id else None
+        try:
+            async with (session.lock if session else contextlib.nullcontext()):
+                history = list(session.history) if session else None
+                events = stream_agent_conversation(request.prompt, es_client, history=history)
+                try:
+                    async for event in events:
+                        if await http_request.is_disconnected():
+                            logger.info("Client disconnected from /chat/stream, cancelling agent conversation.")
+                            outcome = "disconnected"
+                            break
+                        if event["type"] == "token" and first_token:
+                            first_token = False
+                            registry.observe("time_to_first_token_seconds", time.perf_counter() - started)
+                        if event["type"] == "done":
+                            outcome = "ok"
+                            if session:
+                                session_store.save(session, event.pop("history"))
+                                event["session_id"] = session.session_id
+                            if config.SERVER_TIMING_ENABLED:
+                                # Headers are long gone by now, so the timings ride on the last event
+                                event["server_timing"] = server_timing_header(stop_request_timing(timing_token))
+                                timing_token = None
+                        elif event["type"] == "error" and event.get("deadline_exceeded"):
+                            outcome = "deadline_exceeded"
+                        yield json.dumps(event) + "\n"
+                finally:
+                    # Closing the generator closes the upstream Gemini stream, so an
+                    # abandoned request stops consuming model time.
+                    await events.aclose()
+        finally:
+            slot.release()
+            if timing_token is not None:
+                stop_request_timing(timing_token)
+            _record_request("/chat/stream", outcome, started)
+
+    # The background task is a safety net for a body that is never iterated (client gone).
+    return StreamingResponse(
+        event_lines(), media_type="application/x-ndjson", background=BackgroundTask(slot.release)
+    )
+
+# --- Asynchronous Chat Jobs ---
+@app.post("/chat/jobs", status_code=202)
+async def handle_chat_job(request: ChatRequest, http_request: Request) -> ChatJobResponse:
+    """
+    Same agent as /chat, but answered at once with a job id: a worker runs the
+    conversation, GET /chat/jobs/{job_id} (or .../events) reports progress and the result.
+    """
+    es_client = es_client_store.get("client")
+    if not es_client:
+        logger.error("/chat/jobs endpoint called but ES client is not available.")
+        raise HTTPException(status_code=500, detail="Elasticsearch client not initialized.")
+    if not request.prompt:
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty.")
+    _check_rate_limit(http_request)
+    try:
+        job = chat_jobs.submit(lambda: _run_chat_job(request, es_client))
+    except Overloaded as e:
+        logger.warning("Load shedding: %s (%s)", e.detail, chat_jobs.stats())
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers())
+    return _chat_job_response(job)
+
+async def _run_chat_job(request: ChatRequest, es_client) -> dict:
+    """The /chat pipeline (fast path, answer cache, coalescing, sessions) inside a job worker."""
+    deadline_token = set_deadline(config.CHAT_JOB_DEADLINE_SECONDS)
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        agent_result = _route_fast_path(request)
+        if agent_result is not None:
+            outcome = "fast_path"
+        elif request.session_id:
+            agent_result = await _answer_in_session(request.prompt, request.session_id, es_client)
+        else:
+            # The worker pool bounds jobs, so no admission slot: jobs never get a 503 mid-queue.
+            agent_result = await chat_job_flight.do(
+                normalize_text(request.prompt), lambda: _answer_with_cache(request.prompt, es_client)
+            )
+        if "error" in agent_result:
+            outcome = "deadline_exceeded" if agent_result.get("deadline_exceeded") else "error"
+            return {"error": agent_result["error"], "session_id": request.session_id}
+        if outcome != "fast_path":
+            outcome = "ok"
+        # A fresh dict: cached/coalesced results are shared with other requests
+        return {"text": agent_result.get("text"), "plot_path": agent_result.get("plot_path"),
+                "session_id": request.session_id}
+    finally:
+        reset_deadline(deadline_token)
+        _record_request("/chat/jobs", outcome, started)
+
+def _chat_job_response(job) -> ChatJobResponse:
+    return ChatJobResponse(
+        job_id=job.job_id,
+        status=job.status,
+        progress=job.to_dict()["progress"],
+        result=ChatResponse(**job.result) if job.result is not None else None,
+    )
+
+def _require_chat_job(job_id: str):
+    job = chat_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found (unknown or expired).")
+    return job
+
+@app.get("/chat/jobs/stats")
+def read_chat_job_stats():
+    return chat_jobs.stats()
+
+@app.get("/chat/jobs/{job_id}")
+def read_chat_job(job_id: str) -> ChatJobResponse:
+    return _chat_job_response(_require_chat_job(job_id))
+
+@app.get("/chat/jobs/{job_id}/events")
+async def stream_chat_job_events(job_id: str, http_request: Request) -> StreamingResponse:
+    """
+    Server-Sent Events for one job: every progress event so far, then new ones as they
+    happen, ending with a "done" or "error" event. Each event carries its position as
+    the SSE id, so a reconnecting client (Last-Event-ID) resumes where it left off.
+    """
+    job = _require_chat_job(job_id)
+    last_event_id = http_request.headers.get("last-event-id", "")
+    after = int(last_event_id) + 1 if last_event_id.isdigit() else 0
+
+    async def sse_lines():
+        async for position, event in job.follow(after, config.CHAT_JOB_HEARTBEAT_SECONDS):
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {position}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    return StreamingResponse(sse_lines(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+startup_report["import_seconds"] = round(time.perf_counter() - _import_started, 3)
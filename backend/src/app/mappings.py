@@ -0,0 +1,85 @@
+from .config import SMALL_VECTOR_DIMS, TWO_STAGE_SEARCH, VECTOR_INDEX_TYPE
+from .derived import PROPERTY_VECTOR_DIMS
+from .matryoshka import FULL_VECTOR_FIELD, SMALL_VECTOR_FIELD
+
+# --- Index Mappings ---
+# Planets and papers live in separate indices (config.PLANETS_INDEX / PAPERS_INDEX):
+#   planets: ~5k tabular planet + host-star rows (100+ sparse columns, dynamically
+#            mapped beyond the ones below): term/range/aggregation traffic, plus one tiny
+#            property vector per planet for "planets like X";
+#   papers:  arXiv title/abstract text + embeddings: the kNN traffic, so its HNSW graph
+#            only holds vector-bearing documents.
+# Used by scripts/create_index.py and scripts/split_index.py (as `app.mappings`).
+
+EMBEDDING_DIM = 768
+PROPERTY_VECTOR_FIELD = "property_vector"
+
+PLANETS_MAPPING = {
+    "properties": {
+        # --- Planet Fields ---
+        "pl_name": {"type": "keyword"},
+        "hostname": {"type": "keyword"},
+        "discoverymethod": {"type": "keyword"},
+        "disc_year": {"type": "integer"},
+        "pl_orbper": {"type": "float"},
+        "pl_masse": {"type": "float"},
+        "pl_rade": {"type": "float"},
+        "sy_dist": {"type": "float"},
+
+        # --- Star Fields ---
+        "star_simbad_main_id": {"type": "keyword"},
+        "star_sp_type": {"type": "keyword"},
+        "star_plx_value": {"type": "float"},
+        "star_rvz_radvel": {"type": "float"},
+        "star_fe_h": {"type": "float"},
+        # Other columns are mapped dynamically
+
+        # --- Derived quantities (app/derived.py, filled in at ingest) ---
+        "pl_dens": {"type": "float"},
+        "pl_grav": {"type": "float"},
+        "pl_orbsmax": {"type": "float"},
+        "pl_insol": {"type": "float"},
+        "pl_eqt": {"type": "float"},
+        "pl_in_hz": {"type": "boolean"},
+        "pl_in_optimistic_hz": {"type": "boolean"},
+
+        # --- Paper counts (scripts/link_planets_papers.py) ---
+        "paper_count": {"type": "integer"},
+        "host_paper_count": {"type": "integer"},
+
+        # --- Standardized physical properties (app/derived.py), kNN for find_similar_planets ---
+        # l2_norm: standardized features aren't directions, and imputed rows may be near zero
+        PROPERTY_VECTOR_FIELD: {"type": "dense_vector", "dims": PROPERTY_VECTOR_DIMS, "index": True, "similarity": "l2_norm"},
+    }
+}
+
+
+def _vector_field(dims: int, indexed: bool = True) -> dict:
+    if not indexed: # stored for rescoring and exports, no HNSW graph
+        return {"type": "dense_vector", "dims": dims, "index": False}
+    field = {"type": "dense_vector", "dims": dims, "index": True, "similarity": "cosine"}
+    if VECTOR_INDEX_TYPE:
+        field["index_options"] = {"type": VECTOR_INDEX_TYPE}
+    return field
+
+
+PAPERS_MAPPING = {
+    "properties": {
+        # --- arXiv Fields ---
+        "arxiv_id": {"type": "keyword"},
+        "title": {"type": "text", "analyzer": "standard"},
+        "abstract": {"type": "text", "analyzer": "standard"},
+        "published_date": {"type": "date"},
+        "versions": {"type": "keyword"}, # Every arXiv id collapsed into this doc (app/dedup.py)
+
+        # --- Planet <-> paper links (scripts/link_planets_papers.py) ---
+        "mentioned_planets": {"type": "keyword"},
+        "mentioned_hosts": {"type": "keyword"},
+
+        # --- Vectors ---
+        # With two-stage search only the truncated Matryoshka field gets an HNSW graph
+        FULL_VECTOR_FIELD: _vector_field(EMBEDDING_DIM, indexed=not (TWO_STAGE_SEARCH and SMALL_VECTOR_DIMS)),
+    }
+}
+if SMALL_VECTOR_DIMS:
+    PAPERS_MAPPING["properties"][SMALL_VECTOR_FIELD] = _vector_field(SMALL_VECTOR_DIMS)
@@ -0,0 +1,44 @@
+import numpy as np
+
+# --- Two-Stage (Matryoshka) Retrieval ---
+# gemini-embedding-001 is trained Matryoshka-style: the first N dimensions of an
+# embedding, re-normalized, are themselves a good N-dim embedding. Papers carry a second
+# vector field with that prefix, taken from the same embedding call at ingest. Search
+# runs the cheap HNSW kNN on the small field with a large candidate pool, then rescores
+# the candidates exactly against the full 768-dim vector (a script_score over the kNN
+# query), so most of the recall lost to truncation comes back.
+# Used by tools.py and by the ingest/eval scripts (as `app.matryoshka`), so numpy only.
+
+FULL_VECTOR_FIELD = "abstract_vector"
+SMALL_VECTOR_FIELD = "abstract_vector_small"
+
+
+def truncate_embedding(vector, dims: int) -> list[float]:
+    """The first `dims` values of `vector`, scaled back to unit length."""
+    prefix = np.asarray(vector, dtype=np.float32)[:dims]
+    norm = float(np.linalg.norm(prefix))
+    return (prefix / norm if norm > 0 else prefix).tolist()
+
+
+def two_stage_query(query_vector, dims: int, candidates: int, num_candidates: int, knn_filter: dict | None = None) -> dict:
+    """
+    Query clause: kNN for `candidates` hits on the small field (`num_candidates` explored per
+    shard), rescored with the full vector. Scores stay on the kNN scale, (1 + cosine) / 2.
+    """
+    knn = {
+        "field": SMALL_VECTOR_FIELD,
+        "query_vector": truncate_embedding(query_vector, dims),
+        "k": candidates,
+        "num_candidates": max(candidates, num_candidates),
+    }
+    if knn_filter:
+        knn["filter"] = knn_filter
+    return {
+        "script_score": {
+            "query": {"knn": knn},
+            "script": {
+                "source": f"(cosineSimilarity(params.query_vector, '{FULL_VECTOR_FIELD}') + 1.0) / 2.0",
+                "params": {"query_vector": [float(value) for value in query_vector]},
+            },
+        }
+    }
@@ -0,0 +1,159 @@
+import bisect
+import contextlib
+import contextvars
+import logging
+import re
+import time
+from collections import defaultdict
+
+# --- Latency Instrumentation & Metrics ---
+# Named spans ("embedding", "es_search", "gemini_turn", "plot", ...) are timed into
+# per-stage histograms and, when a request has started timing, into that request's
+# span list (rendered as a Server-Timing header). Counters cover requests, tool calls
+# and errors. /metrics renders all of it - plus the stats() of the caches, limiters
+# and routers registered as collectors - in Prometheus text format. No client library:
+# a handful of counters and fixed-bucket histograms is all we need.
+
+METRIC_PREFIX = "kepler"
+# Seconds. Gemini turns take seconds, embeddings/ES searches tens of milliseconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_request_spans: contextvars.ContextVar["list | None"] = contextvars.ContextVar("request_spans", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.counters: dict[tuple[str, tuple], float] = defaultdict(float)
+        self.histograms: dict[tuple[str, tuple], Histogram] = {}
+        self._collectors: dict[str, callable] = {}
+
+    def inc(self, name: str, amount: float = 1.0, **labels):
+        self.counters[(name, tuple(sorted(labels.items())))] += amount
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def register_collector(self, component: str, stats_fn):
+        """stats_fn() -> dict; its numeric values are exported as gauges kepler_<component>_<key>."""
+        self._collectors[component] = stats_fn
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for name in sorted({name for name, _ in self.counters}):
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} counter")
+            for (metric, labels), value in sorted(self.counters.items()):
+                if metric == name:
+                    lines.append(f"{METRIC_PREFIX}_{name}{_labels(labels)} {_number(value)}")
+        for name in sorted({name for name, _ in self.histograms}):
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} histogram")
+            for (metric, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for upper, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f"{METRIC_PREFIX}_{name}_bucket{_labels(labels + (('le', upper),))} {cumulative}")
+                lines.append(f"{METRIC_PREFIX}_{name}_sum{_labels(labels)} {_number(histogram.total)}")
+                lines.append(f"{METRIC_PREFIX}_{name}_count{_labels(labels)} {histogram.count}")
+        for component, stats_fn in sorted(self._collectors.items()):
+            try:
+                stats = stats_fn()
+            except Exception as e:
+                logging.getLogger(__name__).warning("Metrics collector %s failed: %s", component, e)
+                continue
+            for key, value in sorted(_flatten(stats).items()):
+                name = f"{METRIC_PREFIX}_{component}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{key}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in labels
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+def _flatten(stats: dict, prefix: str = "") -> dict:
+    """Numeric leaves only ({"a": {"b": 1}} -> {"a_b": 1}); strings and None are skipped."""
+    flat = {}
+    for key, value in stats.items():
+        raw = f"{prefix}{key}".replace("<=", "le_").replace(">", "gt_")
+        name = re.sub(r"[^a-zA-Z0-9]+", "_", raw).strip("_")
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + "_"))
+        elif isinstance(value, bool):
+            flat[name] = int(value)
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+registry = MetricsRegistry()
+
+
+# --- Spans ---
+def record_span(stage: str, seconds: float):
+    registry.observe("stage_seconds", seconds, stage=stage)
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append((stage, seconds))
+
+
+@contextlib.contextmanager
+def span(stage: str):
+    """Times the enclosed block as `stage` (exceptions are timed too)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(stage, time.perf_counter() - started)
+
+
+def start_request_timing() -> contextvars.Token:
+    """Starts collecting spans for the current request (child tasks share the list)."""
+    return _request_spans.set([])
+
+
+def stop_request_timing(token: contextvars.Token) -> list[tuple[str, float]]:
+    spans = _request_spans.get() or []
+    try:
+        _request_spans.reset(token)
+    except ValueError: # token from another context, e.g. a streaming generator closed elsewhere
+        _request_spans.set(None)
+    return spans
+
+
+def server_timing_header(spans: list[tuple[str, float]]) -> str:
+    """'embedding;dur=41.2, gemini_turn;dur=2210.7, ...' - repeated stages are summed."""
+    totals: dict[str, float] = {}
+    for stage, seconds in spans:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in totals.items())
@@ -0,0 +1,184 @@
+import bisect
+import re
+import time
+from collections import Counter
+from .linker import normalize_name
+
+# --- Planet / Host-Star Name Resolver ---
+# The model (and users) write "Trappist 1e", "TRAPPIST-1e" or "trapist-1 e" for the
+# catalog's "TRAPPIST-1 e"; keyword/term queries miss all of those. Every pl_name,
+# hostname and host SIMBAD id is loaded once at startup (the same catalog scan as the
+# fast-path router) and normalized like the paper linker does (case-folded, alphanumerics
+# only). Lookups are then:
+#   exact:  one dict lookup on the normalized form;
+#   fuzzy:  trigram postings -> a few candidates ranked by Dice similarity (typos);
+#           only in the alphabetic part: digits and the planet letter must match exactly,
+#           since "Kepler-23 b" or "TRAPPIST-1 i" are other (or no) objects, not typos;
+#   prefix: bisect into the sorted normalized names (GET /autocomplete).
+# SIMBAD ids resolve to the catalog hostname, which is what the indices store.
+
+FUZZY_MIN_SIMILARITY = 0.6 # Dice coefficient of the trigram sets
+FUZZY_CANDIDATES = 32 # Most-overlapping names scored per fuzzy lookup
+PREFIX_SCAN_LIMIT = 200 # Normalized names read per prefix lookup before ranking
+KINDS = ("planet", "host")
+_DIGIT_RUN = re.compile(r"\d+")
+_PLANET_LETTER = re.compile(r"(?:^|[^a-z])([a-z])$") # "e" in "trappist-1 e" / "trappist-1e"
+_TRAILING_PUNCTUATION = re.compile(r"[^a-z0-9]+$")
+_TOKEN = re.compile(r"[^\W_]+") # same characters normalize_name keeps
+MAX_NAME_TOKENS = 6 # longest name (in tokens) find_names looks for
+
+
+def trigrams(key: str) -> set[str]:
+    padded = f"^{key}$" # start/end markers, so short names still have trigrams
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def identifying_parts(name: str) -> tuple[tuple[str, ...], str]:
+    """(digit runs, trailing planet letter or ""): ("1",), "e" for "TRAPPIST-1 e"."""
+    text = _TRAILING_PUNCTUATION.sub("", str(name).lower())
+    letter = _PLANET_LETTER.search(text)
+    return tuple(_DIGIT_RUN.findall(text)), letter.group(1) if letter else ""
+
+
+class NameResolver:
+    def __init__(self):
+        self._exact: dict[str, list[tuple[str, str]]] = {} # normalized -> [(kind, canonical name)]
+        self._keys: list[str] = [] # sorted normalized names
+        self._postings: dict[str, list[int]] = {} # trigram -> positions in _keys
+        self._parts: dict[str, tuple] = {} # normalized -> identifying_parts() of the name it came from
+        self.loaded_at = None
+        self.exact_matches = 0
+        self.fuzzy_matches = 0
+        self.misses = 0
+
+    # --- Catalog ---
+    def load_rows(self, rows):
+        """Builds the index from planet rows (pl_name, hostname, star_simbad_main_id)."""
+        exact: dict[str, list[tuple[str, str]]] = {}
+        parts: dict[str, tuple] = {}
+
+        def add(name, kind: str, canonical: str):
+            key = normalize_name(name) if name else ""
+            if key and (kind, canonical) not in exact.setdefault(key, []):
+                exact[key].append((kind, canonical))
+                parts.setdefault(key, identifying_parts(name))
+
+        for row in rows:
+            planet, host = row.get("pl_name"), row.get("hostname")
+            if planet:
+                add(planet, "planet", planet)
+            if host:
+                add(host, "host", host)
+                add(row.get("star_simbad_main_id"), "host", host)
+        keys = sorted(exact)
+        postings: dict[str, list[int]] = {}
+        for position, key in enumerate(keys):
+            for gram in trigrams(key):
+                postings.setdefault(gram, []).append(position)
+        # Swapped in at once: concurrent lookups never see a half-built index
+        self._exact, self._keys, self._postings, self._parts = exact, keys, postings, parts
+        self.loaded_at = time.time()
+
+    def _entries(self, key: str, kind: str | None) -> list[tuple[str, str]]:
+        return [entry for entry in self._exact.get(key, ()) if kind is None or entry[0] == kind]
+
+    # --- Lookups ---
+    def match(self, name: str | None, kind: str | None = None) -> dict | None:
+        """{"name", "kind", "score"} of the best catalog name for `name` (score 1.0: exact), or None."""
+        key = normalize_name(name) if name else ""
+        if not key:
+            return None
+        exact = self._entries(key, kind)
+        if exact:
+            self.exact_matches += 1
+            return {"name": exact[0][1], "kind": exact[0][0], "score": 1.0}
+        if key in self._exact: # an exact name of the other kind ("TRAPPIST-1" as a planet) isn't a typo
+            self.misses += 1
+            return None
+        grams = trigrams(key)
+        parts = identifying_parts(name)
+        # Candidates come from the rarer half of the trigrams ("kep" is in every Kepler name),
+        # then each is scored on all of them
+        selective = sorted(grams, key=lambda gram: len(self._postings.get(gram, ())))[:max(3, len(grams) // 2)]
+        shared = Counter()
+        for gram in selective:
+            shared.update(self._postings.get(gram, ()))
+        best = None
+        for position, _ in shared.most_common(FUZZY_CANDIDATES):
+            candidate = self._keys[position]
+            if self._parts[candidate] != parts:
+                continue # "Kepler-23 b" is not a typo of "Kepler-22 b"
+            entries = self._entries(candidate, kind)
+            candidate_grams = trigrams(candidate)
+            score = 2 * len(grams & candidate_grams) / (len(grams) + len(candidate_grams))
+            if entries and score >= FUZZY_MIN_SIMILARITY and (best is None or score > best[0]):
+                best = (score, entries[0])
+        if best is None:
+            self.misses += 1
+            return None
+        self.fuzzy_matches += 1
+        return {"name": best[1][1], "kind": best[1][0], "score": round(best[0], 3)}
+
+    def resolve(self, name: str | None, kind: str | None = None) -> str | None:
+        """Canonical catalog name for `name`, or None if nothing is close enough."""
+        match = self.match(name, kind)
+        return match["name"] if match else None
+
+    def find_entries(self, text: str) -> list[tuple[str, str]]:
+        """
+        Distinct (kind, canonical name) written (exactly, up to normalization) in free text, e.g.
+        a prompt. Left to right, longest n-gram first, so "TRAPPIST-1 e" is not also the host "TRAPPIST-1".
+        """
+        tokens = _TOKEN.findall(str(text).casefold())
+        found, start = [], 0
+        while start < len(tokens):
+            for size in range(min(MAX_NAME_TOKENS, len(tokens) - start), 0, -1):
+                entries = self._exact.get("".join(tokens[start:start + size]))
+                if entries:
+                    found.extend(entry for entry in entries if entry not in found)
+                    start += size
+                    break
+            else:
+                start += 1
+        return found
+
+    def find_names(self, text: str) -> list[str]:
+        """Canonical names written in free text (see find_entries)."""
+        names = []
+        for _, name in self.find_entries(text):
+            if name not in names:
+                names.append(name)
+        return names
+
+    def complete(self, prefix: str, limit: int = 10, kind: str | None = None) -> list[dict]:
+        """Up to `limit` {"name", "kind"} starting with `prefix` (shortest first), else its fuzzy match."""
+        key = normalize_name(prefix) if prefix else ""
+        if not key or limit <= 0:
+            return []
+        start = bisect.bisect_left(self._keys, key)
+        found = []
+        for position in range(start, min(start + PREFIX_SCAN_LIMIT, len(self._keys))):
+            if not self._keys[position].startswith(key):
+                break
+            found.append(self._keys[position])
+        found.sort(key=lambda candidate: (len(candidate), candidate))
+        suggestions, seen = [], set()
+        for candidate in found:
+            for entry in self._entries(candidate, kind):
+                if entry not in seen:
+                    seen.add(entry)
+                    suggestions.append({"name": entry[1], "kind": entry[0]})
+        if not suggestions: # a typo in what was typed so far
+            match = self.match(prefix, kind)
+            if match:
+                suggestions.append({"name": match["name"], "kind": match["kind"]})
+        return suggestions[:limit]
+
+    def stats(self) -> dict:
+        return {
+            "names": len(self._keys),
+            "exact_matches": self.exact_matches,
+            "fuzzy_matches": self.fuzzy_matches,
+            "misses": self.misses,
+            "loaded_at": self.loaded_at,
+        }
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import re
+
+# --- Speculative Retrieval Prefetch ---
+# Most agent turns go: Gemini turn 1 -> search_elastic(text_query ~= the prompt) ->
+# embed -> kNN -> Gemini turn 2. Turn 1 alone takes seconds, so we start embedding
+# the raw prompt and running the kNN search *while* Gemini is still thinking. If the
+# model then asks for a search whose query is close enough to the prompt (and has no
+# keyword filter), the tool is answered from the prefetched hits. Otherwise the
+# prefetch is cancelled when the conversation ends.
+
+STOPWORDS = {
+    "a", "an", "the", "of", "on", "in", "for", "to", "and", "or", "is", "are", "was", "were",
+    "what", "which", "who", "how", "do", "does", "did", "about", "me", "tell", "find", "show",
+    "any", "there", "with", "can", "you", "please", "i", "we", "it", "its", "by", "from",
+}
+
+logger = logging.getLogger(__name__)
+
+# Process-wide speculation counters.
+prefetch_stats = {"started": 0, "used": 0, "mismatched": 0, "cancelled": 0, "failed": 0}
+
+
+def content_words(text: str | None) -> set[str]:
+    return {word for word in re.findall(r"[a-z0-9]+", (text or "").lower()) if word not in STOPWORDS}
+
+
+def query_similarity(a: str | None, b: str | None) -> float:
+    """Jaccard overlap of content words (1.0 = same words, order and filler ignored)."""
+    words_a, words_b = content_words(a), content_words(b)
+    if not words_a or not words_b:
+        return 0.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+class SpeculativePrefetch:
+    def __init__(self, prompt: str, threshold: float):
+        self.prompt = prompt
+        self.threshold = threshold
+        self._task: asyncio.Task | None = None
+        self._used = False
+
+    def start(self, search_coro_factory):
+        """search_coro_factory(prompt) -> awaitable of a search_elastic_hits-style result."""
+        self._task = asyncio.ensure_future(search_coro_factory(self.prompt))
+        prefetch_stats["started"] += 1
+
+    def matches(self, text_query: str | None, keyword_filter_field: str | None = None,
+                keyword_filter_value: str | None = None) -> bool:
+        if self._task is None or keyword_filter_field or keyword_filter_value:
+            return False
+        return query_similarity(self.prompt, text_query) >= self.threshold
+
+    async def take(self, text_query: str | None, keyword_filter_field: str | None = None,
+                   keyword_filter_value: str | None = None) -> dict | None:
+        """Prefetched result if it can stand in for this search, else None."""
+        if not self.matches(text_query, keyword_filter_field, keyword_filter_value):
+            if self._task is not None:
+                prefetch_stats["mismatched"] += 1
+            return None
+        try:
+            result = await asyncio.shield(self._task)
+        except asyncio.CancelledError:
+            if not self._task.cancelled():
+                raise # this tool call itself is being cancelled
+            logger.warning("Speculative prefetch was cancelled, searching normally.")
+            prefetch_stats["failed"] += 1
+            return None
+        except Exception:
+            logger.warning("Speculative prefetch failed, searching normally.", exc_info=True)
+            prefetch_stats["failed"] += 1
+            return None
+        if "error" in result:
+            prefetch_stats["failed"] += 1
+            return None
+        self._used = True
+        prefetch_stats["used"] += 1
+        return result
+
+    def cancel(self):
+        """Drops an unused prefetch (called when the conversation is over)."""
+        if self._task is None or self._used:
+            return
+        if not self._task.done():
+            self._task.cancel()
+            prefetch_stats["cancelled"] += 1
+        elif not self._task.cancelled():
+            self._task.exception() # retrieve, so a failed unused prefetch isn't logged as unhandled
+
+
+def prefetch_report() -> dict:
+    started = prefetch_stats["started"]
+    return {**prefetch_stats, "hit_rate": (prefetch_stats["used"] / started) if started else 0.0}
@@ -0,0 +1,196 @@
+import re
+import time
+from elasticsearch import AsyncElasticsearch
+from elasticsearch import helpers
+from src.app.names import NameResolver
+
+# --- Fast-Path Router ---
+# "What is the mass of TRAPPIST-1 e?" does not need two gemini-2.5-pro turns: it is a
+# single cell of the planet table. The router keeps an in-memory catalog of every
+# planet row (name, host and the properties below), finds the names in a prompt with the
+# shared NameResolver (same spellings as the tools accept), and when it names one
+# planet/star plus known properties, answers from a template in microseconds.
+# Anything else (comparisons, papers, "why" questions, unknown names, missing values)
+# falls through to the agent.
+
+# field -> (label used in the answer, unit)
+PROPERTY_FIELDS = {
+    "pl_masse": ("mass", "Earth masses"),
+    "pl_rade": ("radius", "Earth radii"),
+    "pl_orbper": ("orbital period", "days"),
+    "sy_dist": ("distance from Earth", "parsecs"),
+    "pl_dens": ("bulk density", "g/cm³"),
+    "pl_grav": ("surface gravity", "m/s²"),
+    "pl_orbsmax": ("semi-major axis", "AU"),
+    "pl_insol": ("insolation", "times Earth's"),
+    "pl_eqt": ("equilibrium temperature", "K"),
+    "disc_year": ("discovery year", ""),
+    "discoverymethod": ("discovery method", ""),
+    "hostname": ("host star", ""),
+    "star_fe_h": ("host star metallicity [Fe/H]", "dex"),
+    "star_sp_type": ("host star spectral type", ""),
+}
+
+# Phrases users actually type (regular expressions) -> field. Longer patterns are tried first.
+PROPERTY_VOCABULARY = {
+    "orbital period": "pl_orbper", "orbit period": "pl_orbper", "period": "pl_orbper",
+    "how long is a year": "pl_orbper", "year length": "pl_orbper",
+    "mass": "pl_masse", "how heavy": "pl_masse", "weigh": "pl_masse",
+    "radius": "pl_rade", "size": "pl_rade", "how big": "pl_rade", "how large": "pl_rade",
+    "distance": "sy_dist", "how far": "sy_dist",
+    "density": "pl_dens", "how dense": "pl_dens", "gravity": "pl_grav",
+    "semi-major axis": "pl_orbsmax", "semi major axis": "pl_orbsmax",
+    "insolation": "pl_insol", "stellar flux": "pl_insol", "equilibrium temperature": "pl_eqt",
+    "discovery year": "disc_year", "year of discovery": "disc_year", r"when was .+ (discovered|found)": "disc_year",
+    "discovery method": "discoverymethod", "detection method": "discoverymethod",
+    r"how was .+ (discovered|detected|found)": "discoverymethod",
+    "host star": "hostname", "orbits which star": "hostname", "parent star": "hostname",
+    "metallicity": "star_fe_h", "spectral type": "star_sp_type", "spectral class": "star_sp_type",
+}
+# Phrases that could mean more than one field; "distance" alone would pick sy_dist.
+AMBIGUOUS_PHRASES = [r"orbital distance", r"distance from (?:the |its )?(?:host |parent )?star"]
+# Raw field names are accepted too ("pl_orbper of 11 Com b").
+PROPERTY_VOCABULARY.update({field: field for field in PROPERTY_FIELDS})
+
+# Star-level fields can be answered for a host star name alone.
+STAR_FIELDS = {"sy_dist", "star_fe_h", "star_sp_type"}
+# Everything else describes the planet: "radius of the host star of X" must not get X's radius.
+PLANET_FIELDS = set(PROPERTY_FIELDS) - STAR_FIELDS - {"hostname"}
+STAR_QUALIFIER_WORDS = {"star", "stars"}
+# Units no template answer is given in ("mass in Jupiter masses", "distance in light years").
+FOREIGN_UNIT_WORDS = {
+    "jupiter", "jupiters", "neptune", "neptunes", "solar", "sun", "suns",
+    "km", "kilometer", "kilometers", "kilometre", "kilometres", "mile", "miles", "meter", "meters", "metre",
+    "metres", "kg", "kilogram", "kilograms", "ton", "tons", "tonnes", "pounds", "lbs",
+    "kelvin", "celsius", "fahrenheit", "light", "lightyears", "ly", "hours", "weeks", "months", "years",
+}
+
+# Words that signal the user wants more than a lookup.
+AGENT_ONLY_WORDS = {
+    "compare", "comparison", "plot", "chart", "graph", "why", "explain", "paper", "papers",
+    "research", "study", "studies", "similar", "like", "habitable", "atmosphere", "versus", "vs",
+}
+MAX_FAST_PATH_WORDS = 20
+
+
+def _tokens(text: str) -> list[str]:
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+async def scan_catalog(es_client: AsyncElasticsearch, index: str) -> list[dict]:
+    """Every planet row with its name, host ids and PROPERTY_FIELDS (also feeds the name resolver)."""
+    rows = []
+    async for hit in helpers.async_scan(
+        es_client,
+        index=index,
+        query={"query": {"exists": {"field": "pl_name"}}},
+        _source=["pl_name", "star_simbad_main_id", *PROPERTY_FIELDS],
+        size=1000,
+    ):
+        rows.append(hit.get("_source", {}))
+    return rows
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return str(value)
+
+
+class FastPathRouter:
+    def __init__(self, resolver: NameResolver):
+        self.resolver = resolver # loaded separately, from the same catalog scan
+        self._planets: dict[str, dict] = {}  # pl_name -> planet row
+        self._hosts: dict[str, dict] = {}    # hostname -> first planet row of that host
+        self.loaded_at = None
+        self.served = 0
+        self.fell_through = 0
+
+    # --- Catalog ---
+    def load_rows(self, rows):
+        planets, hosts = {}, {}
+        for row in rows:
+            name = row.get("pl_name")
+            if not name:
+                continue
+            planets[name] = row
+            host = row.get("hostname")
+            if host:
+                hosts.setdefault(host, row)
+        self._planets, self._hosts = planets, hosts
+        self.loaded_at = time.time()
+
+    # --- Routing ---
+    def _find_names(self, prompt: str) -> list[tuple[dict, bool]]:
+        """Every distinct planet/host-star name in the prompt, as (row, is_planet)."""
+        names = []
+        for kind, name in self.resolver.find_entries(prompt):
+            row = self._planets.get(name) if kind == "planet" else self._hosts.get(name)
+            if row is not None:
+                names.append((row, kind == "planet"))
+        return names
+
+    @staticmethod
+    def _find_fields(normalized: str) -> list[str]:
+        fields = []
+        for pattern in sorted(PROPERTY_VOCABULARY, key=len, reverse=True):
+            regex = rf"\b(?:{pattern})\b"
+            if re.search(regex, normalized):
+                field = PROPERTY_VOCABULARY[pattern]
+                if field not in fields:
+                    fields.append(field)
+                normalized = re.sub(regex, " ", normalized)
+        return fields
+
+    def route(self, prompt: str) -> dict | None:
+        """Returns {"text": ...} when the prompt can be answered from the catalog, else None."""
+        answer = self._answer(prompt)
+        if answer is None:
+            self.fell_through += 1
+        else:
+            self.served += 1
+        return answer
+
+    def _answer(self, prompt: str) -> dict | None:
+        if not self._planets:
+            return None
+        tokens = _tokens(prompt)
+        if not tokens or len(tokens) > MAX_FAST_PATH_WORDS or AGENT_ONLY_WORDS.intersection(tokens):
+            return None
+        if FOREIGN_UNIT_WORDS.intersection(tokens):
+            return None # the templates only answer in catalog units
+        names = self._find_names(prompt)
+        if len(names) != 1:
+            return None # no name, or several ("mass of TRAPPIST-1 e and TRAPPIST-1 f")
+        row, is_planet = names[0]
+        normalized = " ".join(prompt.lower().split())
+        if any(re.search(rf"\b{phrase}\b", normalized) for phrase in AMBIGUOUS_PHRASES):
+            return None
+        fields = self._find_fields(normalized)
+        if not fields:
+            return None
+        if PLANET_FIELDS.intersection(fields) and STAR_QUALIFIER_WORDS.intersection(tokens):
+            return None # "radius of the host star of TRAPPIST-1 e" asks about the star
+        if not is_planet and not set(fields) <= STAR_FIELDS:
+            return None # "mass of TRAPPIST-1" is ambiguous (which planet?) - let the agent handle it
+
+        subject = row["pl_name"] if is_planet else row.get("hostname")
+        sentences = []
+        for field in fields:
+            value = row.get(field)
+            if value is None or value == "":
+                return None # Unknown in the catalog; the agent may still find it in papers
+            label, unit = PROPERTY_FIELDS[field]
+            label = label.replace("host star ", "") if not is_planet else label
+            value_text = f"{_format_value(value)} {unit}".strip()
+            sentences.append(f"The {label} of {subject} is {value_text}.")
+        return {"text": " ".join(sentences) + " (Source: NASA Exoplanet Archive / SIMBAD catalog.)"}
+
+    def stats(self) -> dict:
+        return {
+            "planets": len(self._planets),
+            "hosts": len(self._hosts),
+            "served": self.served,
+            "fell_through": self.fell_through,
+            "loaded_at": self.loaded_at,
+        }
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from src.app.config import CHARS_PER_TOKEN
+
+# --- Conversation Sessions ---
+# Server-side chat history so follow-up questions keep their context.
+# History is stored as plain Content dicts ({"role": ..., "parts": [...]}, i.e.
+# vertexai Content.to_dict()), which keeps this module free of SDK imports and makes
+# the size of a session easy to measure.
+#
+# Every stored history is trimmed to a token budget, so the prompt we send Gemini
+# (and therefore latency) stays flat no matter how long a conversation gets:
+#   1. bulky tool responses from earlier exchanges are replaced by a short stub,
+#   2. then whole exchanges are dropped, oldest first (the latest one is kept),
+#   3. and if the latest alone is over budget, its long strings are cut (or it is dropped).
+
+TOOL_RESPONSE_STUB_CHARS = 200
+MIN_TRIMMED_CHARS = 16 # below this an exchange is dropped rather than cut further
+
+
+def estimate_tokens(content: dict) -> int:
+    return len(json.dumps(content, default=str)) // CHARS_PER_TOKEN + 1
+
+
+def _is_user_message(content: dict) -> bool:
+    """A user turn that starts a new exchange (as opposed to a function response sent back as 'user')."""
+    if content.get("role") != "user":
+        return False
+    return any("text" in part for part in content.get("parts", []))
+
+
+def split_exchanges(history: list[dict]) -> list[list[dict]]:
+    """Groups history into exchanges: user message, tool call/response turns, model answer."""
+    exchanges = []
+    for content in history:
+        if _is_user_message(content) or not exchanges:
+            exchanges.append([])
+        exchanges[-1].append(content)
+    return exchanges
+
+
+def _stub_tool_responses(content: dict) -> dict:
+    parts = []
+    for part in content.get("parts", []):
+        response = part.get("function_response")
+        if response is None:
+            parts.append(part)
+            continue
+        payload = json.dumps(response.get("response", {}), default=str)
+        if len(payload) <= TOOL_RESPONSE_STUB_CHARS:
+            parts.append(part)
+            continue
+        parts.append({"function_response": {
+            "name": response.get("name"),
+            "response": {"content": payload[:TOOL_RESPONSE_STUB_CHARS] + f"... [trimmed {len(payload)} chars]"},
+        }})
+    return {**content, "parts": parts}
+
+
+def trim_history(history: list[dict], token_budget: int, max_exchanges: int) -> list[dict]:
+    """Returns a copy of history that fits the token budget and exchange cap."""
+    exchanges = split_exchanges(history)
+    if not exchanges:
+        return []
+    exchanges = exchanges[-max_exchanges:]
+    # Older tool output is rarely needed verbatim once the model has answered from it.
+    exchanges = [[_stub_tool_responses(c) for c in ex] for ex in exchanges[:-1]] + [exchanges[-1]]
+
+    sizes = [sum(estimate_tokens(c) for c in ex) for ex in exchanges]
+    while len(exchanges) > 1 and sum(sizes) > token_budget:
+        exchanges.pop(0)
+        sizes.pop(0)
+    if sizes[-1] > token_budget:
+        # Even a single exchange must not pin unbounded tool output in memory...
+        exchanges[-1] = [_stub_tool_responses(c) for c in exchanges[-1]]
+        # ...nor a huge prompt or answer: cut its strings, and drop it if that still doesn't fit.
+        exchanges[-1] = _cap_exchange(exchanges[-1], token_budget)
+        if not exchanges[-1]:
+            return []
+    return [content for ex in exchanges for content in ex]
+
+
+def _truncate_strings(value, max_chars: int):
+    """Copy of a content value with every string longer than max_chars cut (text, call args, stubs)."""
+    if isinstance(value, str) and len(value) > max_chars:
+        return value[:max_chars] + f"... [trimmed {len(value) - max_chars} chars]"
+    if isinstance(value, dict):
+        return {key: _truncate_strings(item, max_chars) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_truncate_strings(item, max_chars) for item in value]
+    return value
+
+
+def _cap_exchange(exchange: list[dict], token_budget: int) -> list[dict]:
+    """Halves the longest allowed string until the exchange fits; [] if even short strings don't."""
+    max_chars = token_budget * CHARS_PER_TOKEN
+    capped = exchange
+    while sum(estimate_tokens(content) for content in capped) > token_budget:
+        max_chars //= 2
+        if max_chars < MIN_TRIMMED_CHARS:
+            return []
+        capped = _truncate_strings(exchange, max_chars)
+    return capped
+
+
+class Session:
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.history: list[dict] = []
+        self.updated_at = time.time()
+        # Serializes turns of the same conversation so concurrent requests don't overwrite each other.
+        self.lock = asyncio.Lock()
+
+    def tokens(self) -> int:
+        return sum(estimate_tokens(c) for c in self.history)
+
+
+class SessionStore:
+    """LRU-bounded in-memory store of chat sessions."""
+
+    def __init__(self, max_sessions: int = 1000, token_budget: int = 8000, max_exchanges: int = 20):
+        self.max_sessions = max_sessions
+        self.token_budget = token_budget
+        self.max_exchanges = max_exchanges
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self.evictions = 0
+
+    def get(self, session_id: str) -> Session:
+        """Returns the session, creating it if needed, and marks it most recently used."""
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = Session(session_id)
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def save(self, session: Session, history: list[dict]):
+        session.history = trim_history(history, self.token_budget, self.max_exchanges)
+        session.updated_at = time.time()
+
+    def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "token_budget": self.token_budget,
+            "evictions": self.evictions,
+        }
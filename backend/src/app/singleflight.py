@@ -0,0 +1,68 @@
+import asyncio
+
+# --- Single-Flight Request Coalescing ---
+# When many users ask the same thing at the same moment, only the first caller
+# ("leader") actually runs the upstream work; everyone else with the same key awaits
+# the leader's in-flight task and gets the same result (or the same exception).
+#
+# Cancellation: a waiter that is cancelled only stops waiting. The shared task is
+# cancelled only when the *last* waiter goes away, so one impatient client can't
+# take the answer away from the others.
+
+
+def normalize_text(text: str | None) -> str:
+    """Case- and whitespace-insensitive form of a prompt/query, used to build coalescing keys."""
+    return " ".join((text or "").lower().split())
+
+
+class SingleFlight:
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._calls: dict = {}
+        self.executed = 0   # upstream calls actually made
+        self.coalesced = 0  # callers that piggybacked on an in-flight call
+
+    def _forget(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def _on_done(self, key, call, task: asyncio.Task):
+        self._forget(key, call)
+        if not task.cancelled():
+            task.exception()  # mark as retrieved, waiters already got it
+
+    async def do(self, key, coro_factory):
+        """
+        Runs coro_factory() once per key at a time and returns its result to every
+        concurrent caller with that key.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = {"task": asyncio.ensure_future(coro_factory()), "waiters": 0}
+            self._calls[key] = call
+            call["task"].add_done_callback(lambda task, k=key, c=call: self._on_done(k, c, task))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+
+        call["waiters"] += 1
+        try:
+            return await asyncio.shield(call["task"])
+        finally:
+            call["waiters"] -= 1
+            if call["waiters"] == 0 and not call["task"].done():
+                # Nobody is listening any more: stop the upstream work, and make sure a
+                # new caller with this key starts fresh instead of joining a dying task.
+                self._forget(key, call)
+                call["task"].cancel()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight(),
+        }
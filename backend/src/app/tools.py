@@ -1,22 +1,46 @@
 import asyncio
 # from app.elastic import es_client # <-- REMOVE THIS LINE
 from elasticsearch import AsyncElasticsearch # Keep this for type hinting
-from vertexai.language_models import TextEmbeddingModel
 import src.app.config as config
+from src.app.singleflight import SingleFlight, normalize_text
+from src.app.compaction import compact_hits
+from src.app.deadline import DeadlineExceeded, run_stage, stage_timeout
+from src.app.metrics import registry, span
+from src.app.elastic import breaker_open
+from src.app.vector_index import LocalVectorIndex
+from src.app.matryoshka import FULL_VECTOR_FIELD, SMALL_VECTOR_FIELD, two_stage_query
+from src.app.mappings import PLANETS_MAPPING, PROPERTY_VECTOR_FIELD
+from src.app.names import NameResolver
+from collections import OrderedDict
+import contextlib
+import contextvars
 import json
-import traceback
+import logging
 import os
+import time
 import uuid
-import matplotlib
-matplotlib.use('Agg') # Use non-interactive backend (IMPORTANT!)
-import matplotlib.pyplot as plt
-import pandas as pd
+# vertexai, matplotlib and pandas are imported on first use (see _initialize_embedding_model
+# and _pyplot): together they add seconds to every worker's import time.
 
 # --- Configuration (from config or define here) ---
-INDEX_NAME = "planets"
+PLANETS_INDEX = config.PLANETS_INDEX # planet + host-star rows: term/range queries, plots
+PAPERS_INDEX = config.PAPERS_INDEX # arXiv papers + embeddings: kNN
+ALL_INDICES = f"{PLANETS_INDEX},{PAPERS_INDEX}"
 EMBEDDING_MODEL_NAME = config.EMBEDDING_MODEL_NAME
 EXPECTED_EMBEDDING_DIM = 768
+MAX_FETCH_DOCUMENTS = 10
+SEARCH_RESULT_SIZE = 5
+SEARCH_SOURCE_FIELDS = ["pl_name", "hostname", "arxiv_id", "title", "abstract", "published_date", "mentioned_planets"]
+PLANET_SOURCE_FIELDS = ["pl_name", "hostname", "discoverymethod", "disc_year", "pl_orbper", "pl_masse", "pl_rade",
+                        "sy_dist", "pl_dens", "pl_eqt", "pl_insol", "pl_in_hz", "paper_count"]
+# Fields that only exist on papers; a keyword filter on any other field is about planets/hosts
+PAPER_FIELDS = {"arxiv_id", "title", "abstract", "published_date", "versions", "mentioned_planets", "mentioned_hosts"}
+# Planet/host filters also match the papers that mention them (scripts/link_planets_papers.py)
+LINKED_FILTER_FIELDS = {"pl_name": "mentioned_planets", "hostname": "mentioned_hosts"}
+RETRIEVAL_SKIPPED_MESSAGE = ("Retrieval skipped: search did not finish within the request time budget. "
+                             "Answer from general knowledge and say that no sources were checked.")
 STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
+logger = logging.getLogger(__name__)
 os.makedirs(STATIC_DIR, exist_ok=True)
 
 # --- Initialize Embedding Model (remains the same) ---
@@ -25,57 +49,652 @@ def _initialize_embedding_model():
     global _embedding_model
     if _embedding_model is not None: return True
     try:
-        _embedding_model = TextEmbeddingModel.from_pretrained(EMBEDDING_MODEL_NAME)
+        with span("embedding_model_init"):
+            from vertexai.language_models import TextEmbeddingModel
+            _embedding_model = TextEmbeddingModel.from_pretrained(EMBEDDING_MODEL_NAME)
         return True
     except Exception as e:
-        print(f"ERROR: Failed to load embedding model in tools.py: {e}")
+        logger.error("Failed to load embedding model in tools.py: %s", e)
         _embedding_model = None
         return False
 
-# --- Search Tool Function (remains the same) ---
+def warm_up() -> bool:
+    """Loads the embedding model ahead of the first request (called from the app lifespan)."""
+    return _initialize_embedding_model()
+
+def _pyplot():
+    import matplotlib
+    matplotlib.use('Agg') # Use non-interactive backend (IMPORTANT!)
+    import matplotlib.pyplot as plt
+    return plt
+
+# --- Query Embedding ---
+async def get_query_embedding(text: str) -> list[float]:
+    """Embeds one piece of text with the same model/dimension as the indexed abstracts. Raises on failure."""
+    if not _initialize_embedding_model():
+        raise RuntimeError("Embedding model not available.")
+    response = await run_stage(
+        "embedding",
+        _embedding_model.get_embeddings_async([text], output_dimensionality=EXPECTED_EMBEDDING_DIM),
+        config.EMBEDDING_TIMEOUT_SECONDS
+    )
+    return response[0].values
+
+async def get_query_embeddings(texts: list[str]) -> list[list[float]]:
+    """
+    Embeds many texts with as few provider calls as the model allows: chunks of
+    config.EMBEDDING_MAX_BATCH texts, sent concurrently. Raises on failure.
+    """
+    if not _initialize_embedding_model():
+        raise RuntimeError("Embedding model not available.")
+    batch = max(1, config.EMBEDDING_MAX_BATCH)
+    chunks = [texts[start:start + batch] for start in range(0, len(texts), batch)]
+    responses = await run_stage(
+        "embedding",
+        asyncio.gather(*(
+            _embedding_model.get_embeddings_async(chunk, output_dimensionality=EXPECTED_EMBEDDING_DIM)
+            for chunk in chunks
+        )),
+        config.EMBEDDING_TIMEOUT_SECONDS
+    )
+    return [embedding.values for response in responses for embedding in response]
+
+# --- Index Generation ---
+# Changes whenever documents are (re)indexed, so caches can tell stale answers apart.
+INDEX_GENERATION_TTL_SECONDS = 60
+_index_generation = {"value": None, "checked_at": 0.0}
+
+async def get_index_generation(es_client: AsyncElasticsearch) -> str | None:
+    """
+    Returns '<index uuid>:<docs>:<indexing ops>' for each of the planets and papers indices
+    (joined with '|'), refreshed at most once a minute.
+    """
+    now = time.monotonic()
+    if _index_generation["value"] is not None and now - _index_generation["checked_at"] < INDEX_GENERATION_TTL_SECONDS:
+        return _index_generation["value"]
+    try:
+        stats = await es_client.indices.stats(index=ALL_INDICES, metric="docs,indexing")
+        generations = []
+        for index_name in (PLANETS_INDEX, PAPERS_INDEX):
+            index_stats = stats["indices"][index_name]
+            primaries = index_stats["primaries"]
+            generations.append(
+                f"{index_stats.get('uuid', index_name)}:"
+                f"{primaries['docs']['count']}:{primaries['indexing']['index_total']}"
+            )
+        _index_generation["value"] = "|".join(generations)
+    except Exception as e:
+        logger.warning("Could not read index generation: %s", e)
+    _index_generation["checked_at"] = now
+    return _index_generation["value"]
+
+# --- Name Resolution (see names.py) ---
+# Planet/host names from the model are canonicalized before any term query on them.
+# Loaded from the planets catalog at startup (main._load_planet_catalog); until then
+# names pass through unchanged.
+# Fuzzy (typo) corrections are recorded for the running tool call, so the model is told
+# which name it actually got data for (see record_name_substitutions).
+name_resolver = NameResolver()
+RESOLVED_NAME_FIELDS = {"pl_name": "planet", "hostname": "host"}
+_name_substitutions: contextvars.ContextVar[list | None] = contextvars.ContextVar("name_substitutions", default=None)
+
+def canonical_name(field: str | None, value):
+    """The catalog spelling of `value` if `field` holds planet/host names and it resolves, else `value`."""
+    kind = RESOLVED_NAME_FIELDS.get((field or "").removesuffix(".keyword"))
+    if kind is None or not isinstance(value, str):
+        return value
+    match = name_resolver.match(value, kind)
+    if match is None:
+        return value
+    substitutions = _name_substitutions.get()
+    if match["score"] < 1.0 and substitutions is not None:
+        substitution = {"requested": value, "resolved": match["name"]}
+        if substitution not in substitutions:
+            substitutions.append(substitution)
+    return match["name"]
+
+@contextlib.contextmanager
+def record_name_substitutions():
+    """Collects the fuzzy name corrections canonical_name() makes inside the block."""
+    substitutions = []
+    token = _name_substitutions.set(substitutions)
+    try:
+        yield substitutions
+    finally:
+        _name_substitutions.reset(token)
+
+def with_substitution_note(response: str, substitutions: list[dict]) -> str:
+    """Prefixes a tool response with the names that were replaced by their closest catalog match."""
+    if not substitutions:
+        return response
+    replaced = "; ".join(f"'{s['requested']}' -> '{s['resolved']}'" for s in substitutions)
+    return f"Note: not in the catalog as written, matched to the closest catalog name: {replaced}.\n{response}"
+
+# --- Local Vector Index (see vector_index.py) ---
+# Answers the kNN part of search_elastic in-process: always with SEARCH_BACKEND=local,
+# otherwise (if LOCAL_INDEX_FALLBACK) while the ES circuit breaker is open.
+_local_index = {"index": None, "checked": False}
+ES_UNAVAILABLE_MESSAGE = "Elasticsearch is temporarily unavailable. Answer without retrieval and say so."
+
+def load_local_index() -> LocalVectorIndex | None:
+    """Opens the index at config.LOCAL_INDEX_PATH once; None if there is none."""
+    if not _local_index["checked"]:
+        _local_index["checked"] = True
+        if os.path.exists(os.path.join(config.LOCAL_INDEX_PATH, "manifest.json")):
+            try:
+                with span("local_index_load"):
+                    _local_index["index"] = LocalVectorIndex(config.LOCAL_INDEX_PATH)
+                logger.info("Local vector index loaded: %s", _local_index["index"].stats())
+            except Exception as e:
+                logger.error("Failed to load local vector index from %s: %s", config.LOCAL_INDEX_PATH, e)
+        elif config.SEARCH_BACKEND == "local":
+            logger.error("SEARCH_BACKEND=local but there is no index at %s.", config.LOCAL_INDEX_PATH)
+    return _local_index["index"]
+
+def local_index_stats() -> dict:
+    index = _local_index["index"]
+    return index.stats() if index is not None else {"documents": 0}
+
+def use_local_index(es_client: AsyncElasticsearch | None) -> bool:
+    if config.SEARCH_BACKEND == "local":
+        return True
+    return config.LOCAL_INDEX_FALLBACK and breaker_open(es_client) and load_local_index() is not None
+
+async def _run_local_search(query_vector: list[float], keyword_filter_field: str | None,
+                            keyword_filter_value: str | None) -> dict:
+    index = load_local_index()
+    if index is None:
+        return {"error": "Local vector index not available."}
+    hits = await run_stage(
+        "local_search",
+        asyncio.to_thread(
+            index.search, query_vector, SEARCH_RESULT_SIZE, nprobe=config.LOCAL_INDEX_NPROBE,
+            filter_fields=keyword_filter_fields(keyword_filter_field) if keyword_filter_field else None,
+            filter_value=keyword_filter_value, source_fields=SEARCH_SOURCE_FIELDS
+        ),
+        config.ES_SEARCH_TIMEOUT_SECONDS
+    )
+    registry.inc("local_searches_total")
+    return {"hits": hits}
+
+# --- Search Tool Function ---
+# Identical concurrent searches (same normalized query and filter) share one embedding + kNN call.
+_search_flight = SingleFlight("search_elastic")
+
+def search_flight_stats() -> dict:
+    return _search_flight.stats()
+
 async def search_elastic(
     es_client: AsyncElasticsearch, # Argument is correct
     text_query: str,
     keyword_filter_field: str | None = None,
-    keyword_filter_value: str | None = None
+    keyword_filter_value: str | None = None,
+    compact: bool = False
 ) -> str:
-    # ... (code from previous step, no changes) ...
-    print(f"\n--- Running Elastic Search Tool ---")
-    print(f"  Text Query: '{text_query}'")
-    print(f"  Keyword Filter: {keyword_filter_field} = '{keyword_filter_value}'")
+    """
+    Hybrid kNN (+ optional keyword filter) search over the index.
+    Returns a JSON list of {score, id, source}, or with compact=True the compact
+    table fed to Gemini (see compaction.py).
+    """
+    result = await search_elastic_hits(es_client, text_query, keyword_filter_field, keyword_filter_value)
+    return format_search_results(result, compact=compact)
+
+async def search_elastic_hits(
+    es_client: AsyncElasticsearch,
+    text_query: str,
+    keyword_filter_field: str | None = None,
+    keyword_filter_value: str | None = None
+) -> dict:
+    """Coalesced raw search: {"hits": [...]} or {"error": ...}."""
+    keyword_filter_value = canonical_name(keyword_filter_field, keyword_filter_value)
+    key = (normalize_text(text_query), keyword_filter_field, normalize_text(keyword_filter_value))
+    return await _search_flight.do(
+        key,
+        lambda: _run_search_elastic(es_client, text_query, keyword_filter_field, keyword_filter_value)
+    )
+
+def format_search_results(result: dict, compact: bool = False) -> str:
+    """Turns a search_elastic_hits result into the tool's string response."""
+    if "error" in result:
+        return json.dumps(result)
+    hits = result["hits"]
+    if compact:
+        table, stats = compact_hits(hits, abstract_chars=config.TOOL_ABSTRACT_CHARS)
+        logger.debug("Compacted tool response: %d -> %d tokens (saved %d, dropped %d duplicates).",
+                     stats["original_tokens"], stats["compact_tokens"], stats["tokens_saved"], stats["duplicates_dropped"])
+        return table
+    formatted_results = []
+    for hit in hits:
+         formatted_results.append({ "score": hit.get('_score'), "id": hit.get('_id'), "source": hit.get('_source') })
+    return json.dumps(formatted_results)
+
+async def _run_search_elastic(
+    es_client: AsyncElasticsearch,
+    text_query: str,
+    keyword_filter_field: str | None = None,
+    keyword_filter_value: str | None = None
+) -> dict:
+    """Embeds the query and runs the ES (or local index) search. Returns {"hits": [...]} or {"error": ...}."""
+    logger.debug("Running Elastic search tool: query=%r filter=%s=%r", text_query, keyword_filter_field, keyword_filter_value)
+    local = use_local_index(es_client)
+    if not local and breaker_open(es_client):
+        # Don't spend an embedding call on a search that would be rejected anyway
+        return {"error": ES_UNAVAILABLE_MESSAGE}
     if not _initialize_embedding_model():
-        return json.dumps({"error": "Embedding model not available."})
+        return {"error": "Embedding model not available."}
+    try:
+        query_vector = await get_query_embedding(text_query)
+    except DeadlineExceeded as e:
+        # Degrade gracefully: the model can still answer, just without retrieval.
+        logger.warning("%s Skipping retrieval.", e)
+        return {"error": RETRIEVAL_SKIPPED_MESSAGE}
+    except Exception as e:
+        registry.inc("errors_total", stage="embedding")
+        logger.error("Failed to get query embedding: %s", e)
+        return {"error": f"Failed to get embedding: {e}"}
+    if local:
+        try:
+            return await _run_local_search(query_vector, keyword_filter_field, keyword_filter_value)
+        except DeadlineExceeded as e:
+            logger.warning("%s Skipping retrieval.", e)
+            return {"error": RETRIEVAL_SKIPPED_MESSAGE}
+    searches = build_searches(query_vector, text_query, keyword_filter_field, keyword_filter_value)
     try:
-        query_vector_response = _embedding_model.get_embeddings(
-            [text_query], output_dimensionality=EXPECTED_EMBEDDING_DIM
+        timeout = stage_timeout(config.ES_SEARCH_TIMEOUT_SECONDS)
+        response = await run_stage(
+            "es_search",
+            es_client.options(request_timeout=timeout).msearch(searches=searches),
+            config.ES_SEARCH_TIMEOUT_SECONDS
         )
-        query_vector = query_vector_response[0].values
+        result = merge_search_responses(response.get("responses", []))
+        logger.debug("ES search over %d index(es) returned %d hits.", len(searches) // 2, len(result.get("hits", [])))
+        return result
+    except DeadlineExceeded as e:
+        logger.warning("%s Skipping retrieval.", e)
+        return {"error": RETRIEVAL_SKIPPED_MESSAGE}
     except Exception as e:
-        print(f"ERROR getting query embedding: {e}")
-        return json.dumps({"error": f"Failed to get embedding: {e}"})
+        registry.inc("errors_total", stage="es_search")
+        logger.exception("Elasticsearch search failed: %s", e)
+        return {"error": f"Elasticsearch query failed: {e}"}
+
+def build_search_payload(
+    query_vector: list[float],
+    text_query: str,
+    keyword_filter_field: str | None = None,
+    keyword_filter_value: str | None = None
+) -> dict:
+    """
+    The papers-index request body of search_elastic: kNN on abstract_vector (or, with TWO_STAGE_SEARCH, on the
+    small Matryoshka field rescored with the full vector), optionally OR'd with a keyword term.
+    """
     search_payload = {
-        "knn": { "field": "abstract_vector", "query_vector": query_vector, "k": 5, "num_candidates": 50 },
-        "_source": ["pl_name", "hostname", "arxiv_id", "title", "abstract", "published_date"]
+        "knn": { "field": "abstract_vector", "query_vector": query_vector, "k": config.KNN_K, "num_candidates": config.KNN_NUM_CANDIDATES },
+        "_source": SEARCH_SOURCE_FIELDS,
+        # Snippets around the query terms, used instead of full abstracts in compact tool responses
+        "highlight": {
+            "fields": {"abstract": {"fragment_size": 160, "number_of_fragments": 2}},
+            "highlight_query": {"match": {"abstract": text_query}},
+            "pre_tags": [""], "post_tags": [""]
+        }
     }
+    if config.TWO_STAGE_SEARCH and config.SMALL_VECTOR_DIMS:
+        del search_payload["knn"]
+        search_payload["size"] = config.KNN_K
+        search_payload["query"] = two_stage_query(
+            query_vector, config.SMALL_VECTOR_DIMS, config.TWO_STAGE_CANDIDATES, config.TWO_STAGE_NUM_CANDIDATES
+        )
     if keyword_filter_field and keyword_filter_value:
-        search_payload["query"] = {
-            "term": { keyword_filter_field: { "value": keyword_filter_value, "case_insensitive": True } }
-        }
-        print(f"  Applied keyword filter.")
+        term = keyword_filter_query(keyword_filter_field, keyword_filter_value)
+        search_payload["query"] = {"bool": {"should": [search_payload["query"], term]}} if "query" in search_payload else term
+    return search_payload
+
+def keyword_filter_fields(field: str) -> list[str]:
+    """The requested field, plus the papers' linked-mentions field for pl_name/hostname."""
+    linked_field = LINKED_FILTER_FIELDS.get(field.removesuffix(".keyword"))
+    return [field, linked_field] if linked_field else [field]
+
+def keyword_filter_query(field: str, value: str) -> dict:
+    """Case-insensitive term on `field` (and on its linked-mentions field, see keyword_filter_fields)."""
+    terms = [{ "term": { name: { "value": value, "case_insensitive": True } } } for name in keyword_filter_fields(field)]
+    return terms[0] if len(terms) == 1 else {"bool": {"should": terms}}
+
+# --- Multi-Index Facade ---
+# kNN always runs on the papers index. A keyword filter on a planet-side field (pl_name,
+# hostname, discoverymethod, ...) is a mixed question: the matching planet rows come from
+# the planets index in the same _msearch round trip and are merged in front of the papers.
+def is_planet_field(field: str) -> bool:
+    return field.removesuffix(".keyword") not in PAPER_FIELDS
+
+def build_planet_payload(keyword_filter_field: str, keyword_filter_value: str) -> dict:
+    # Planet fields are plain keywords (PLANETS_MAPPING): there is no ".keyword" subfield
+    field = keyword_filter_field.removesuffix(".keyword")
+    return {
+        "query": { "term": { field: { "value": keyword_filter_value, "case_insensitive": True } } },
+        "_source": PLANET_SOURCE_FIELDS,
+        "size": SEARCH_RESULT_SIZE
+    }
+
+def build_searches(
+    query_vector: list[float],
+    text_query: str,
+    keyword_filter_field: str | None = None,
+    keyword_filter_value: str | None = None
+) -> list[dict]:
+    """_msearch header/body pairs for one search: papers first, then planets for planet-side filters."""
+    searches = [{"index": PAPERS_INDEX}, build_search_payload(query_vector, text_query, keyword_filter_field, keyword_filter_value)]
+    if keyword_filter_field and keyword_filter_value and is_planet_field(keyword_filter_field):
+        searches += [{"index": PLANETS_INDEX}, build_planet_payload(keyword_filter_field, keyword_filter_value)]
+    return searches
+
+def merge_hits(paper_hits: list[dict], planet_hits: list[dict]) -> list[dict]:
+    """
+    Planet rows first, then papers, SEARCH_RESULT_SIZE in total. Term and kNN scores aren't
+    comparable, so planets get a fixed share: half the results, more if papers run short.
+    """
+    planet_quota = max(SEARCH_RESULT_SIZE // 2, SEARCH_RESULT_SIZE - len(paper_hits))
+    return (planet_hits[:planet_quota] + paper_hits)[:SEARCH_RESULT_SIZE]
+
+def merge_search_responses(items: list[dict]) -> dict:
+    """One search's _msearch items (see build_searches) as {"hits": [...]} or {"error": ...}."""
+    if not items:
+        return {"error": "Elasticsearch query failed: empty response"}
+    for item in items:
+        if "error" in item:
+            reason = item["error"].get("reason", item["error"]) if isinstance(item["error"], dict) else item["error"]
+            return {"error": f"Elasticsearch query failed: {reason}"}
+    paper_hits = items[0].get("hits", {}).get("hits", [])[:SEARCH_RESULT_SIZE]
+    planet_hits = items[1].get("hits", {}).get("hits", []) if len(items) > 1 else []
+    return {"hits": merge_hits(paper_hits, planet_hits)}
+
+# --- Batched Search (one embedding round + _msearch) ---
+async def search_elastic_batch(es_client: AsyncElasticsearch, queries: list[tuple]):
+    """
+    Runs many (text_query, keyword_filter_field, keyword_filter_value) searches.
+    All queries are embedded together, then sent as _msearch requests of
+    config.SEARCH_BATCH_MSEARCH_SIZE searches each (concurrently). Yields
+    (position, {"hits": [...]} or {"error": ...}) as each _msearch returns,
+    so the order of positions is not guaranteed.
+    """
+    queries = [(text_query, field, canonical_name(field, value)) for text_query, field, value in queries]
+    local = use_local_index(es_client)
+    if not local and breaker_open(es_client):
+        for position in range(len(queries)):
+            yield position, {"error": "Elasticsearch is temporarily unavailable."}
+        return
+    try:
+        vectors = await get_query_embeddings([text_query for text_query, _, _ in queries])
+    except Exception as e:
+        registry.inc("errors_total", stage="embedding")
+        logger.error("Failed to embed search batch: %s", e)
+        for position in range(len(queries)):
+            yield position, {"error": f"Failed to get embedding: {e}"}
+        return
+    if local:
+        for position, ((_, field, value), vector) in enumerate(zip(queries, vectors)):
+            try:
+                yield position, await _run_local_search(vector, field, value)
+            except DeadlineExceeded:
+                yield position, {"error": RETRIEVAL_SKIPPED_MESSAGE}
+        return
+
+    chunk_size = max(1, config.SEARCH_BATCH_MSEARCH_SIZE)
+    tasks = [
+        asyncio.ensure_future(_run_msearch(es_client, start, queries[start:start + chunk_size], vectors[start:start + chunk_size]))
+        for start in range(0, len(queries), chunk_size)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            for position, result in await next_done:
+                yield position, result
+    finally:
+        for task in tasks:
+            task.cancel() # consumer went away early
+
+async def _run_msearch(es_client: AsyncElasticsearch, start: int, queries: list[tuple], vectors: list) -> list[tuple]:
+    searches, item_counts = [], []
+    for (text_query, keyword_filter_field, keyword_filter_value), vector in zip(queries, vectors):
+        query_searches = build_searches(vector, text_query, keyword_filter_field, keyword_filter_value)
+        searches.extend(query_searches)
+        item_counts.append(len(query_searches) // 2)
+    try:
+        timeout = stage_timeout(config.ES_SEARCH_TIMEOUT_SECONDS)
+        response = await run_stage(
+            "es_msearch",
+            es_client.options(request_timeout=timeout).msearch(searches=searches),
+            config.ES_SEARCH_TIMEOUT_SECONDS
+        )
+    except Exception as e:
+        registry.inc("errors_total", stage="es_msearch")
+        logger.error("Elasticsearch msearch failed: %s", e)
+        return [(start + offset, {"error": f"Elasticsearch query failed: {e}"}) for offset in range(len(queries))]
+    items = response.get("responses", [])
+    results, cursor = [], 0
+    for offset, count in enumerate(item_counts):
+        results.append((start + offset, merge_search_responses(items[cursor:cursor + count])))
+        cursor += count
+    return results
+
+# --- Aggregation Tool Function ---
+# Counting/bucketing questions ("planets found by transit per year", "how many planets of
+# 1-1.5 Earth radii") answered by ES with size 0: the model gets a few buckets or stats
+# instead of paging through planet rows. Results are cached per index generation.
+AGGREGATIONS = ("count", "terms", "histogram", "stats")
+_planet_field_types = {field: spec["type"] for field, spec in PLANETS_MAPPING["properties"].items()}
+AGGREGATION_NUMERIC_FIELDS = sorted(f for f, t in _planet_field_types.items() if t in ("integer", "long", "float", "double"))
+AGGREGATION_KEYWORD_FIELDS = sorted(f for f, t in _planet_field_types.items() if t in ("keyword", "boolean"))
+DEFAULT_TERMS_SIZE = 10
+MAX_AGGREGATION_BUCKETS = 50
+_aggregation_cache: OrderedDict = OrderedDict() # (index generation, request) -> tool response
+_aggregation_flight = SingleFlight("aggregate_planets")
+
+def _aggregation_field(field: str | None, allowed: list[str]) -> str:
+    name = (field or "").removesuffix(".keyword")
+    if name not in allowed:
+        raise ValueError(f"Field '{field}' can't be used here. Allowed fields: {', '.join(allowed)}.")
+    return name
+
+def _planet_filter(spec: dict) -> dict:
+    bounds = {op: spec[op] for op in ("gte", "lte") if spec.get(op) is not None}
+    if bounds:
+        return {"range": {_aggregation_field(spec.get("field"), AGGREGATION_NUMERIC_FIELDS): bounds}}
+    field = _aggregation_field(spec.get("field"), AGGREGATION_NUMERIC_FIELDS + AGGREGATION_KEYWORD_FIELDS)
+    if spec.get("value") is None:
+        raise ValueError(f"Filter on '{field}' needs a 'value' or 'gte'/'lte' bounds.")
+    if _planet_field_types[field] == "keyword":
+        return {"term": {field: {"value": canonical_name(field, spec["value"]), "case_insensitive": True}}}
+    return {"term": {field: spec["value"]}}
+
+def build_aggregation_request(
+    aggregation: str = "count",
+    field: str | None = None,
+    filters: list[dict] | None = None,
+    interval: float | None = None,
+    size: int | None = None
+) -> dict:
+    """The size-0 planets search body for aggregate_planets. Raises ValueError on invalid arguments."""
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation '{aggregation}'. Use one of: {', '.join(AGGREGATIONS)}.")
+    clauses = [_planet_filter(spec) for spec in filters or []]
+    request = {"size": 0, "track_total_hits": True, "query": {"bool": {"filter": clauses}} if clauses else {"match_all": {}}}
+    if aggregation == "terms":
+        field = _aggregation_field(field, AGGREGATION_KEYWORD_FIELDS + AGGREGATION_NUMERIC_FIELDS)
+        buckets = min(int(size or DEFAULT_TERMS_SIZE), MAX_AGGREGATION_BUCKETS)
+        request["aggs"] = {"result": {"terms": {"field": field, "size": buckets}}}
+    elif aggregation == "histogram":
+        field = _aggregation_field(field, AGGREGATION_NUMERIC_FIELDS)
+        if interval is not None and float(interval) <= 0:
+            raise ValueError("Histogram interval must be positive.")
+        request["aggs"] = {"result": {"histogram": {"field": field, "interval": interval or 1, "min_doc_count": 1}}}
+    elif aggregation == "stats":
+        field = _aggregation_field(field, AGGREGATION_NUMERIC_FIELDS)
+        request["aggs"] = {"result": {"stats": {"field": field}}}
+    return request
+
+def _bucket_key(bucket: dict):
+    key = bucket.get("key_as_string", bucket.get("key")) # boolean terms: 1 -> "true"
+    return int(key) if isinstance(key, float) and key.is_integer() else key
+
+def format_aggregation(request: dict, response: dict) -> dict:
+    """Compact aggregate for the model: match count plus [key, count] buckets or rounded stats."""
+    result = {"matched": response.get("hits", {}).get("total", {}).get("value", 0)}
+    aggregation = (response.get("aggregations") or {}).get("result")
+    if aggregation is None:
+        return result
+    kind, spec = next(iter(request["aggs"]["result"].items()))
+    result["field"] = spec["field"]
+    if kind == "stats":
+        result["stats"] = {name: float(f"{value:.4g}") if isinstance(value, float) else value
+                           for name, value in aggregation.items() if name in ("count", "min", "max", "avg", "sum")}
+        return result
+    buckets = aggregation.get("buckets", [])
+    result["buckets"] = [[_bucket_key(bucket), bucket["doc_count"]] for bucket in buckets[:MAX_AGGREGATION_BUCKETS]]
+    if len(buckets) > MAX_AGGREGATION_BUCKETS:
+        result["truncated_buckets"] = len(buckets) - MAX_AGGREGATION_BUCKETS
+    if aggregation.get("sum_other_doc_count"):
+        result["other"] = aggregation["sum_other_doc_count"]
+    return result
+
+def aggregation_cache_stats() -> dict:
+    return {"entries": len(_aggregation_cache)}
+
+async def aggregate_planets(
+    es_client: AsyncElasticsearch,
+    aggregation: str = "count",
+    field: str | None = None,
+    filters: list[dict] | None = None,
+    interval: float | None = None,
+    size: int | None = None
+) -> str:
+    """Range/term-filtered count, terms, histogram or stats aggregation over the planets index (JSON)."""
+    logger.debug("Running aggregate tool: %s(%s) filters=%s", aggregation, field, filters)
     try:
-        print(f"  Executing ES search...")
-        response = await es_client.search( index=INDEX_NAME, **search_payload )
-        print(f"  ES search completed. Found {response['hits']['total']['value']} total potential hits.")
-        results = response.get('hits', {}).get('hits', [])
-        formatted_results = []
-        for hit in results[:5]:
-             formatted_results.append({ "score": hit.get('_score'), "id": hit.get('_id'), "source": hit.get('_source') })
-        print(f"--- Elastic Search Tool Finished (Returning {len(formatted_results)} results) ---")
-        return json.dumps(formatted_results)
+        request = build_aggregation_request(aggregation, field, filters, interval, size)
+    except (ValueError, TypeError) as e:
+        return json.dumps({"error": str(e)})
+    generation = await get_index_generation(es_client)
+    key = (generation, json.dumps(request, sort_keys=True, default=str))
+    if generation is not None and key in _aggregation_cache:
+        _aggregation_cache.move_to_end(key)
+        registry.inc("aggregation_cache_total", result="hit")
+        return _aggregation_cache[key]
+    registry.inc("aggregation_cache_total", result="miss")
+    return await _aggregation_flight.do(key, lambda: _run_aggregation(es_client, request, key))
+
+async def _run_aggregation(es_client: AsyncElasticsearch, request: dict, key: tuple) -> str:
+    try:
+        timeout = stage_timeout(config.ES_SEARCH_TIMEOUT_SECONDS)
+        response = await run_stage(
+            "es_aggregate",
+            es_client.options(request_timeout=timeout).search(index=PLANETS_INDEX, **request),
+            config.ES_SEARCH_TIMEOUT_SECONDS
+        )
+    except DeadlineExceeded as e:
+        logger.warning("%s Skipping aggregation.", e)
+        return json.dumps({"error": RETRIEVAL_SKIPPED_MESSAGE})
+    except Exception as e:
+        registry.inc("errors_total", stage="es_aggregate")
+        logger.exception("Elasticsearch aggregation failed: %s", e)
+        return json.dumps({"error": f"Elasticsearch aggregation failed: {e}"})
+    result = json.dumps(format_aggregation(request, response))
+    if key[0] is not None and config.AGGREGATION_CACHE_MAX_ENTRIES > 0:
+        _aggregation_cache[key] = result
+        while len(_aggregation_cache) > config.AGGREGATION_CACHE_MAX_ENTRIES:
+            _aggregation_cache.popitem(last=False)
+    return result
+
+# --- Similar Planets Tool Function ---
+# "Planets like X": kNN over the standardized property vectors built at ingest
+# (derived.property_vectors), starting from X's own stored vector. ~5k 10-dim vectors,
+# so an exact-enough HNSW search takes milliseconds.
+SIMILAR_PLANETS_DEFAULT_K = 5
+SIMILAR_PLANETS_MAX_K = 20
+
+async def find_similar_planets(
+    es_client: AsyncElasticsearch,
+    planet_name: str,
+    filters: list[dict] | None = None,
+    k: int | None = None
+) -> dict:
+    """Nearest planets to `planet_name` by physical properties: {"hits": [...]} or {"error": ...}."""
+    logger.debug("Running similar planets tool: planet=%r filters=%s", planet_name, filters)
+    if not planet_name:
+        return {"error": "No planet name provided."}
+    try:
+        clauses = [_planet_filter(spec) for spec in filters or []]
+    except (ValueError, TypeError) as e:
+        return {"error": str(e)}
+    k = max(1, min(int(k or SIMILAR_PLANETS_DEFAULT_K), SIMILAR_PLANETS_MAX_K))
+    planet_name = canonical_name("pl_name", planet_name)
+    try:
+        timeout = stage_timeout(config.ES_SEARCH_TIMEOUT_SECONDS)
+        client = es_client.options(request_timeout=timeout)
+        reference = await run_stage(
+            "es_search",
+            client.search(index=PLANETS_INDEX, size=1, _source=["pl_name", PROPERTY_VECTOR_FIELD],
+                          query={"term": {"pl_name": {"value": planet_name, "case_insensitive": True}}}),
+            config.ES_SEARCH_TIMEOUT_SECONDS
+        )
+        reference_hits = reference.get("hits", {}).get("hits", [])
+        if not reference_hits:
+            return {"error": f"Planet '{planet_name}' not found. Use the exact catalog name (e.g. 'TRAPPIST-1 e')."}
+        source = reference_hits[0].get("_source") or {}
+        if not source.get(PROPERTY_VECTOR_FIELD):
+            return {"error": f"Too few known properties for '{source.get('pl_name', planet_name)}' to find similar planets."}
+        knn_filter = {"bool": {"filter": clauses, "must_not": [{"ids": {"values": [reference_hits[0]["_id"]]}}]}}
+        response = await run_stage(
+            "es_knn_properties",
+            client.search(index=PLANETS_INDEX, size=k, _source=PLANET_SOURCE_FIELDS, knn={
+                "field": PROPERTY_VECTOR_FIELD, "query_vector": source[PROPERTY_VECTOR_FIELD],
+                "k": k, "num_candidates": max(config.KNN_NUM_CANDIDATES, 10 * k), "filter": knn_filter
+            }),
+            config.ES_SEARCH_TIMEOUT_SECONDS
+        )
+        return {"hits": response.get("hits", {}).get("hits", [])[:k]}
+    except DeadlineExceeded as e:
+        logger.warning("%s Skipping similar planets search.", e)
+        return {"error": RETRIEVAL_SKIPPED_MESSAGE}
+    except Exception as e:
+        registry.inc("errors_total", stage="es_knn_properties")
+        logger.exception("Similar planets search failed: %s", e)
+        return {"error": f"Elasticsearch query failed: {e}"}
+
+# --- Fetch Documents Tool Function ---
+async def fetch_documents(
+    es_client: AsyncElasticsearch,
+    ids: list[str],
+    fields: list[str] | None = None
+) -> str:
+    """
+    Full documents by ID (one mget round trip over both indices: search results mix planet
+    rows and papers), for when a compact search row isn't enough.
+    """
+    logger.debug("Running fetch documents tool: ids=%s", ids)
+    if not ids:
+        return json.dumps({"error": "No document IDs provided."})
+    requested = list(ids)[:MAX_FETCH_DOCUMENTS]
+    try:
+        timeout = stage_timeout(config.ES_SEARCH_TIMEOUT_SECONDS)
+        response = await run_stage(
+            "es_mget",
+            es_client.options(request_timeout=timeout).mget(
+                docs=[{"_index": index_name, "_id": doc_id}
+                      for doc_id in requested for index_name in (PAPERS_INDEX, PLANETS_INDEX)],
+                _source_includes=fields or None,
+                _source_excludes=[FULL_VECTOR_FIELD, SMALL_VECTOR_FIELD, PROPERTY_VECTOR_FIELD]
+            ),
+            config.ES_SEARCH_TIMEOUT_SECONDS
+        )
+        found = {}
+        for doc in response.get("docs", []):
+            if doc.get("found"):
+                source = {k: v for k, v in (doc.get("_source") or {}).items() if v is not None}
+                found.setdefault(doc.get("_id"), {"id": doc.get("_id"), "source": source})
+        documents = [found.get(doc_id, {"id": doc_id, "error": "not found"}) for doc_id in requested]
+        return json.dumps(documents)
     except Exception as e:
-        print(f"ERROR during Elasticsearch search: {e}")
-        print(traceback.format_exc())
-        return json.dumps({"error": f"Elasticsearch query failed: {e}"})
+        registry.inc("errors_total", stage="es_mget")
+        logger.exception("Elasticsearch mget failed: %s", e)
+        return json.dumps({"error": f"Elasticsearch mget failed: {e}"})
 
 # --- Plotting Tool Function (remains the same) ---
 async def plot_planet_comparison(
@@ -85,16 +704,15 @@ async def plot_planet_comparison(
     y_property: str
 ) -> str:
     # ... (code from previous step, no changes) ...
-    print(f"\n--- Running Plotting Tool ---")
-    print(f"  Planets: {planet_names}")
-    print(f"  X-Axis: {x_property}, Y-Axis: {y_property}")
+    logger.debug("Running plotting tool: planets=%s x=%s y=%s", planet_names, x_property, y_property)
     if not planet_names:
         return json.dumps({"error": "No planet names provided for plotting."})
     try:
-        query = { "terms": { "pl_name.keyword": [name.lower() for name in planet_names] } }
+        # Catalog spellings: terms on the keyword field are exact (no case_insensitive for terms)
+        query = { "terms": { "pl_name": [canonical_name("pl_name", name) for name in planet_names] } }
         fields_to_fetch = ["pl_name", x_property, y_property]
         response = await es_client.search(
-            index=INDEX_NAME, query=query, _source=fields_to_fetch, size=len(planet_names)
+            index=PLANETS_INDEX, query=query, _source=fields_to_fetch, size=len(planet_names)
         )
         hits = response.get('hits', {}).get('hits', [])
         if not hits:
@@ -106,26 +724,28 @@ async def plot_planet_comparison(
                 data.append({ "name": source.get("pl_name"), "x": source.get(x_property), "y": source.get(y_property) })
         if not data:
             return json.dumps({"error": f"Found planets, but none had valid data for '{x_property}' and '{y_property}'."})
-        print(f"  Found data for {len(data)} planets.")
-        df = pd.DataFrame(data)
-        plt.figure(figsize=(10, 6))
-        plt.scatter(df['x'], df['y'])
-        for i, row in df.iterrows():
-            plt.annotate(row['name'], (row['x'], row['y']), xytext=(5,5), textcoords='offset points')
-        plt.title(f"Planet Comparison: {y_property} vs. {x_property}")
-        plt.xlabel(x_property)
-        plt.ylabel(y_property)
-        plt.grid(True)
         filename = f"plot_{uuid.uuid4()}.png"
-        save_path = os.path.join(STATIC_DIR, filename) 
-        plt.savefig(save_path)
-        plt.close()
-        print(f"  Plot saved to: {save_path}")
+        save_path = os.path.join(STATIC_DIR, filename)
+        with span("plot_render"):
+            import pandas as pd
+            plt = _pyplot()
+            df = pd.DataFrame(data)
+            plt.figure(figsize=(10, 6))
+            plt.scatter(df['x'], df['y'])
+            for i, row in df.iterrows():
+                plt.annotate(row['name'], (row['x'], row['y']), xytext=(5,5), textcoords='offset points')
+            plt.title(f"Planet Comparison: {y_property} vs. {x_property}")
+            plt.xlabel(x_property)
+            plt.ylabel(y_property)
+            plt.grid(True)
+            plt.savefig(save_path)
+            plt.close()
+        logger.debug("Plot of %d planets saved to: %s", len(data), save_path)
         web_path = f"/static/{filename}"
         return json.dumps({"plot_path": web_path})
     except Exception as e:
-        print(f"ERROR during plotting: {e}")
-        print(traceback.format_exc())
+        registry.inc("errors_total", stage="plot_render")
+        logger.exception("Plotting failed: %s", e)
         return json.dumps({"error": f"Plotting failed: {e}"})
 
 # --- Test function (remains the same) ---
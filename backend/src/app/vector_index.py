@@ -0,0 +1,258 @@
+import json
+import os
+import threading
+import time
+import numpy as np
+
+# --- Local Vector Index ---
+# An in-process copy of the abstract vectors, for development, tests and Elasticsearch
+# outages. It is built from an export (scripts/export_index.py --vectors) and stored as:
+#   manifest.json     dim, count, dtype, ivf_lists
+#   vectors.npy       unit-length rows, float32 or int8 (int8 rows come with scales.npy)
+#   metadata.ndjson   {"id", "source"} per row, in row order
+#   centroids.npy / list_offsets.npy   only with IVF partitioning
+# vectors.npy is opened as a memmap, so the OS pages it in on demand and several
+# workers share one copy. Queries are cosine top-k via blocked matrix products; with
+# IVF the rows are stored grouped by list, so probing a list reads one contiguous slice.
+# Like elastic.py and export.py this module does not import the app config.
+
+BLOCK_ROWS = 32768 # rows per matrix product; bounds the temporary score matrix
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 256
+FILTER_MATCH_BOOST = 1.0 # a keyword match ranks above any pure kNN hit, like the ES term + kNN union
+
+
+def unit_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def merge_top_k(scores: np.ndarray, rows: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Per query (row of `scores`), keeps the k best columns, sorted by descending score."""
+    if scores.shape[1] > k:
+        keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(scores, keep, axis=1)
+        rows = np.take_along_axis(rows, keep, axis=1)
+    order = np.argsort(-scores, axis=1, kind="stable")
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(rows, order, axis=1)
+
+
+class LocalVectorIndex:
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.dim = self.manifest["dim"]
+        self.dtype = self.manifest["dtype"]
+        self.vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+        self.scales = np.load(os.path.join(directory, "scales.npy")) if self.dtype == "int8" else None
+        self.ids: list[str] = []
+        self.sources: list[dict] = []
+        with open(os.path.join(directory, "metadata.ndjson"), encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                self.ids.append(record["id"])
+                self.sources.append(record["source"])
+        self.centroids = None
+        self.list_offsets = None
+        if self.manifest.get("ivf_lists"):
+            self.centroids = np.load(os.path.join(directory, "centroids.npy"))
+            self.list_offsets = np.load(os.path.join(directory, "list_offsets.npy"))
+        self.searches = 0
+        self.rows_scanned = 0
+        self._lock = threading.Lock() # counters only; searches run in worker threads
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # --- Scoring ---
+    def _cosines(self, queries: np.ndarray, start: int, stop: int) -> np.ndarray:
+        block = self.vectors[start:stop]
+        scores = queries @ block.T.astype(np.float32, copy=False)
+        if self.scales is not None:
+            scores *= self.scales[start:stop]
+        return scores
+
+    def _scan(self, queries: np.ndarray, ranges: list[tuple[int, int]], k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Exact top-k of `queries` over the given row ranges, BLOCK_ROWS rows per product."""
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        scanned = 0
+        for range_start, range_stop in ranges:
+            for start in range(range_start, range_stop, BLOCK_ROWS):
+                stop = min(start + BLOCK_ROWS, range_stop)
+                scores = self._cosines(queries, start, stop)
+                rows = np.broadcast_to(np.arange(start, stop, dtype=np.int64), scores.shape)
+                best_scores, best_rows = merge_top_k(
+                    np.concatenate([best_scores, scores], axis=1), np.concatenate([best_rows, rows], axis=1), k
+                )
+                scanned += stop - start
+        with self._lock:
+            self.rows_scanned += scanned * len(queries)
+        return best_scores, best_rows
+
+    def _probe_ranges(self, query: np.ndarray, nprobe: int | None) -> list[tuple[int, int]]:
+        if self.centroids is None or not nprobe or nprobe >= len(self.centroids):
+            return [(0, len(self))]
+        lists = np.argsort(-(self.centroids @ query))[:nprobe]
+        return [(int(self.list_offsets[i]), int(self.list_offsets[i + 1])) for i in sorted(lists)]
+
+    # --- Public API ---
+    def search_many(self, queries, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Exact (brute-force) cosine top-k for a batch of queries: (scores, rows), each (n_queries, k)."""
+        return self._scan(unit_rows(np.atleast_2d(queries)), [(0, len(self))], k)
+
+    def search(
+        self,
+        query_vector,
+        k: int = 5,
+        *,
+        nprobe: int | None = None,
+        filter_fields: list[str] | None = None,
+        filter_value: str | None = None,
+        source_fields: list[str] | None = None,
+    ) -> list[dict]:
+        """
+        Top-k hits in the Elasticsearch shape ({"_id", "_score", "_source"}, score = (1 + cosine) / 2).
+        nprobe limits an IVF index to the closest lists (None: scan everything). A keyword
+        filter (a value matched case-insensitively in any of filter_fields) adds its matches
+        on top of the kNN hits, as the ES query does.
+        """
+        query = unit_rows(np.atleast_2d(query_vector))
+        scores, rows = self._scan(query, self._probe_ranges(query[0], nprobe), k)
+        candidates = dict(zip(rows[0].tolist(), scores[0].tolist())) # row -> cosine
+        matched = set()
+        if filter_fields and filter_value:
+            match_rows = np.array(self._matching_rows(filter_fields, filter_value)[:k * 20], dtype=np.int64)
+            if len(match_rows):
+                match_scores = self.vectors[match_rows].astype(np.float32) @ query[0]
+                if self.scales is not None:
+                    match_scores *= self.scales[match_rows]
+                candidates.update(zip(match_rows.tolist(), match_scores.tolist()))
+                matched = set(match_rows.tolist())
+        with self._lock:
+            self.searches += 1
+        ranked = sorted(candidates, key=lambda row: candidates[row] + (FILTER_MATCH_BOOST if row in matched else 0.0),
+                        reverse=True)[:k]
+        return [self._hit(row, candidates[row], row in matched, source_fields) for row in ranked]
+
+    def _matching_rows(self, fields: list[str], value: str) -> list[int]:
+        fields = [field.removesuffix(".keyword") for field in fields]
+        wanted = str(value).casefold()
+
+        def matches(source: dict) -> bool:
+            for field in fields:
+                values = source.get(field)
+                for candidate in values if isinstance(values, list) else [values]:
+                    if candidate is not None and str(candidate).casefold() == wanted:
+                        return True
+            return False
+
+        return [row for row, source in enumerate(self.sources) if matches(source)]
+
+    def _hit(self, row: int, cosine: float, matched: bool, source_fields: list[str] | None) -> dict:
+        source = self.sources[row]
+        if source_fields is not None:
+            source = {field: source[field] for field in source_fields if field in source}
+        score = (1.0 + cosine) / 2.0 + (FILTER_MATCH_BOOST if matched else 0.0)
+        return {"_id": self.ids[row], "_score": score, "_source": source}
+
+    def stats(self) -> dict:
+        return {
+            "documents": len(self),
+            "dim": self.dim,
+            "dtype": self.dtype,
+            "ivf_lists": 0 if self.centroids is None else len(self.centroids),
+            "vector_bytes": int(self.vectors.nbytes),
+            "searches": self.searches,
+            "rows_scanned": self.rows_scanned,
+        }
+
+
+# --- Building ---
+def _spherical_kmeans(sample: np.ndarray, lists: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), size=lists, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        for i in range(lists):
+            members = sample[assignment == i]
+            if len(members):
+                centroids[i] = members.sum(axis=0)
+            else: # empty list: restart it on a random point
+                centroids[i] = sample[rng.integers(len(sample))]
+        centroids = unit_rows(centroids)
+    return centroids
+
+
+def build_local_index(records_path: str, vectors_path: str, output_dir: str, *, dtype: str = "float32",
+                      ivf_lists: int = 0, seed: int = 0) -> dict:
+    """
+    Builds a LocalVectorIndex directory from an export: the metadata NDJSON (records
+    with "vector_row") and the .npy vectors file. Records without a vector are skipped.
+    Returns the manifest.
+    """
+    if dtype not in ("float32", "int8"):
+        raise ValueError("dtype must be 'float32' or 'int8'")
+    source_vectors = np.load(vectors_path, mmap_mode="r")
+    rows, metadata = [], []
+    with open(records_path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            vector_row = record.pop("vector_row", None)
+            if vector_row is None:
+                continue
+            document_id = record.pop("id")
+            rows.append(vector_row)
+            metadata.append({"id": document_id, "source": record})
+    if not rows:
+        raise ValueError(f"No records with vectors in {records_path}")
+    rows = np.asarray(rows, dtype=np.int64)
+    count, dim = len(rows), source_vectors.shape[1]
+    os.makedirs(output_dir, exist_ok=True)
+
+    order = np.arange(count)
+    ivf_lists = min(ivf_lists, count)
+    if ivf_lists > 1:
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(count, size=min(count, ivf_lists * KMEANS_SAMPLE_PER_LIST), replace=False))
+        centroids = _spherical_kmeans(unit_rows(source_vectors[rows[sample_rows]]), ivf_lists, seed)
+        assignment = np.empty(count, dtype=np.int64)
+        for start in range(0, count, BLOCK_ROWS):
+            block = unit_rows(source_vectors[rows[start:start + BLOCK_ROWS]])
+            assignment[start:start + BLOCK_ROWS] = np.argmax(block @ centroids.T, axis=1)
+        order = np.argsort(assignment, kind="stable") # rows of one list become contiguous
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=ivf_lists))])
+        np.save(os.path.join(output_dir, "centroids.npy"), centroids)
+        np.save(os.path.join(output_dir, "list_offsets.npy"), offsets.astype(np.int64))
+    else:
+        ivf_lists = 0
+
+    out = np.lib.format.open_memmap(os.path.join(output_dir, "vectors.npy"), mode="w+",
+                                    dtype=np.dtype(dtype), shape=(count, dim))
+    scales = np.empty(count, dtype=np.float32) if dtype == "int8" else None
+    for start in range(0, count, BLOCK_ROWS):
+        block_order = order[start:start + BLOCK_ROWS]
+        block = unit_rows(source_vectors[rows[block_order]])
+        if scales is None:
+            out[start:start + len(block)] = block
+        else: # symmetric per-row quantization: row ~= int8 row * scale
+            peak = np.abs(block).max(axis=1)
+            peak[peak == 0] = 1.0
+            out[start:start + len(block)] = np.round(block / peak[:, None] * 127).astype(np.int8)
+            scales[start:start + len(block)] = peak / 127
+    out.flush()
+    del out
+    if scales is not None:
+        np.save(os.path.join(output_dir, "scales.npy"), scales)
+    with open(os.path.join(output_dir, "metadata.ndjson"), "w", encoding="utf-8") as f:
+        for position in order:
+            f.write(json.dumps(metadata[position], default=str) + "\n")
+
+    manifest = {"dim": int(dim), "count": int(count), "dtype": dtype, "ivf_lists": int(ivf_lists),
+                "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+    with open(os.path.join(output_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
@@ -0,0 +1,53 @@
+import asyncio
+import logging
+import time
+import src.app.llm as llm
+import src.app.tools as tools
+
+# --- Startup Warm-Up ---
+# Importing the Vertex SDK, loading the embedding model and constructing the chat
+# model take seconds. Instead of making the first /chat pay for them, the app lifespan
+# runs them as timed steps, concurrently with connecting to Elasticsearch. A failed
+# step is logged and skipped; the request path still initializes lazily as before.
+
+logger = logging.getLogger(__name__)
+
+
+class WarmUp:
+    def __init__(self):
+        self.timings: dict[str, float] = {} # step -> seconds
+        self.failed: list[str] = []
+
+    async def step(self, name: str, awaitable) -> bool:
+        """Awaits one warm-up step. False if it raised or returned False."""
+        started = time.perf_counter()
+        try:
+            result = await awaitable
+            ok = result is not False
+        except Exception as e:
+            logger.warning("Warm-up step '%s' failed: %s", name, e)
+            ok = False
+        self.timings[name] = round(time.perf_counter() - started, 3)
+        if not ok:
+            self.failed.append(name)
+        return ok
+
+    def report(self) -> dict:
+        return {"steps": dict(self.timings), "failed": list(self.failed)}
+
+
+def import_vertex_sdk():
+    # One thread imports the shared SDK packages first; importing them from two
+    # threads at once can hit the import system's deadlock detection.
+    import vertexai.generative_models # noqa: F401
+    import vertexai.language_models # noqa: F401
+
+
+async def warm_up_models(warm: WarmUp):
+    """SDK import, then the embedding and chat models in parallel (each is blocking, so in threads)."""
+    if not await warm.step("vertex_sdk_import", asyncio.to_thread(import_vertex_sdk)):
+        return
+    await asyncio.gather(
+        warm.step("embedding_model", asyncio.to_thread(tools.warm_up)),
+        warm.step("chat_model", asyncio.to_thread(llm.warm_up)),
+    )
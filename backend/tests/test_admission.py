@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from src.app.admission import AdmissionController, Overloaded, TokenBucketLimiter, client_address, parse_trusted_proxies
+
+@pytest.mark.asyncio
+async def test_requests_queue_then_run_when_a_slot_frees():
+    admission = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=1)
+    first = await admission.acquire()
+    waiter = asyncio.ensure_future(admission.acquire())
+    await asyncio.sleep(0)
+    assert admission.stats()["queued"] == 1
+    assert admission.saturation() == 2.0
+
+    first.release()
+    second = await waiter
+    assert admission.stats()["active"] == 1
+    second.release()
+    second.release() # idempotent
+    assert admission.stats()["active"] == 0
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected_immediately_with_retry_after():
+    admission = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=5)
+    slot = await admission.acquire()
+    with pytest.raises(Overloaded) as excinfo:
+        await admission.acquire()
+    assert excinfo.value.status_code == 503
+    assert excinfo.value.headers() == {"Retry-After": "5"}
+    assert admission.stats()["rejected_queue_full"] == 1
+    slot.release()
+
+@pytest.mark.asyncio
+async def test_queued_request_times_out():
+    admission = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+    slot = await admission.acquire()
+    with pytest.raises(Overloaded):
+        await admission.acquire()
+    assert admission.stats()["rejected_timeout"] == 1
+    assert admission.stats()["queued"] == 0
+    slot.release()
+
+def test_token_bucket_allows_burst_then_limits_per_client():
+    limiter = TokenBucketLimiter(rate_per_second=0.5, burst=2)
+    assert limiter.check("alice") == 0
+    assert limiter.check("alice") == 0
+    retry_after = limiter.check("alice")
+    assert 0 < retry_after <= 2
+    assert limiter.check("bob") == 0 # buckets are per client
+    assert limiter.stats()["rate_limited"] == 1
+
+def test_token_bucket_forgets_least_recent_clients():
+    limiter = TokenBucketLimiter(rate_per_second=1, burst=1, max_clients=2)
+    for client in ("a", "b", "c"):
+        limiter.check(client)
+    assert limiter.stats()["clients"] == 2
+
+def test_client_address_only_trusts_configured_proxies():
+    proxies = parse_trusted_proxies("10.0.0.0/8, 192.168.1.7")
+    # Direct caller: a spoofed header is ignored
+    assert client_address("203.0.113.5", "1.2.3.4", proxies) == "203.0.113.5"
+    assert client_address("203.0.113.5", "1.2.3.4", []) == "203.0.113.5"
+    # Behind trusted proxies: right-most untrusted hop, whatever the client prepended
+    assert client_address("10.0.0.2", "6.6.6.6, 198.51.100.9, 192.168.1.7", proxies) == "198.51.100.9"
+    assert client_address("10.0.0.2", None, proxies) == "10.0.0.2"
+    assert client_address(None, None, proxies) == "unknown"
@@ -0,0 +1,72 @@
+import json
+import pytest
+import src.app.tools as tools
+
+class FakeES:
+    def __init__(self, response):
+        self.response = response
+        self.requests = []
+
+    def options(self, **kwargs):
+        return self
+
+    async def search(self, index, **body):
+        self.requests.append((index, body))
+        return self.response
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(tools, "_aggregation_cache", tools.OrderedDict())
+    generation = {"value": "g1"}
+    async def fake_generation(es_client):
+        return generation["value"]
+    monkeypatch.setattr(tools, "get_index_generation", fake_generation)
+    return generation
+
+def test_request_filters_and_histogram():
+    request = tools.build_aggregation_request("histogram", "disc_year", [
+        {"field": "discoverymethod", "value": "Transit"},
+        {"field": "pl_rade", "gte": 1, "lte": 1.5},
+        {"field": "pl_in_hz", "value": "true"},
+    ])
+    assert request["size"] == 0
+    term, radius, flag = request["query"]["bool"]["filter"]
+    assert term == {"term": {"discoverymethod": {"value": "Transit", "case_insensitive": True}}}
+    assert radius == {"range": {"pl_rade": {"gte": 1, "lte": 1.5}}}
+    assert flag == {"term": {"pl_in_hz": "true"}} # no case_insensitive on booleans
+    assert request["aggs"]["result"]["histogram"] == {"field": "disc_year", "interval": 1, "min_doc_count": 1}
+    assert tools.build_aggregation_request("terms", "hostname.keyword", size=500)["aggs"]["result"]["terms"]["size"] == 50
+
+@pytest.mark.parametrize("args", [
+    ("median", "pl_rade", None),
+    ("stats", "discoverymethod", None), # not numeric
+    ("count", None, [{"field": "abstract", "value": "x"}]), # not a planet field
+    ("count", None, [{"field": "pl_rade"}]), # neither value nor bounds
+])
+def test_invalid_requests_are_reported(args):
+    with pytest.raises(ValueError):
+        tools.build_aggregation_request(*args)
+
+@pytest.mark.asyncio
+async def test_terms_are_compacted_and_cached_per_generation(fresh_cache):
+    es = FakeES({
+        "hits": {"total": {"value": 120}},
+        "aggregations": {"result": {"sum_other_doc_count": 3, "buckets": [
+            {"key": "Transit", "doc_count": 100}, {"key": "Radial Velocity", "doc_count": 17}]}}
+    })
+    result = json.loads(await tools.aggregate_planets(es, "terms", "discoverymethod", size=2))
+    assert result == {"matched": 120, "field": "discoverymethod",
+                      "buckets": [["Transit", 100], ["Radial Velocity", 17]], "other": 3}
+    await tools.aggregate_planets(es, "terms", "discoverymethod", size=2)
+    assert len(es.requests) == 1 and es.requests[0][0] == tools.PLANETS_INDEX
+    fresh_cache["value"] = "g2" # re-ingested
+    await tools.aggregate_planets(es, "terms", "discoverymethod", size=2)
+    assert len(es.requests) == 2
+
+@pytest.mark.asyncio
+async def test_stats_and_errors():
+    es = FakeES({"hits": {"total": {"value": 4}},
+                 "aggregations": {"result": {"count": 4, "min": 0.5, "max": 2.0, "avg": 1.23456789, "sum": 4.938}}})
+    result = json.loads(await tools.aggregate_planets(es, "stats", "pl_rade"))
+    assert result["stats"]["avg"] == 1.235
+    assert "Allowed fields" in json.loads(await tools.aggregate_planets(es, "stats", "title"))["error"]
@@ -0,0 +1,60 @@
+import numpy as np
+from src.app.answer_cache import SemanticAnswerCache, entity_key
+
+def _unit(values):
+    vec = np.asarray(values, dtype=np.float32)
+    return vec / np.linalg.norm(vec)
+
+def test_paraphrase_hits_and_unrelated_misses():
+    """ A near-identical vector is served from cache; an orthogonal one is not. """
+    cache = SemanticAnswerCache(dim=3, threshold=0.95, ttl_seconds=60, max_entries=4)
+    cache.store(_unit([1, 0, 0]), {"text": "TRAPPIST-1 e is rocky."}, generation="g1")
+
+    answer, similarity = cache.lookup(_unit([1, 0.05, 0]), generation="g1")
+    assert answer == {"text": "TRAPPIST-1 e is rocky."}
+    assert similarity > 0.95
+
+    answer, _ = cache.lookup(_unit([0, 1, 0]), generation="g1")
+    assert answer is None
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert sum(stats["similarity_histogram"].values()) == 2
+
+def test_other_index_generation_does_not_match():
+    """ Answers built from an older index generation are never served. """
+    cache = SemanticAnswerCache(dim=3, threshold=0.9, ttl_seconds=60, max_entries=4)
+    cache.store(_unit([1, 0, 0]), {"text": "old"}, generation="g1")
+    answer, _ = cache.lookup(_unit([1, 0, 0]), generation="g2")
+    assert answer is None
+
+def test_ttl_expiry_and_lru_eviction(monkeypatch):
+    """ Expired entries drop out, and a full cache evicts the least recently used entry. """
+    clock = {"now": 1000.0}
+    monkeypatch.setattr("src.app.answer_cache.time.monotonic", lambda: clock["now"])
+    cache = SemanticAnswerCache(dim=2, threshold=0.99, ttl_seconds=10, max_entries=2)
+    cache.store(_unit([1, 0]), {"text": "a"}, generation="g")
+    cache.store(_unit([0, 1]), {"text": "b"}, generation="g")
+    clock["now"] += 1
+    assert cache.lookup(_unit([1, 0]), generation="g")[0] == {"text": "a"} # "a" is now most recently used
+
+    cache.store(_unit([1, 1]), {"text": "c"}, generation="g")
+    assert cache.stats()["evictions"] == 1
+    assert cache.lookup(_unit([0, 1]), generation="g")[0] is None
+    assert cache.lookup(_unit([1, 0]), generation="g")[0] == {"text": "a"}
+
+    clock["now"] += 60
+    assert cache.lookup(_unit([1, 0]), generation="g")[0] is None
+    assert len(cache) == 0
+
+def test_entity_key_scopes_entries():
+    """ Same wording about another planet never hits, even with an identical embedding. """
+    cache = SemanticAnswerCache(dim=2, threshold=0.95, ttl_seconds=60, max_entries=4)
+    key_e = entity_key("What is the mass of TRAPPIST-1 e?", ["TRAPPIST-1 e"])
+    key_f = entity_key("What is the mass of TRAPPIST-1 f?", ["TRAPPIST-1 f"])
+    cache.store(_unit([1, 0]), {"text": "e"}, generation="g", key=key_e)
+    assert cache.lookup(_unit([1, 0]), generation="g", key=key_f)[0] is None
+    assert cache.lookup(_unit([1, 0.01]), generation="g", key=key_e)[0] == {"text": "e"}
+    # Unresolved (misspelt) names still differ by their numbers / planet letters
+    assert entity_key("mass of Keplr-22 b", []) != entity_key("mass of Keplr-23 b", [])
+    assert entity_key("mass of trapist-1 e", []) != entity_key("mass of trapist-1 f", [])
+    assert entity_key("How big is TRAPPIST-1 e", ["TRAPPIST-1 e"]) == key_e.replace("?", "")
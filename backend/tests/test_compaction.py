@@ -0,0 +1,38 @@
+import json
+from src.app.compaction import compact_hits
+
+def _hit(doc_id, score, **source):
+    return {"_id": doc_id, "_score": score, "_source": source}
+
+def test_compact_hits_drops_nulls_dedupes_and_truncates():
+    """ Nulls vanish, arXiv versions collapse to one row, and long abstracts are cut. """
+    abstract = "We observe the transmission spectrum of a hot Jupiter. " * 30
+    hits = [
+        _hit("2401.00001v2", 0.91234, arxiv_id="2401.00001v2", title="Hot Jupiter spectra", abstract=abstract, pl_name=None),
+        _hit("2401.00001v1", 0.90000, arxiv_id="2401.00001v1", title="Hot Jupiter spectra", abstract=abstract, pl_name=None),
+        _hit("2402.00002", 0.8, arxiv_id="2402.00002", title="Rocky worlds", abstract="Short.", hostname=None),
+    ]
+    table, stats = compact_hits(hits, abstract_chars=100)
+    lines = table.split("\n")
+
+    assert lines[0] == "id|score|arxiv_id|title|abstract"
+    assert len(lines) == 3
+    assert lines[1].startswith("2401.00001v2|0.912|")
+    assert "None" not in table
+    assert len(lines[1]) < 200
+    assert stats["duplicates_dropped"] == 1
+    assert stats["tokens_saved"] > 0
+    assert stats["original_tokens"] >= len(json.dumps(hits[0]["_source"])) // 4
+
+def test_compact_hits_prefers_highlight_snippets():
+    hit = _hit("p1", 1.0, title="A | B", abstract="long abstract text " * 50)
+    hit["highlight"] = {"abstract": ["snippet about water", "second snippet"]}
+    table, _ = compact_hits([hit])
+    row = table.split("\n")[1]
+    assert row.endswith("snippet about water ... second snippet")
+    assert "A / B" in row # separator inside a value can't break the table
+
+def test_compact_hits_empty():
+    table, stats = compact_hits([])
+    assert table == "no results"
+    assert stats["rows"] == 0
@@ -0,0 +1,54 @@
+import asyncio
+import pytest
+from src.app.deadline import (
+    DeadlineExceeded, deadline_exceeded_counts, reset_deadline, run_stage, set_deadline, stage_timeout
+)
+
+@pytest.mark.asyncio
+async def test_stage_gets_remaining_budget_capped_by_its_slice():
+    token = set_deadline(10)
+    try:
+        assert stage_timeout(2) == 2
+        assert 9 < stage_timeout() <= 10
+    finally:
+        reset_deadline(token)
+    assert stage_timeout() is None # no request deadline, no cap
+
+@pytest.mark.asyncio
+async def test_slow_stage_is_cancelled_and_counted():
+    cancelled = asyncio.Event()
+
+    async def slow_upstream():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    before = deadline_exceeded_counts["test_stage"]
+    token = set_deadline(0.05)
+    try:
+        with pytest.raises(DeadlineExceeded) as exc_info:
+            await run_stage("test_stage", slow_upstream())
+    finally:
+        reset_deadline(token)
+    assert exc_info.value.stage == "test_stage"
+    assert cancelled.is_set()
+    assert deadline_exceeded_counts["test_stage"] == before + 1
+
+@pytest.mark.asyncio
+async def test_spawned_tasks_inherit_the_deadline():
+    """ Work fanned out with gather (e.g. parallel tool calls) shares the request budget. """
+    async def fast():
+        return await run_stage("inner", asyncio.sleep(0, result="ok"), max_seconds=1)
+
+    token = set_deadline(5)
+    try:
+        assert await asyncio.gather(fast(), fast()) == ["ok", "ok"]
+        exhausted = set_deadline(0.000001)
+        await asyncio.sleep(0.01)
+        with pytest.raises(DeadlineExceeded):
+            await asyncio.gather(fast())
+        reset_deadline(exhausted)
+    finally:
+        reset_deadline(token)
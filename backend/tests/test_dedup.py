@@ -0,0 +1,46 @@
+import random
+import numpy as np
+from src.app.dedup import candidate_pairs, minhash_signatures, near_duplicate_clusters, split_version
+
+WORDS = [f"word{i}" for i in range(2000)]
+
+def _abstract(rng: random.Random, length: int = 150) -> str:
+    return " ".join(rng.choices(WORDS, k=length))
+
+def test_split_version():
+    assert split_version("2401.01234v2") == ("2401.01234", 2)
+    assert split_version("astro-ph/0601001v1") == ("astro-ph/0601001", 1)
+    assert split_version("2401.01234") == ("2401.01234", 0)
+
+def test_signature_agreement_estimates_jaccard():
+    rng = random.Random(0)
+    text = _abstract(rng)
+    words = text.split()
+    edited = " ".join(words[:140] + ["changed"] * 10)
+    signatures = minhash_signatures([text, text.upper() + ".", edited, _abstract(rng), ""])
+    assert (signatures[0] == signatures[1]).all() # case and punctuation are ignored
+    assert 0.75 < np.mean(signatures[0] == signatures[2]) < 0.98
+    assert np.mean(signatures[0] == signatures[3]) < 0.1
+    assert (signatures[4] != signatures[0]).all() # an empty abstract matches nothing
+    assert (0, 1) in candidate_pairs(signatures) and (0, 3) not in candidate_pairs(signatures)
+
+def test_clusters_near_duplicates_and_versions():
+    rng = random.Random(1)
+    base = _abstract(rng)
+    revised = base.replace(base.split()[5], "exoplanet", 1)
+    ids = ["2401.00001v1", "2402.00002v1", "2401.00001v2", "2403.00003v1", "2404.00004v1"]
+    texts = [base, _abstract(rng), "A rewritten abstract for the second version.", revised, _abstract(rng)]
+    dates = ["2024-01-05", "2024-02-01", "2024-01-05", "2024-03-01", "2024-04-01"]
+    clusters = near_duplicate_clusters(ids, texts, dates)
+    # Versions of one id cluster even with a new text; the cross-listed copy by similarity.
+    # Canonical first: newest version of the earliest paper.
+    assert clusters == [[2, 0, 3], [1], [4]]
+
+def test_unrelated_abstracts_stay_apart():
+    rng = random.Random(2)
+    texts = [_abstract(rng) for _ in range(500)]
+    ids = [f"2401.{i:05d}v1" for i in range(500)]
+    clusters = near_duplicate_clusters(ids + ["2409.99999v1"], texts + [texts[42]])
+    assert len(clusters) == 500
+    assert [members for members in clusters if len(members) > 1] == [[42, 500]]
+    assert len(candidate_pairs(minhash_signatures(texts))) < 50 # unrelated abstracts rarely collide
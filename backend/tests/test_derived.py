@@ -0,0 +1,46 @@
+import numpy as np
+from src.app.derived import derive_planet_quantities, habitable_zone_flux
+
+NAN = np.nan
+
+def test_earth_like_values_and_catalog_preference():
+    derived = derive_planet_quantities({
+        "pl_masse": [1.0, 10.0], "pl_rade": [1.0, 2.0], "pl_orbper": [365.25, 10.0],
+        "pl_orbsmax": [NAN, 0.5], "st_mass": [1.0, 1.0], "st_rad": [1.0, 1.0], "st_teff": [5772.0, 5772.0],
+    }, 2)
+    assert np.allclose(derived["pl_dens"], [5.514, 5.514 * 10 / 8])
+    assert np.allclose(derived["pl_grav"], [9.807, 9.807 * 10 / 4])
+    assert np.isclose(derived["pl_orbsmax"][0], 1.0, atol=1e-5) # Kepler's third law
+    assert derived["pl_orbsmax"][1] == 0.5 # archive value kept
+    assert np.allclose(derived["pl_insol"], [1.0, 4.0], atol=1e-4)
+    assert np.isclose(derived["pl_eqt"][0], 278.6, atol=0.1)
+    assert derived["pl_in_hz"].tolist() == [True, False]
+    assert derived["pl_in_optimistic_hz"].tolist() == [True, False]
+
+def test_missing_inputs_propagate_as_unknown():
+    derived = derive_planet_quantities({
+        "pl_masse": [NAN, 1.0, 1.0], "pl_rade": [1.0, 0.0, 1.0], "pl_orbper": [10.0, 10.0, NAN],
+        "st_mass": [1.0, NAN, 1.0], "st_teff": [5772.0, 5772.0, 9000.0], "st_lum": [0.0, 0.0, 0.0],
+        "pl_insol": [NAN, NAN, 1.0],
+    }, 3)
+    assert np.isnan(derived["pl_dens"][0]) and np.isnan(derived["pl_dens"][1]) # no mass, zero radius
+    assert np.isnan(derived["pl_orbsmax"][1]) and np.isnan(derived["pl_insol"][1])
+    assert derived["pl_in_hz"].tolist() == [False, None, None] # Teff 9000 K is outside the HZ fit
+    assert set(derived) == {"pl_dens", "pl_grav", "pl_orbsmax", "pl_insol", "pl_eqt", "pl_in_hz", "pl_in_optimistic_hz"}
+
+def test_habitable_zone_limits_for_the_sun():
+    teff = np.array([5780.0])
+    assert np.allclose(habitable_zone_flux(teff, "runaway_greenhouse"), 1.107)
+    assert np.allclose(habitable_zone_flux(teff, "maximum_greenhouse"), 0.356)
+
+def test_property_vectors_are_standardized_with_mean_imputation():
+    from src.app.derived import PROPERTY_VECTOR_DIMS, property_vectors
+    vectors, has_vector = property_vectors({
+        "pl_masse": [1.0, 10.0, 100.0, NAN], "pl_rade": [1.0, 2.0, 10.0, NAN],
+        "pl_orbper": [365.0, 10.0, 3.0, 5.0], "star_fe_h": [0.0, 0.1, -0.1, -0.5],
+    }, 4)
+    assert vectors.shape == (4, PROPERTY_VECTOR_DIMS) and vectors.dtype == np.float32
+    assert has_vector.tolist() == [True, True, True, False] # row 4 only knows 2 features
+    assert np.allclose(vectors[:3, 0], [-1.2247, 0.0, 1.2247], atol=1e-4) # log10 mass, standardized
+    assert vectors[3, 0] == 0.0 and vectors[3, 1] == 0.0 # missing -> mean
+    assert np.all(vectors[:, 4:7] == 0.0) # columns absent from the catalog contribute nothing
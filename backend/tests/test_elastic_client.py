@@ -0,0 +1,82 @@
+import pytest
+from elastic_transport import ApiResponseMeta, ConnectionError, HttpHeaders, NodeConfig
+from elastic_transport._node import BaseAsyncNode, NodeApiResponse
+import src.app.elastic as elastic
+from src.app.elastic import CircuitBreaker, CircuitOpenError, KeepAliveAiohttpNode, ResilientTransport, backoff_delay
+
+class ScriptedNode(BaseAsyncNode):
+    """Plays back a list of status codes / exceptions, one per request."""
+    script = []
+    calls = 0
+
+    async def perform_request(self, method, target, body=None, headers=None, request_timeout=None):
+        ScriptedNode.calls += 1
+        outcome = ScriptedNode.script.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        meta = ApiResponseMeta(status=outcome, http_version="1.1", headers=HttpHeaders({"content-type": "application/json"}),
+                               duration=0.0, node=self.config)
+        return NodeApiResponse(meta, b"{}")
+
+    async def close(self):
+        pass
+
+@pytest.fixture
+def transport(monkeypatch):
+    monkeypatch.setattr(elastic, "backoff_delay", lambda attempt, **_: 0)
+    ScriptedNode.calls = 0
+    return ResilientTransport([NodeConfig("http", "localhost", 9200)], node_class=ScriptedNode, max_retries=2,
+                              retry_on_status=elastic.RETRY_ON_STATUS)
+
+@pytest.mark.asyncio
+async def test_retries_429_then_succeeds(transport):
+    ScriptedNode.script = [429, 503, 200]
+    response = await transport.perform_request("GET", "/")
+    assert response.meta.status == 200
+    stats = transport.stats()
+    assert stats["retries"] == 2 and stats["requests"] == 3 and stats["in_flight"] == 0
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries_and_returns_last_response(transport):
+    ScriptedNode.script = [503, 503, 503]
+    response = await transport.perform_request("GET", "/")
+    assert response.meta.status == 503
+    assert transport.breaker.consecutive_failures == 1
+
+@pytest.mark.asyncio
+async def test_breaker_opens_and_fails_fast(transport):
+    transport.breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    for _ in range(2):
+        ScriptedNode.script = [ConnectionError("down")] * 3
+        with pytest.raises(ConnectionError):
+            await transport.perform_request("GET", "/")
+    calls = ScriptedNode.calls
+    with pytest.raises(CircuitOpenError):
+        await transport.perform_request("GET", "/")
+    assert ScriptedNode.calls == calls # no network attempt
+    assert transport.stats()["breaker"]["trips"] == 1
+
+def test_breaker_half_open_probe_closes_on_success():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.allow() # reset window elapsed -> one probe
+    assert breaker.state == "half_open"
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+def test_backoff_is_jittered_and_capped():
+    delays = [backoff_delay(10, base=0.2, cap=5) for _ in range(50)]
+    assert all(0 <= delay <= 5 for delay in delays)
+    assert len(set(delays)) > 1
+
+@pytest.mark.asyncio
+async def test_keepalive_node_builds_the_session(monkeypatch):
+    """ Guards the private session-factory hook: fails if elastic-transport stops calling it. """
+    monkeypatch.setattr(elastic, "KEEPALIVE_SECONDS", 123.0)
+    node = KeepAliveAiohttpNode(NodeConfig("http", "127.0.0.1", 1, connections_per_node=7))
+    with pytest.raises(ConnectionError): # nothing listens on port 1; the session exists by then
+        await node.perform_request("GET", "/", request_timeout=1)
+    assert node.session.connector._keepalive_timeout == 123.0
+    assert node.session.connector.limit_per_host == 7
+    await node.close()
@@ -0,0 +1,114 @@
+import asyncio
+import contextlib
+import json
+import numpy as np
+import pytest
+from src.app.export import export_hits, export_index
+
+def make_docs(count, dim=3):
+    return [
+        {"_id": f"doc-{i}", "_source": {"pl_name": f"Planet {i}", "disc_year": 2000 + i, "abstract_vector": [float(i)] * dim}}
+        for i in range(count)
+    ]
+
+class FakeES:
+    """Point-in-time + slice + search_after over an in-memory list (slice = doc position modulo max)."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.open_pits = set()
+        self.searches = []
+
+    async def open_point_in_time(self, index, keep_alive):
+        self.open_pits.add("pit-1")
+        return {"id": "pit-1"}
+
+    async def close_point_in_time(self, id):
+        self.open_pits.discard(id)
+
+    async def search(self, pit, size, query=None, track_total_hits=None, sort=None, slice=None,
+                     search_after=None, _source=None):
+        assert pit["id"] in self.open_pits
+        self.searches.append({"slice": slice, "search_after": search_after, "_source": _source})
+        docs = [(i, doc) for i, doc in enumerate(self.docs) if slice is None or i % slice["max"] == slice["id"]]
+        if query is not None: # count_with_vectors
+            return {"hits": {"total": {"value": sum(1 for _, d in docs if "abstract_vector" in d["_source"])}, "hits": []}}
+        start = 0 if search_after is None else search_after[0] + 1
+        page = [(i, d) for i, d in docs if i >= start][:size]
+        hits = []
+        for i, doc in page:
+            source = dict(doc["_source"])
+            if _source and "abstract_vector" in _source.get("excludes", []):
+                source.pop("abstract_vector", None)
+            hits.append({"_id": doc["_id"], "_source": source, "sort": [i]})
+        return {"pit_id": pit["id"], "hits": {"hits": hits}}
+
+@pytest.mark.asyncio
+async def test_export_hits_walks_all_slices_and_closes_pit():
+    es = FakeES(make_docs(25))
+    ids = [hit["_id"] async for hit in export_hits(es, "planets", slices=3, page_size=4)]
+
+    assert sorted(ids) == sorted(f"doc-{i}" for i in range(25))
+    assert {s["slice"]["id"] for s in es.searches} == {0, 1, 2}
+    assert any(s["search_after"] for s in es.searches) # paged, not one big request
+    assert all("abstract_vector" in s["_source"]["excludes"] for s in es.searches)
+    assert not es.open_pits
+
+@pytest.mark.asyncio
+async def test_export_hits_closes_pit_on_early_exit():
+    es = FakeES(make_docs(50))
+    async with contextlib.aclosing(export_hits(es, "planets", slices=2, page_size=5)) as hits:
+        async for _ in hits:
+            break
+    assert not es.open_pits
+
+class FailingSliceES(FakeES):
+    """Slice 1 fails on its second page; the other slices have plenty of pages left."""
+
+    async def search(self, pit, size, slice=None, search_after=None, **kwargs):
+        if slice and slice["id"] == 1 and search_after is not None:
+            raise RuntimeError("shard failure")
+        return await super().search(pit, size, slice=slice, search_after=search_after, **kwargs)
+
+@pytest.mark.asyncio
+async def test_export_hits_failing_slice_stops_the_others():
+    es = FailingSliceES(make_docs(300))
+    with pytest.raises(RuntimeError, match="shard failure"):
+        async for _ in export_hits(es, "planets", slices=3, page_size=2):
+            pass
+    await asyncio.sleep(0)
+    assert asyncio.all_tasks() == {asyncio.current_task()} # no slice left blocked on the queue
+    assert not es.open_pits
+
+@pytest.mark.asyncio
+async def test_export_index_ndjson_with_vector_memmap(tmp_path):
+    docs = make_docs(10)
+    del docs[3]["_source"]["abstract_vector"]
+    es = FakeES(docs)
+    output, vectors_path = tmp_path / "planets.ndjson", tmp_path / "vectors.npy"
+
+    stats = await export_index(es, "planets", str(output), vectors_path=str(vectors_path), dim=3, slices=2, page_size=3)
+
+    assert stats == {"documents": 10, "vectors": 9}
+    records = {r["id"]: r for r in map(json.loads, output.read_text().splitlines())}
+    assert len(records) == 10 and "abstract_vector" not in records["doc-0"]
+    assert records["doc-3"]["vector_row"] is None
+    vectors = np.load(vectors_path, mmap_mode="r")
+    assert vectors.shape == (9, 3)
+    assert vectors[records["doc-7"]["vector_row"]].tolist() == [7.0, 7.0, 7.0]
+    assert not es.open_pits
+
+@pytest.mark.asyncio
+async def test_export_index_parquet(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    docs = make_docs(6)
+    docs[0]["_source"]["unmapped"] = "x"
+    output = tmp_path / "planets.parquet"
+
+    stats = await export_index(FakeES(docs), "planets", str(output), fmt="parquet", slices=1, page_size=4)
+
+    table = pq.read_table(output)
+    assert stats["documents"] == table.num_rows == 6
+    rows = {row["id"]: row for row in table.to_pylist()}
+    assert rows["doc-2"]["disc_year"] == 2002 and rows["doc-2"]["pl_name"] == "Planet 2"
+    assert json.loads(rows["doc-0"]["extra"]) == {"unmapped": "x"}
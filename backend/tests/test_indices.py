@@ -0,0 +1,68 @@
+import json
+import pytest
+import src.app.tools as tools
+from src.app.mappings import PLANETS_MAPPING
+
+def hits(*ids):
+    return [{"_id": doc_id, "_score": 1.0} for doc_id in ids]
+
+def test_searches_route_by_filter_field():
+    vector = [0.1, 0.2]
+    papers_only = tools.build_searches(vector, "water worlds")
+    assert [header["index"] for header in papers_only[0::2]] == [tools.PAPERS_INDEX]
+    assert "knn" in papers_only[1]
+    by_paper_field = tools.build_searches(vector, "jwst", "arxiv_id", "2401.01234")
+    assert len(by_paper_field) == 2
+    mixed = tools.build_searches(vector, "climate", "hostname.keyword", "TRAPPIST-1")
+    assert [header["index"] for header in mixed[0::2]] == [tools.PAPERS_INDEX, tools.PLANETS_INDEX]
+    assert "knn" not in mixed[3] and mixed[3]["_source"] == tools.PLANET_SOURCE_FIELDS
+
+def test_merge_gives_planets_a_fixed_share():
+    size = tools.SEARCH_RESULT_SIZE
+    merged = tools.merge_hits(hits(*"abcdefg"), hits("p1", "p2", "p3", "p4"))
+    assert [hit["_id"] for hit in merged] == ["p1", "p2", "a", "b", "c"][:size]
+    short = tools.merge_hits(hits("a"), hits("p1", "p2", "p3", "p4", "p5"))
+    assert [hit["_id"] for hit in short] == ["p1", "p2", "p3", "p4", "a"] # papers ran short
+    assert tools.merge_hits(hits("a", "b"), []) == hits("a", "b")
+
+def test_merge_search_responses_errors():
+    ok = {"hits": {"hits": hits("a")}}
+    assert tools.merge_search_responses([ok]) == {"hits": hits("a")}
+    failed = tools.merge_search_responses([ok, {"error": {"reason": "no such index [planets]"}}])
+    assert "no such index" in failed["error"]
+
+class FakeES:
+    def __init__(self, docs):
+        self.docs = docs
+        self.requests = []
+
+    def options(self, **kwargs):
+        return self
+
+    async def mget(self, docs, _source_includes=None, _source_excludes=None):
+        self.requests.append(docs)
+        return {"docs": [
+            {"_index": doc["_index"], "_id": doc["_id"], "found": True, "_source": self.docs[(doc["_index"], doc["_id"])]}
+            if (doc["_index"], doc["_id"]) in self.docs else {"_index": doc["_index"], "_id": doc["_id"], "found": False}
+            for doc in docs
+        ]}
+
+@pytest.mark.asyncio
+async def test_fetch_documents_looks_in_both_indices():
+    es = FakeES({
+        (tools.PAPERS_INDEX, "2401.01234"): {"title": "JWST"},
+        (tools.PLANETS_INDEX, "row_7"): {"pl_name": "TRAPPIST-1 e", "pl_rade": None},
+    })
+    documents = json.loads(await tools.fetch_documents(es, ["row_7", "2401.01234", "missing"]))
+    assert documents == [
+        {"id": "row_7", "source": {"pl_name": "TRAPPIST-1 e"}},
+        {"id": "2401.01234", "source": {"title": "JWST"}},
+        {"id": "missing", "error": "not found"},
+    ]
+    assert len(es.requests) == 1 and len(es.requests[0]) == 6 # one round trip
+
+def test_planet_term_uses_a_mapped_field():
+    searches = tools.build_searches([0.1] * 3, "rocky planets", "pl_name.keyword", "TRAPPIST-1 e")
+    assert searches[2] == {"index": tools.PLANETS_INDEX}
+    (field,) = searches[3]["query"]["term"]
+    assert field == "pl_name" and field in PLANETS_MAPPING["properties"]
@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+from src.app.admission import Overloaded
+from src.app.jobs import JobQueue, report_progress
+
+@pytest.mark.asyncio
+async def test_job_runs_in_a_worker_and_reports_progress():
+    jobs = JobQueue(workers=1, max_pending=4, ttl_seconds=60)
+    jobs.start()
+    release = asyncio.Event()
+
+    async def run():
+        report_progress({"type": "tool_call", "name": "search_elastic"})
+        await release.wait()
+        return {"text": "answer"}
+
+    job = jobs.submit(run)
+    assert job.status == "queued" # submit never waits for the agent
+    await asyncio.sleep(0.01)
+    assert job.status == "running"
+    assert job.to_dict()["progress"] == [{"type": "status", "status": "running"},
+                                         {"type": "tool_call", "name": "search_elastic"}]
+    release.set()
+    await asyncio.sleep(0.01)
+    assert job.status == "done" and job.result == {"text": "answer"}
+    assert jobs.get(job.job_id) is job
+    assert jobs.stats()["completed"] == 1
+    await jobs.stop()
+
+@pytest.mark.asyncio
+async def test_follow_replays_then_streams_until_finished():
+    jobs = JobQueue(workers=1, max_pending=4, ttl_seconds=60)
+    jobs.start()
+    step = asyncio.Event()
+
+    async def run():
+        report_progress({"type": "tool_call", "name": "plot_planet_comparison"})
+        await step.wait()
+        raise RuntimeError("boom")
+
+    job = jobs.submit(run)
+    await asyncio.sleep(0.01)
+    seen = []
+
+    async def follow():
+        async for position, event in job.follow(after=1, heartbeat_seconds=0.01):
+            seen.append((position, event and event["type"]))
+
+    follower = asyncio.ensure_future(follow())
+    await asyncio.sleep(0.03)
+    step.set()
+    await asyncio.wait_for(follower, 1)
+    assert seen[0] == (1, "tool_call")
+    assert (None, None) in seen # heartbeat while the job was quiet
+    assert seen[-1] == (2, "error")
+    assert job.status == "error" and job.result == {"error": "Job failed: boom"}
+    await jobs.stop()
+
+@pytest.mark.asyncio
+async def test_pending_queue_is_bounded():
+    jobs = JobQueue(workers=1, max_pending=1, ttl_seconds=60) # workers not started: nothing is taken off the queue
+
+    async def run():
+        return {"text": "never"}
+
+    jobs.submit(run)
+    with pytest.raises(Overloaded) as excinfo:
+        jobs.submit(run)
+    assert excinfo.value.status_code == 503
+    assert jobs.stats()["rejected"] == 1
+
+@pytest.mark.asyncio
+async def test_finished_jobs_expire_after_ttl():
+    jobs = JobQueue(workers=1, max_pending=4, ttl_seconds=0.01)
+    jobs.start()
+
+    async def run():
+        return {"text": "ok"}
+
+    job = jobs.submit(run)
+    await asyncio.sleep(0.01)
+    assert job.finished
+    await asyncio.sleep(0.02)
+    assert jobs.get(job.job_id) is None
+    assert jobs.stats()["expired"] == 1
+    await jobs.stop()
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+import src.app.tools as tools
+from src.app.knn_eval import exact_top_k, recall_at_k, recommend, run_es_trial, summarize
+
+def test_exact_top_k_blocks_and_exclusion(monkeypatch):
+    monkeypatch.setattr("src.app.knn_eval.BLOCK_ROWS", 7)
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(50, 8)).astype(np.float32)
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    rows = exact_top_k(vectors, vectors[[3, 20]], 4, exclude=[3, 20])
+
+    for query_row, found in zip([3, 20], rows):
+        expected = [r for r in np.argsort(-(unit @ unit[query_row])) if r != query_row][:4]
+        assert found.tolist() == expected
+
+def test_recall_and_recommendation():
+    truth = [["a", "b"], ["c", "d"]]
+    assert recall_at_k(truth, [["b", "a"], ["c", "x"]], 2) == 0.75
+    results = [
+        summarize({"target": "live", "k": 2, "num_candidates": 10}, truth, [["a", "x"], ["c", "x"]], [0.001, 0.002]),
+        summarize({"target": "live", "k": 2, "num_candidates": 50}, truth, [["a", "b"], ["c", "d"]], [0.004, 0.005]),
+        summarize({"target": "live", "k": 2, "num_candidates": 200}, truth, [["a", "b"], ["c", "d"]], [0.009, 0.010]),
+    ]
+    assert results[0]["recall"] == 0.5 and results[1]["p50_ms"] == 4.5
+    assert recommend(results, target_recall=0.95)["num_candidates"] == 50 # fastest that reaches the target
+    assert recommend(results, target_recall=1.1)["num_candidates"] == 50 # none does: best recall, then fastest
+
+@pytest.mark.asyncio
+async def test_es_trial_excludes_query_document():
+    class FakeES:
+        def __init__(self):
+            self.bodies = []
+
+        async def search(self, index, size, _source, knn=None, query=None):
+            self.bodies.append(knn or query)
+            return {"hits": {"hits": [{"_id": "n1"}, {"_id": "n2"}][:size]}}
+
+    es = FakeES()
+    found, latencies = await run_es_trial(es, "planets", "abstract_vector", np.ones((2, 3)), 2, 1, ["q1", None])
+    assert found == [["n1", "n2"], ["n1", "n2"]] and len(latencies) == 2
+    assert es.bodies[0]["num_candidates"] == 2 # never below k
+    assert es.bodies[0]["filter"]["bool"]["must_not"]["ids"]["values"] == ["q1"]
+    assert "filter" not in es.bodies[1]
+
+    await run_es_trial(es, "planets", "abstract_vector", np.ones((1, 4)), 2, 100, ["q1"],
+                       two_stage_dims=2, two_stage_candidates=30)
+    coarse = es.bodies[2]["script_score"]["query"]["knn"]
+    assert coarse["field"] == "abstract_vector_small" and len(coarse["query_vector"]) == 2
+    assert (coarse["k"], coarse["num_candidates"]) == (30, 100)
+    assert coarse["filter"]["bool"]["must_not"]["ids"]["values"] == ["q1"]
+
+def test_search_payload_reads_knn_settings_from_config(monkeypatch):
+    monkeypatch.setattr(tools.config, "KNN_K", 7)
+    monkeypatch.setattr(tools.config, "KNN_NUM_CANDIDATES", 120)
+    knn = tools.build_search_payload([0.1], "q")["knn"]
+    assert (knn["k"], knn["num_candidates"]) == (7, 120)
@@ -0,0 +1,44 @@
+import src.app.tools as tools
+from src.app.linker import AhoCorasick, MentionLinker, normalize_with_boundaries
+
+def test_aho_corasick_finds_overlapping_patterns():
+    automaton = AhoCorasick()
+    for pattern in ["he", "she", "his", "hers"]:
+        automaton.add(pattern, pattern)
+    found = sorted((start, value) for start, _, value in automaton.find("ushers"))
+    assert found == [(1, "she"), (2, "he"), (2, "hers")]
+
+def test_normalization_boundaries():
+    text, boundaries = normalize_with_boundaries("TRAPPIST-1e, HD 10")
+    assert text == "trappist1ehd10"
+    assert boundaries == {0, 8, 9, 10, 12, 14}
+
+def make_linker():
+    linker = MentionLinker()
+    linker.add_planet("TRAPPIST-1 e", "TRAPPIST-1", ["2MASS J23062928-0502285"])
+    linker.add_planet("TRAPPIST-1 f", "TRAPPIST-1", ["2MASS J23062928-0502285"])
+    linker.add_planet("HD 1 b", "HD 1")
+    linker.add_planet("Kepler-22 b", "Kepler-22")
+    linker.build()
+    return linker
+
+def test_name_variants_and_host_inference():
+    linker = make_linker()
+    assert linker.link("Climate of TRAPPIST-1e", "") == {
+        "mentioned_planets": ["TRAPPIST-1 e"], "mentioned_hosts": ["TRAPPIST-1"]
+    }
+    assert linker.link("trappist 1 F and Kepler-22b")["mentioned_planets"] == ["Kepler-22 b", "TRAPPIST-1 f"]
+    assert linker.link("The M dwarf 2MASS J23062928-0502285")["mentioned_hosts"] == ["TRAPPIST-1"]
+    assert linker.patterns == 8 # hosts/aliases shared by planets are registered once
+
+def test_partial_tokens_do_not_match():
+    linker = make_linker()
+    assert linker.link("HD 10 and HD 1000 b") == {"mentioned_planets": [], "mentioned_hosts": []}
+    assert linker.link("Kepler-221 b")["mentioned_hosts"] == []
+
+def test_planet_filter_includes_linked_papers():
+    assert tools.keyword_filter_fields("pl_name.keyword") == ["pl_name.keyword", "mentioned_planets"]
+    assert tools.keyword_filter_fields("hostname") == ["hostname", "mentioned_hosts"]
+    assert tools.keyword_filter_query("discoverymethod", "Transit") == {
+        "term": {"discoverymethod": {"value": "Transit", "case_insensitive": True}}
+    }
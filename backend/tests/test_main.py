@@ -7,7 +7,7 @@ from app.main import app
 async def test_health_check():
     """
     Tests that the /health endpoint returns HTTP 200 OK
-    and a JSON body {'status': 'ok'}.
+    and a JSON body with status 'ok' while the server is idle.
     """
     # We need to install our package before this test can run successfully
     # We'll do that in the next step! For now, expect an import error.
@@ -16,4 +16,6 @@ async def test_health_check():
         response = await client.get("/health")
 
     assert response.status_code == 200
-    assert response.json() == {"status": "ok"}
+    body = response.json()
+    assert body["status"] == "ok"
+    assert body["active"] == 0
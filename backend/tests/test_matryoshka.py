@@ -0,0 +1,29 @@
+import numpy as np
+import src.app.tools as tools
+from src.app.matryoshka import truncate_embedding, two_stage_query
+
+def test_truncate_embedding_renormalizes_prefix():
+    small = truncate_embedding([3.0, 4.0, 100.0, -7.0], 2)
+    assert np.allclose(small, [0.6, 0.8])
+    assert truncate_embedding([0.0, 0.0, 1.0], 2) == [0.0, 0.0]
+    assert np.isclose(np.linalg.norm(truncate_embedding(np.random.default_rng(0).normal(size=768), 256)), 1.0)
+
+def test_two_stage_query_rescoring_with_full_vector():
+    query = two_stage_query([1.0, 0.0, 0.0, 0.0], 2, candidates=40, num_candidates=10)
+    knn = query["script_score"]["query"]["knn"]
+    assert knn["field"] == "abstract_vector_small" and knn["query_vector"] == [1.0, 0.0]
+    assert (knn["k"], knn["num_candidates"]) == (40, 40) # the pool is never smaller than the candidates kept
+    script = query["script_score"]["script"]
+    assert "'abstract_vector'" in script["source"] and script["params"]["query_vector"] == [1.0, 0.0, 0.0, 0.0]
+
+def test_search_payload_two_stage(monkeypatch):
+    monkeypatch.setattr(tools.config, "TWO_STAGE_SEARCH", True)
+    monkeypatch.setattr(tools.config, "SMALL_VECTOR_DIMS", 2)
+    payload = tools.build_search_payload([0.5, 0.5, 0.5, 0.5], "water worlds")
+    assert "knn" not in payload and payload["size"] == tools.config.KNN_K
+    assert payload["query"]["script_score"]["query"]["knn"]["field"] == "abstract_vector_small"
+
+    hybrid = tools.build_search_payload([0.5, 0.5, 0.5, 0.5], "water", "pl_name.keyword", "TRAPPIST-1 e")
+    rescored, keyword = hybrid["query"]["bool"]["should"]
+    assert "script_score" in rescored
+    assert keyword == tools.keyword_filter_query("pl_name.keyword", "TRAPPIST-1 e")
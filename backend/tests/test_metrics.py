@@ -0,0 +1,38 @@
+import asyncio
+import pytest
+from src.app.deadline import run_stage
+from src.app.metrics import (
+    MetricsRegistry, registry, server_timing_header, span, start_request_timing, stop_request_timing
+)
+
+def test_prometheus_rendering_of_counters_histograms_and_collectors():
+    metrics = MetricsRegistry()
+    metrics.inc("tool_calls_total", tool="search_elastic")
+    metrics.inc("tool_calls_total", tool="search_elastic")
+    metrics.observe("stage_seconds", 0.02, stage="embedding")
+    metrics.observe("stage_seconds", 3.0, stage="embedding")
+    metrics.register_collector("cache", lambda: {"hits": 3, "hit_rate": 0.5, "name": "x", "histogram": {"<=0.9": 1}})
+
+    text = metrics.render_prometheus()
+    assert 'kepler_tool_calls_total{tool="search_elastic"} 2' in text
+    assert 'kepler_stage_seconds_bucket{stage="embedding",le="0.025"} 1' in text
+    assert 'kepler_stage_seconds_bucket{stage="embedding",le="+Inf"} 2' in text
+    assert 'kepler_stage_seconds_count{stage="embedding"} 2' in text
+    assert "kepler_cache_hits 3" in text
+    assert "kepler_cache_hit_rate 0.5" in text
+    assert "kepler_cache_histogram_le_0_9 1" in text
+    assert "kepler_cache_name" not in text # non-numeric stats are skipped
+
+@pytest.mark.asyncio
+async def test_request_spans_include_stages_from_child_tasks():
+    token = start_request_timing()
+    with span("plot_render"):
+        pass
+    await asyncio.gather(run_stage("embedding", asyncio.sleep(0)), run_stage("es_search", asyncio.sleep(0)))
+    spans = stop_request_timing(token)
+    assert [stage for stage, _ in spans] == ["plot_render", "embedding", "es_search"]
+    assert registry.histograms[("stage_seconds", (("stage", "embedding"),))].count >= 1
+
+def test_server_timing_header_sums_repeated_stages():
+    header = server_timing_header([("gemini_turn", 1.0), ("embedding", 0.04), ("gemini_turn", 0.5)])
+    assert header == "gemini_turn;dur=1500.0, embedding;dur=40.0"
@@ -0,0 +1,83 @@
+import time
+import pytest
+import src.app.tools as tools
+from src.app.names import NameResolver
+
+ROWS = [
+    {"pl_name": "TRAPPIST-1 e", "hostname": "TRAPPIST-1", "star_simbad_main_id": "2MASS J23062928-0502285"},
+    {"pl_name": "TRAPPIST-1 f", "hostname": "TRAPPIST-1", "star_simbad_main_id": "2MASS J23062928-0502285"},
+    {"pl_name": "Kepler-22 b", "hostname": "Kepler-22"},
+    {"pl_name": "Kepler-221 b", "hostname": "Kepler-221"},
+    {"pl_name": "11 Com b", "hostname": "11 Com", "star_simbad_main_id": "* 11 Com"},
+    {"pl_name": "Kepler-452 b", "hostname": "Kepler-452"},
+    {"pl_name": "TRAPPIST-1 b", "hostname": "TRAPPIST-1"},
+    {"pl_name": "HD 209458 b", "hostname": "HD 209458"},
+]
+
+@pytest.fixture
+def resolver():
+    resolver = NameResolver()
+    resolver.load_rows(ROWS)
+    return resolver
+
+def test_exact_after_normalization(resolver):
+    for spelling in ["Trappist 1e", "TRAPPIST-1e", "trappist-1 E"]:
+        assert resolver.resolve(spelling, "planet") == "TRAPPIST-1 e"
+    assert resolver.resolve("2MASS J23062928-0502285", "host") == "TRAPPIST-1" # SIMBAD id -> hostname
+    assert resolver.match("trappist-1")["kind"] == "host"
+    assert resolver.resolve("TRAPPIST-1", "planet") is None # a host is not a planet
+
+def test_fuzzy_typos(resolver):
+    match = resolver.match("Trapist-1 e", "planet")
+    assert match["name"] == "TRAPPIST-1 e" and match["score"] < 1.0
+    assert resolver.resolve("Keppler-22 b", "planet") == "Kepler-22 b"
+    assert resolver.resolve("Vulcan", "planet") is None
+    assert resolver.stats()["misses"] == 1
+
+def test_fuzzy_never_changes_digits_or_planet_letter(resolver):
+    # Similar-looking names of other (or nonexistent) objects are not typos
+    assert resolver.resolve("Kepler-23 b", "planet") is None
+    assert resolver.resolve("HD 209459 b", "planet") is None
+    assert resolver.resolve("Kepler-452 c", "planet") is None
+    assert resolver.resolve("TRAPPIST-1 i", "planet") is None
+    assert resolver.resolve("Kepelr-452 b", "planet") == "Kepler-452 b" # typo in the alphabetic prefix
+
+def test_prefix_completion(resolver):
+    assert [s["name"] for s in resolver.complete("kepler-22", kind="planet")] == ["Kepler-22 b", "Kepler-221 b"]
+    assert resolver.complete("trappist", limit=2) == [{"name": "TRAPPIST-1", "kind": "host"}, {"name": "TRAPPIST-1 b", "kind": "planet"}]
+    assert resolver.complete("trapist-1 f", kind="planet") == [{"name": "TRAPPIST-1 f", "kind": "planet"}] # fuzzy fallback
+    assert resolver.complete("") == []
+
+def test_lookups_are_fast_on_a_full_catalog():
+    resolver = NameResolver()
+    resolver.load_rows([{"pl_name": f"Kepler-{n} b", "hostname": f"Kepler-{n}"} for n in range(5000)])
+    started = time.perf_counter()
+    for _ in range(100):
+        resolver.resolve("Kepler 4321b", "planet")
+        resolver.complete("kepler-43")
+    assert (time.perf_counter() - started) / 200 < 0.005 # generous bound for slow CI machines
+    assert resolver.resolve("Keplr-4321 b", "planet") == "Kepler-4321 b"
+
+def test_tools_canonicalize_names(monkeypatch, resolver):
+    monkeypatch.setattr(tools, "name_resolver", resolver)
+    assert tools.canonical_name("pl_name.keyword", "Trappist 1e") == "TRAPPIST-1 e"
+    assert tools.canonical_name("hostname", "trappist 1") == "TRAPPIST-1"
+    assert tools.canonical_name("discoverymethod", "transit") == "transit"
+    filter_clause = tools.build_aggregation_request("count", filters=[{"field": "pl_name", "value": "trappist-1e"}])
+    assert filter_clause["query"]["bool"]["filter"][0]["term"]["pl_name"]["value"] == "TRAPPIST-1 e"
+
+def test_fuzzy_substitutions_are_reported(monkeypatch, resolver):
+    monkeypatch.setattr(tools, "name_resolver", resolver)
+    with tools.record_name_substitutions() as substitutions:
+        assert tools.canonical_name("pl_name", "Trapist-1 e") == "TRAPPIST-1 e"
+        assert tools.canonical_name("pl_name", "trappist 1f") == "TRAPPIST-1 f" # exact: not reported
+        assert tools.canonical_name("pl_name", "Kepler-23 b") == "Kepler-23 b" # unresolved: passed through
+    assert substitutions == [{"requested": "Trapist-1 e", "resolved": "TRAPPIST-1 e"}]
+    note = tools.with_substitution_note("hits", substitutions)
+    assert note.startswith("Note:") and "'Trapist-1 e' -> 'TRAPPIST-1 e'" in note and note.endswith("\nhits")
+    assert tools.with_substitution_note("hits", []) == "hits"
+
+def test_find_names_in_prompt(resolver):
+    assert resolver.find_names("Is trappist 1e denser than Kepler-22b?") == ["TRAPPIST-1 e", "Kepler-22 b"]
+    assert resolver.find_names("How far is TRAPPIST-1?") == ["TRAPPIST-1"]
+    assert resolver.find_names("What is a hot Jupiter?") == []
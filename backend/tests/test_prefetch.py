@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+from src.app.prefetch import SpeculativePrefetch, query_similarity, prefetch_stats
+
+def test_query_similarity_ignores_filler_words():
+    assert query_similarity("What about water on rocky exoplanets?", "water rocky exoplanets") == 1.0
+    assert query_similarity("water on rocky exoplanets", "hot jupiter atmospheres") == 0.0
+
+@pytest.mark.asyncio
+async def test_matching_search_uses_prefetched_result():
+    calls = []
+
+    async def search(text):
+        calls.append(text)
+        return {"hits": [{"_id": "p1"}]}
+
+    prefetch = SpeculativePrefetch("Tell me about water on rocky exoplanets", threshold=0.5)
+    prefetch.start(search)
+    used_before = prefetch_stats["used"]
+    assert await prefetch.take("water rocky exoplanets") == {"hits": [{"_id": "p1"}]}
+    assert prefetch_stats["used"] == used_before + 1
+    assert calls == ["Tell me about water on rocky exoplanets"]
+
+@pytest.mark.asyncio
+async def test_filtered_or_different_search_is_not_speculated_and_is_cancelled():
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def slow_search(text):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    prefetch = SpeculativePrefetch("habitability of TRAPPIST-1 e", threshold=0.5)
+    prefetch.start(slow_search)
+    await started.wait()
+    assert await prefetch.take("habitability", "pl_name.keyword", "TRAPPIST-1 e") is None
+    assert await prefetch.take("stellar flares of M dwarfs") is None
+    prefetch.cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+@pytest.mark.asyncio
+async def test_cancelled_prefetch_falls_back_to_a_normal_search():
+    async def search(text):
+        await asyncio.sleep(10)
+
+    prefetch = SpeculativePrefetch("water on rocky exoplanets", threshold=0.5)
+    prefetch.start(search)
+    taking = asyncio.ensure_future(prefetch.take("water rocky exoplanets"))
+    await asyncio.sleep(0)
+    prefetch._task.cancel() # e.g. the conversation that started it ended
+    assert await asyncio.wait_for(taking, timeout=1) is None
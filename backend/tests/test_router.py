@@ -0,0 +1,62 @@
+from src.app.names import NameResolver
+from src.app.router import FastPathRouter
+
+ROWS = [
+    {"pl_name": "TRAPPIST-1 e", "hostname": "TRAPPIST-1", "pl_masse": 0.692, "pl_rade": 0.92,
+     "pl_orbper": 6.101013, "sy_dist": 12.429888, "discoverymethod": "Transit", "disc_year": 2017},
+    {"pl_name": "TRAPPIST-1 f", "hostname": "TRAPPIST-1", "pl_masse": 1.039, "pl_rade": 1.045, "sy_dist": 12.429888},
+    {"pl_name": "11 Com b", "hostname": "11 Com", "pl_masse": 6165.6, "pl_orbper": 326.03, "pl_rade": None},
+]
+
+def _router():
+    resolver = NameResolver()
+    resolver.load_rows(ROWS)
+    router = FastPathRouter(resolver)
+    router.load_rows(ROWS)
+    return router
+
+def test_names_come_from_the_shared_resolver():
+    router = _router()
+    assert router.route("mass of trappist 1E")["text"].startswith("The mass of TRAPPIST-1 e is")
+    # Host aliases the resolver knows (SIMBAD ids) work too
+    router.resolver.load_rows(ROWS + [{"pl_name": "TRAPPIST-1 e", "hostname": "TRAPPIST-1", "star_simbad_main_id": "2MASS J23062928-0502285"}])
+    assert "TRAPPIST-1" in router.route("How far away is 2MASS J23062928-0502285?")["text"]
+
+def test_lookup_questions_are_answered_from_catalog():
+    router = _router()
+    answer = router.route("What is the mass of TRAPPIST-1e?")
+    assert answer is not None
+    assert "mass of TRAPPIST-1 e is 0.692 Earth masses" in answer["text"]
+
+    answer = router.route("orbital period of 11 Com b")
+    assert "orbital period of 11 Com b is 326 days" in answer["text"]
+
+    answer = router.route("How far away is TRAPPIST-1?") # star-level field, host name only
+    assert "distance from Earth of TRAPPIST-1 is 12.43 parsecs" in answer["text"]
+
+    answer = router.route("How was TRAPPIST-1 e discovered?")
+    assert "discovery method of TRAPPIST-1 e is Transit" in answer["text"]
+    assert router.stats()["served"] == 4
+
+def test_everything_else_falls_through():
+    router = _router()
+    assert router.route("What is the mass of TRAPPIST-1?") is None # which planet?
+    assert router.route("radius of 11 Com b") is None # missing in catalog
+    assert router.route("Compare the mass of TRAPPIST-1 e and TRAPPIST-1 f") is None
+    assert router.route("papers about the atmosphere of TRAPPIST-1 e") is None
+    assert router.route("How was TRAPPIST-1 e formed?") is None
+    assert router.route("What is the mass of Kepler-9999 z?") is None
+    assert router.stats()["fell_through"] == 6
+
+def test_ambiguous_lookups_fall_through():
+    router = _router()
+    assert router.route("What is the radius of the host star of TRAPPIST-1 e?") is None
+    assert router.route("What is the mass of the parent star of TRAPPIST-1 e?") is None
+    assert router.route("What is the mass of TRAPPIST-1 e and TRAPPIST-1 f?") is None
+    assert router.route("What is the mass of TRAPPIST-1 e in Jupiter masses?") is None
+    assert router.route("radius of TRAPPIST-1 e in km") is None
+    assert router.route("How far away is TRAPPIST-1 in light years?") is None
+    assert router.route("What is the temperature of TRAPPIST-1 e?") is None # stellar or equilibrium?
+    assert router.route("What is the orbital distance of TRAPPIST-1 e?") is None # semi-major axis or sy_dist?
+    # Star qualifiers are fine on star fields
+    assert "host star of TRAPPIST-1 e is TRAPPIST-1" in router.route("What is the host star of TRAPPIST-1 e?")["text"]
@@ -0,0 +1,71 @@
+import pytest
+import src.app.tools as tools
+
+class FakeEmbedding:
+    def __init__(self, values):
+        self.values = values
+
+class FakeEmbeddingModel:
+    def __init__(self):
+        self.calls = []
+
+    async def get_embeddings_async(self, texts, output_dimensionality=None):
+        self.calls.append(list(texts))
+        return [FakeEmbedding([float(len(text))]) for text in texts]
+
+class FakeES:
+    transport = None
+
+    def __init__(self):
+        self.msearch_bodies = []
+
+    def options(self, **kwargs):
+        return self
+
+    async def msearch(self, searches):
+        self.msearch_bodies.append(searches)
+        responses = []
+        for header, payload in zip(searches[0::2], searches[1::2]):
+            if header["index"] == tools.PLANETS_INDEX:
+                responses.append({"hits": {"hits": [{"_id": "planet", "_score": 2.0}]}})
+                continue
+            query = payload["highlight"]["highlight_query"]["match"]["abstract"]
+            if query == "broken":
+                responses.append({"error": {"reason": "parse failure"}})
+            else:
+                responses.append({"hits": {"hits": [{"_id": query, "_score": payload["knn"]["query_vector"][0]}]}})
+        return {"responses": responses}
+
+@pytest.fixture
+def embedding_model(monkeypatch):
+    model = FakeEmbeddingModel()
+    monkeypatch.setattr(tools, "_embedding_model", model)
+    return model
+
+@pytest.mark.asyncio
+async def test_batch_embeds_together_and_uses_msearch(monkeypatch, embedding_model):
+    monkeypatch.setattr(tools.config, "EMBEDDING_MAX_BATCH", 250)
+    monkeypatch.setattr(tools.config, "SEARCH_BATCH_MSEARCH_SIZE", 2)
+    es = FakeES()
+    queries = [("a", None, None), ("broken", None, None), ("ccc", "pl_name.keyword", "TRAPPIST-1 e")]
+
+    results = dict([item async for item in tools.search_elastic_batch(es, queries)])
+
+    assert embedding_model.calls == [["a", "broken", "ccc"]] # one provider call
+    assert len(es.msearch_bodies) == 2 # 2 + 1 searches
+    assert results[0] == {"hits": [{"_id": "a", "_score": 1.0}]}
+    assert "parse failure" in results[1]["error"]
+    assert [hit["_id"] for hit in results[2]["hits"]] == ["planet", "ccc"] # planet row from the planets index first
+    papers_header, keyword_search, planets_header, planet_search = es.msearch_bodies[1]
+    assert (papers_header["index"], planets_header["index"]) == (tools.PAPERS_INDEX, tools.PLANETS_INDEX)
+    assert planet_search["query"]["term"]["pl_name"]["value"] == "TRAPPIST-1 e"
+    planet_term, linked_term = keyword_search["query"]["bool"]["should"] # planet rows, and papers linked to it
+    assert planet_term["term"]["pl_name.keyword"]["value"] == "TRAPPIST-1 e"
+    assert linked_term["term"]["mentioned_planets"]["value"] == "TRAPPIST-1 e"
+
+@pytest.mark.asyncio
+async def test_embedding_batches_respect_model_limit(monkeypatch, embedding_model):
+    monkeypatch.setattr(tools.config, "EMBEDDING_MAX_BATCH", 2)
+    vectors = await tools.get_query_embeddings(["a", "bb", "ccc"])
+    assert vectors == [[1.0], [2.0], [3.0]]
+    assert embedding_model.calls == [["a", "bb"], ["ccc"]]
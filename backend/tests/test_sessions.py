@@ -0,0 +1,58 @@
+import json
+from src.app.sessions import SessionStore, trim_history, split_exchanges, estimate_tokens
+
+def _exchange(question: str, tool_payload: str, answer: str) -> list[dict]:
+    return [
+        {"role": "user", "parts": [{"text": question}]},
+        {"role": "model", "parts": [{"function_call": {"name": "search_elastic", "args": {"text_query": question}}}]},
+        {"role": "user", "parts": [{"function_response": {"name": "search_elastic", "response": {"content": tool_payload}}}]},
+        {"role": "model", "parts": [{"text": answer}]},
+    ]
+
+def test_split_exchanges_keeps_tool_turns_with_their_question():
+    history = _exchange("q1", "r1", "a1") + _exchange("q2", "r2", "a2")
+    exchanges = split_exchanges(history)
+    assert len(exchanges) == 2
+    assert [len(ex) for ex in exchanges] == [4, 4]
+
+def test_trim_history_stubs_old_tool_output_and_respects_budget():
+    """ Old tool responses shrink, and the oldest exchanges go first when over budget. """
+    bulky = "x" * 20000
+    history = _exchange("q1", bulky, "a1") + _exchange("q2", bulky, "a2") + _exchange("q3", bulky, "a3")
+
+    trimmed = trim_history(history, token_budget=6000, max_exchanges=20)
+    assert trimmed[0]["parts"][0]["text"] == "q1" # everything fits once older tool output is stubbed
+    assert len(json.dumps(trimmed[2])) < 1000
+    assert trimmed[-2]["parts"][0]["function_response"]["response"]["content"] == bulky # latest kept verbatim
+
+    trimmed = trim_history(history, token_budget=5300, max_exchanges=20)
+    assert trimmed[0]["parts"][0]["text"] == "q2"
+    assert sum(estimate_tokens(c) for c in trimmed) <= 5300
+
+    trimmed = trim_history(history, token_budget=100, max_exchanges=20)
+    assert trimmed[0]["parts"][0]["text"] == "q3"
+    assert sum(estimate_tokens(c) for c in trimmed) <= 100 # even the latest exchange is capped
+
+def test_session_store_is_lru_bounded():
+    store = SessionStore(max_sessions=2, token_budget=1000, max_exchanges=5)
+    store.get("a")
+    store.get("b")
+    store.get("a") # "b" is now least recently used
+    store.get("c")
+    assert len(store) == 2
+    assert store.stats()["evictions"] == 1
+    assert not store.delete("b")
+    assert store.delete("a")
+
+
+def test_trim_history_caps_an_oversized_message():
+    """ One huge prompt or answer is cut down to the budget instead of being kept whole. """
+    history = _exchange("q1", "r1", "a1") + _exchange("y" * 100000, "r2", "z" * 100000)
+    trimmed = trim_history(history, token_budget=2000, max_exchanges=20)
+    assert sum(estimate_tokens(c) for c in trimmed) <= 2000
+    assert trimmed[0]["parts"][0]["text"].startswith("yyy") and "[trimmed" in trimmed[0]["parts"][0]["text"]
+    assert trimmed[-1]["parts"][0]["text"].startswith("zzz")
+
+    # Non-ASCII text escapes to several JSON chars per character; it still ends within budget
+    trimmed = trim_history(_exchange("é" * 100000, "r", "a"), token_budget=500, max_exchanges=20)
+    assert sum(estimate_tokens(c) for c in trimmed) <= 500
@@ -0,0 +1,39 @@
+import pytest
+import src.app.tools as tools
+
+class FakeES:
+    def __init__(self, reference_hits, neighbours=()):
+        self.reference_hits = reference_hits
+        self.neighbours = list(neighbours)
+        self.requests = []
+
+    def options(self, **kwargs):
+        return self
+
+    async def search(self, index, **body):
+        self.requests.append((index, body))
+        return {"hits": {"hits": self.neighbours if "knn" in body else self.reference_hits}}
+
+@pytest.mark.asyncio
+async def test_knn_from_the_reference_planet_vector():
+    vector = [0.1] * 10
+    es = FakeES([{"_id": "row_7", "_source": {"pl_name": "TRAPPIST-1 e", "property_vector": vector}}],
+                [{"_id": "row_8", "_score": 0.9, "_source": {"pl_name": "TRAPPIST-1 d"}}])
+    result = await tools.find_similar_planets(es, "trappist-1 e", [{"field": "sy_dist", "lte": 50}], k=100)
+    assert result == {"hits": [{"_id": "row_8", "_score": 0.9, "_source": {"pl_name": "TRAPPIST-1 d"}}]}
+    (lookup_index, lookup), (knn_index, search) = es.requests
+    assert lookup_index == knn_index == tools.PLANETS_INDEX
+    assert lookup["query"]["term"]["pl_name"]["case_insensitive"] is True
+    knn = search["knn"]
+    assert knn["field"] == "property_vector" and knn["query_vector"] == vector
+    assert knn["k"] == tools.SIMILAR_PLANETS_MAX_K and search["size"] == tools.SIMILAR_PLANETS_MAX_K
+    assert knn["filter"]["bool"]["filter"] == [{"range": {"sy_dist": {"lte": 50}}}]
+    assert knn["filter"]["bool"]["must_not"] == [{"ids": {"values": ["row_7"]}}] # not its own analogue
+
+@pytest.mark.asyncio
+async def test_unknown_planet_or_missing_vector_are_errors():
+    assert "not found" in (await tools.find_similar_planets(FakeES([]), "Vulcan"))["error"]
+    sparse = FakeES([{"_id": "row_1", "_source": {"pl_name": "KOI-1 b"}}])
+    assert "Too few known properties" in (await tools.find_similar_planets(sparse, "KOI-1 b"))["error"]
+    assert len(sparse.requests) == 1 # no kNN without a vector
+    assert "Allowed fields" in (await tools.find_similar_planets(sparse, "KOI-1 b", [{"field": "title", "value": "x"}]))["error"]
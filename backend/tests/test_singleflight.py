@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+from src.app.singleflight import SingleFlight, normalize_text
+
+def test_normalize_text():
+    assert normalize_text("  What is  TRAPPIST-1 e? ") == "what is trappist-1 e?"
+    assert normalize_text(None) == ""
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_execution():
+    """ Ten concurrent callers with the same key trigger exactly one upstream call. """
+    flight = SingleFlight()
+    calls = 0
+
+    async def upstream():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    results = await asyncio.gather(*(flight.do("k", upstream) for _ in range(10)))
+    assert results == ["answer"] * 10
+    assert calls == 1
+    assert flight.stats()["coalesced"] == 9
+    assert flight.in_flight() == 0
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_every_waiter():
+    """ An upstream failure is raised in all coalesced callers, and the next call retries. """
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    results = await asyncio.gather(*(flight.do("k", failing) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+
+    async def ok():
+        return 42
+    assert await flight.do("k", ok) == 42
+
+@pytest.mark.asyncio
+async def test_cancelling_one_waiter_keeps_shared_call_alive():
+    """ A cancelled waiter does not cancel the call others are waiting on; the last one does. """
+    flight = SingleFlight()
+    started = asyncio.Event()
+    release = asyncio.Event()
+    upstream_cancelled = False
+
+    async def upstream():
+        nonlocal upstream_cancelled
+        started.set()
+        try:
+            await release.wait()
+            return "done"
+        except asyncio.CancelledError:
+            upstream_cancelled = True
+            raise
+
+    first = asyncio.create_task(flight.do("k", upstream))
+    second = asyncio.create_task(flight.do("k", upstream))
+    await started.wait()
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    release.set()
+    assert await second == "done"
+    assert not upstream_cancelled
+
+    release.clear()
+    started.clear()
+    only = asyncio.create_task(flight.do("k2", upstream))
+    await started.wait()
+    only.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await only
+    await asyncio.sleep(0)
+    assert upstream_cancelled
+    assert flight.in_flight() == 0
@@ -0,0 +1,99 @@
+import json
+import numpy as np
+import pytest
+import src.app.tools as tools
+from src.app.vector_index import LocalVectorIndex, build_local_index
+
+DIM = 16
+
+@pytest.fixture
+def export_files(tmp_path):
+    """An export as written by export_index: NDJSON records with vector_row + a .npy of vectors."""
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(300, DIM)).astype(np.float32)
+    np.save(tmp_path / "vectors.npy", vectors)
+    with open(tmp_path / "planets.ndjson", "w") as f:
+        for i in range(300):
+            f.write(json.dumps({"id": f"doc-{i}", "title": f"Paper {i}", "pl_name": "TRAPPIST-1 e" if i == 42 else None,
+                                "vector_row": i}) + "\n")
+        f.write(json.dumps({"id": "planet-row", "pl_name": "Kepler-22 b", "vector_row": None}) + "\n")
+    return tmp_path, vectors
+
+def exact_top(vectors, query, k):
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return [f"doc-{i}" for i in np.argsort(-(unit @ (query / np.linalg.norm(query))))[:k]]
+
+def build(export_files, tmp_path, **kwargs):
+    directory, _ = export_files
+    build_local_index(str(directory / "planets.ndjson"), str(directory / "vectors.npy"), str(tmp_path / "index"), **kwargs)
+    return LocalVectorIndex(str(tmp_path / "index"))
+
+def test_float32_matches_brute_force(export_files, tmp_path, monkeypatch):
+    monkeypatch.setattr("src.app.vector_index.BLOCK_ROWS", 64) # several blocks
+    _, vectors = export_files
+    index = build(export_files, tmp_path)
+    query = vectors[10] + 0.1
+
+    hits = index.search(query, k=5)
+
+    assert len(index) == 300 # the record without a vector is skipped
+    assert [hit["_id"] for hit in hits] == exact_top(vectors, query, 5)
+    assert hits[0]["_id"] == "doc-10" and 0.9 < hits[0]["_score"] <= 1.0 # ES cosine score: (1 + cos) / 2
+    assert set(hits[0]["_source"]) == {"title", "pl_name"}
+
+def test_int8_keeps_ranking_and_scores_close(export_files, tmp_path):
+    _, vectors = export_files
+    exact = build(export_files, tmp_path)
+    quantized = build(export_files, tmp_path / "q", dtype="int8")
+    query = vectors[3]
+
+    assert quantized.vectors.dtype == np.int8
+    exact_hits, quantized_hits = exact.search(query, k=10), quantized.search(query, k=10)
+    assert len({h["_id"] for h in exact_hits} & {h["_id"] for h in quantized_hits}) >= 9
+    assert abs(exact_hits[0]["_score"] - quantized_hits[0]["_score"]) < 0.01
+
+def test_ivf_probes_subset_and_full_probe_is_exact(export_files, tmp_path):
+    _, vectors = export_files
+    index = build(export_files, tmp_path, ivf_lists=8)
+    query = vectors[123]
+
+    assert index.stats()["ivf_lists"] == 8
+    assert index.search(query, k=1, nprobe=2)[0]["_id"] == "doc-123" # its own list is probed first
+    scanned_before = index.rows_scanned
+    index.search(query, k=5, nprobe=2)
+    assert index.rows_scanned - scanned_before < 300
+    assert [h["_id"] for h in index.search(query, k=5)] == exact_top(vectors, query, 5)
+
+def test_keyword_filter_matches_rank_first(export_files, tmp_path):
+    _, vectors = export_files
+    index = build(export_files, tmp_path)
+    hits = index.search(vectors[0], k=3, filter_fields=["pl_name.keyword"], filter_value="trappist-1 E")
+    assert hits[0]["_id"] == "doc-42"
+    assert hits[1]["_id"] == "doc-0"
+
+def test_search_many_is_exact(export_files, tmp_path):
+    _, vectors = export_files
+    index = build(export_files, tmp_path, ivf_lists=4) # exact even when IVF lists exist
+    scores, rows = index.search_many(vectors[:3], k=4)
+    assert rows.shape == (3, 4)
+    for query, found in zip(vectors[:3], rows):
+        assert [index.ids[i] for i in found] == exact_top(vectors, query, 4)
+
+@pytest.mark.asyncio
+async def test_search_elastic_routes_to_local_index(export_files, tmp_path, monkeypatch):
+    _, vectors = export_files
+    build(export_files, tmp_path)
+    monkeypatch.setattr(tools.config, "SEARCH_BACKEND", "local")
+    monkeypatch.setattr(tools.config, "LOCAL_INDEX_PATH", str(tmp_path / "index"))
+    monkeypatch.setattr(tools, "_local_index", {"index": None, "checked": False})
+    monkeypatch.setattr(tools, "_initialize_embedding_model", lambda: True)
+
+    async def embed(text):
+        return vectors[7].tolist()
+    monkeypatch.setattr(tools, "get_query_embedding", embed)
+
+    result = await tools.search_elastic_hits(None, "local only")
+
+    assert result["hits"][0]["_id"] == "doc-7"
+    assert len(result["hits"]) == tools.SEARCH_RESULT_SIZE
+    assert json.loads(tools.format_search_results(result))[0]["source"]["title"] == "Paper 7"
@@ -0,0 +1,22 @@
+import asyncio
+import pytest
+from src.app.warmup import WarmUp
+
+@pytest.mark.asyncio
+async def test_steps_are_timed_and_failures_recorded():
+    warm = WarmUp()
+
+    async def ok():
+        await asyncio.sleep(0.01)
+
+    async def broken():
+        raise RuntimeError("no credentials")
+
+    async def not_ready():
+        return False
+
+    results = await asyncio.gather(warm.step("ok", ok()), warm.step("broken", broken()), warm.step("ping", not_ready()))
+    assert results == [True, False, False]
+    report = warm.report()
+    assert report["steps"]["ok"] >= 0.01
+    assert sorted(report["failed"]) == ["broken", "ping"]